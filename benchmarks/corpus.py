@@ -0,0 +1,98 @@
+"""
+Deterministic synthetic markdown corpora for benchmarks.
+"""
+import random
+import re
+from dataclasses import asdict, dataclass
+
+_UNITS = {"B": 1, "KB": 1024, "MB": 1024 ** 2, "GB": 1024 ** 3}
+_SIZE_PATTERN = re.compile(r'^\s*(\d+(?:\.\d+)?)\s*([KMG]?B)?\s*$', re.IGNORECASE)
+
+_WORDS = (
+    "vector search retrieval context chunk document token model prompt index query "
+    "embedding semantic ranking latency throughput cache batch header section paragraph "
+    "the a of and to in is that for with as on by this be are from or it an at which "
+    "system pipeline result example value data structure memory process request response"
+).split()
+
+
+def parse_size(value: str) -> int:
+    """
+    Parse a human readable size such as "10KB", "1.5MB" or "4096" into bytes.
+
+    Raises:
+        ValueError: If the value is not a valid size
+    """
+    match = _SIZE_PATTERN.match(value)
+    if match is None:
+        raise ValueError(f"Invalid size: {value!r}")
+    number, unit = match.groups()
+    return int(float(number) * _UNITS[(unit or "B").upper()])
+
+
+def format_size(size: int) -> str:
+    for unit in ("GB", "MB", "KB"):
+        if size >= _UNITS[unit] and size % _UNITS[unit] == 0:
+            return f"{size // _UNITS[unit]}{unit}"
+    return f"{size}B"
+
+
+@dataclass(frozen=True)
+class CorpusSpec:
+    """
+    Shape of a synthetic corpus.
+
+    Attributes:
+        size: Corpus size in bytes (the text is ASCII, so also in characters)
+        headers_per_kb: Average number of markdown headers per KB
+        links_per_kb: Average number of [label](url) links per KB
+        images_per_kb: Average number of ![alt](url) images per KB
+        seed: Random seed, the same spec always produces the same text
+    """
+    size: int
+    headers_per_kb: float = 0.5
+    links_per_kb: float = 1.0
+    images_per_kb: float = 0.2
+    seed: int = 0
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def generate_corpus(spec: CorpusSpec) -> str:
+    """
+    Generate markdown text of exactly spec.size characters.
+
+    Paragraphs are assembled from a fixed pool of sentences, and headers, links
+    and images are inserted whenever their running count falls behind the
+    requested density, so the output is reproducible and evenly structured.
+    """
+    rng = random.Random(spec.seed)
+    sentences = [
+        " ".join(rng.choice(_WORDS) for _ in range(rng.randint(6, 18))).capitalize() + "."
+        for _ in range(512)
+    ]
+
+    parts = []
+    written = headers = links = images = 0
+    while written < spec.size:
+        kilobytes = written / 1024
+        block = []
+        while headers < spec.headers_per_kb * kilobytes:
+            headers += 1
+            block.append(f"{'#' * rng.randint(1, 3)} Section {headers} {rng.choice(_WORDS)}\n\n")
+
+        paragraph = [rng.choice(sentences) for _ in range(rng.randint(2, 6))]
+        while links < spec.links_per_kb * (kilobytes + 0.5):
+            links += 1
+            paragraph.insert(rng.randrange(len(paragraph) + 1), f"See [{rng.choice(_WORDS)}](https://example.com/docs/{links}).")
+        while images < spec.images_per_kb * (kilobytes + 0.5):
+            images += 1
+            paragraph.insert(rng.randrange(len(paragraph) + 1), f"![figure {images}](https://example.com/img/{images}.png)")
+
+        block.append(" ".join(paragraph) + "\n\n")
+        text = "".join(block)
+        parts.append(text)
+        written += len(text)
+
+    return "".join(parts)[:spec.size]
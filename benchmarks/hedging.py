@@ -0,0 +1,121 @@
+"""
+Benchmark of HedgedLLMCall tail latency against local fake backends.
+
+Every backend is a MockLLMCall where a fraction of calls is slow (tail
+latency) or fails. The same sequence of structured-output calls is run
+against the first backend alone and against HedgedLLMCall over all of them,
+and the latency percentiles and the number of backend requests are compared.
+
+Usage:
+    python -m benchmarks.hedging [--calls 500] [--backends 2] [--slow-rate 0.05]
+"""
+import argparse
+import asyncio
+import time
+from typing import List
+
+from pydantic import BaseModel
+
+from instrumentation.aggregator import percentile
+from language_model import HedgedLLMCall, LLMCall
+from language_model.schemas import ChatConversation
+
+from .mock_llm import MockLLMCall
+
+
+class _Answer(BaseModel):
+    answer: str
+
+
+def _backends(args: argparse.Namespace) -> List[MockLLMCall]:
+    return [
+        MockLLMCall(
+            latency=args.latency,
+            jitter=args.jitter,
+            failure_rate=args.failure_rate,
+            slow_rate=args.slow_rate,
+            slow_latency=args.slow_latency,
+            seed=args.seed + index,
+        )
+        for index in range(args.backends)
+    ]
+
+
+async def _measure(call: LLMCall, args: argparse.Namespace) -> dict:
+    conversation = ChatConversation()
+    conversation.add_user_message("benchmark")
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies: List[float] = []
+    failures = 0
+
+    async def one() -> None:
+        nonlocal failures
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await call.generate_structured_output(conversation, _Answer, temperature=0.0)
+            except Exception:
+                failures += 1
+                return
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(args.calls)))
+    return {
+        "seconds": time.perf_counter() - started,
+        "p50": percentile(latencies, 0.5),
+        "p95": percentile(latencies, 0.95),
+        "p99": percentile(latencies, 0.99),
+        "failures": failures,
+    }
+
+
+async def run(args: argparse.Namespace) -> None:
+    single_backends = _backends(args)
+    single = await _measure(single_backends[0], args)
+    single["requests"] = single_backends[0].calls
+
+    backends = _backends(args)
+    hedged_call = HedgedLLMCall(
+        backends,
+        hedge_percentile=args.hedge_percentile,
+        initial_hedge_delay=args.initial_hedge_delay,
+        min_samples=args.min_samples,
+    )
+    hedged = await _measure(hedged_call, args)
+    hedged["requests"] = sum(backend.calls for backend in backends)
+
+    print(f"{'':10} {'p50':>10} {'p95':>10} {'p99':>10} {'failures':>9} {'requests':>9}")
+    for name, result in (("single", single), ("hedged", hedged)):
+        print(
+            f"{name:10} {result['p50'] * 1000:8.1f}ms {result['p95'] * 1000:8.1f}ms "
+            f"{result['p99'] * 1000:8.1f}ms {result['failures']:>9} {result['requests']:>9}"
+        )
+    stats = hedged_call.stats
+    print(f"\nhedges: {stats.hedges} ({stats.hedge_rate:.1%}), hedge wins: {stats.hedge_wins}, fallbacks: {stats.fallbacks}")
+    for backend in hedged_call.backends:
+        print(
+            f"  {backend.name:20} requests {backend.requests:>5}  wins {backend.wins:>5}  "
+            f"p50 {backend.histogram.percentile(0.5) * 1000:7.1f}ms  p95 {backend.histogram.percentile(0.95) * 1000:7.1f}ms"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--backends", type=int, default=2)
+    parser.add_argument("--latency", type=float, default=0.05, help="Mean backend latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.01)
+    parser.add_argument("--slow-rate", type=float, default=0.05, help="Fraction of slow backend calls")
+    parser.add_argument("--slow-latency", type=float, default=1.0, help="Latency of slow calls in seconds")
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--hedge-percentile", type=float, default=0.9)
+    parser.add_argument("--initial-hedge-delay", type=float, default=0.2)
+    parser.add_argument("--min-samples", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Benchmark of cold import and first-use time of the library packages.
+
+Every measurement runs in a fresh interpreter, so nothing is shared between
+runs through sys.modules. For each module it reports the wall time of the
+import, whether the openai SDK, tiktoken, numpy or langfuse were loaded as a side
+effect, and the time of constructing a TiktokenTokenizer and of its first
+token count.
+
+Usage:
+    python -m benchmarks.import_time [--repeat 5] [--modules document.splitter,language_model]
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+DEFAULT_MODULES = [
+    "document.splitter",
+    "document.context_generator",
+    "language_model",
+    "language_model.schemas",
+    "retrieval",
+    "openai_client",
+]
+
+SIDE_EFFECTS = ["openai", "tiktoken", "numpy", "langfuse"]
+
+_IMPORT_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "loaded": [name for name in {side_effects!r} if name in sys.modules]}}))
+"""
+
+_TOKENIZER_PROBE = """
+import json, time
+from tokenization import TiktokenTokenizer
+start = time.perf_counter()
+tokenizers = [TiktokenTokenizer() for _ in range(10)]
+constructed = time.perf_counter() - start
+start = time.perf_counter()
+tokenizers[0].count_tokens("hello world")
+first = time.perf_counter() - start
+start = time.perf_counter()
+for tokenizer in tokenizers[1:]:
+    tokenizer.count_tokens("hello world")
+others = time.perf_counter() - start
+print(json.dumps({"construct_10": constructed, "first_count": first, "other_9_counts": others}))
+"""
+
+
+def _run(code: str) -> dict:
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+    if result.returncode != 0:
+        return {"error": result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "failed"}
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def measure_import(module: str, repeat: int) -> dict:
+    runs = [_run(_IMPORT_PROBE.format(module=module, side_effects=SIDE_EFFECTS)) for _ in range(repeat)]
+    errors = [run["error"] for run in runs if "error" in run]
+    if errors:
+        return {"module": module, "error": errors[0]}
+    return {
+        "module": module,
+        "median_ms": statistics.median(run["seconds"] for run in runs) * 1000,
+        "loaded": runs[0]["loaded"],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--modules", default=",".join(DEFAULT_MODULES))
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    imports = [measure_import(module, args.repeat) for module in args.modules.split(",")]
+    tokenizer = _run(_TOKENIZER_PROBE)
+
+    print(f"{'module':32} {'import':>10}  side effects")
+    for result in imports:
+        if "error" in result:
+            print(f"{result['module']:32} {'failed':>10}  {result['error']}")
+        else:
+            print(f"{result['module']:32} {result['median_ms']:8.1f}ms  {', '.join(result['loaded']) or '-'}")
+
+    if "error" in tokenizer:
+        print(f"\nTiktokenTokenizer: failed ({tokenizer['error']})")
+    else:
+        print("\nTiktokenTokenizer:")
+        print(f"  10 instances:        {tokenizer['construct_10'] * 1000:8.1f}ms")
+        print(f"  first count_tokens:  {tokenizer['first_count'] * 1000:8.1f}ms")
+        print(f"  9 other instances:   {tokenizer['other_9_counts'] * 1000:8.1f}ms")
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump({"imports": imports, "tokenizer": tokenizer}, output, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+import asyncio
+import random
+import types
+from enum import Enum
+from typing import Any, AsyncGenerator, Literal, Type, Union, get_args, get_origin
+
+from pydantic import BaseModel
+
+from language_model import LLMCall
+from language_model.base import ResponseT
+from language_model.schemas import ChatConversation
+
+
+class MockLLMCall(LLMCall):
+    """
+    LLMCall that answers after a simulated network latency instead of calling an API.
+
+    Structured responses are built from the fields of the response model:
+    strings are "mock <field>", numbers are the position in the enclosing list
+    (0 outside lists), nested models are built recursively and lists have
+    list_length items. A ChunkContexts response therefore holds contexts for
+    chunk indices 0..list_length-1, which drives BatchedContextGenerator.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.05,
+        jitter: float = 0.0,
+        failure_rate: float = 0.0,
+        seed: int = 0,
+        slow_rate: float = 0.0,
+        slow_latency: float = 1.0,
+        list_length: int = 16,
+    ):
+        """
+        Args:
+            latency: Mean response time in seconds
+            jitter: Maximum deviation from the mean latency in seconds (uniformly distributed)
+            failure_rate: Fraction of calls raising RuntimeError, to exercise retries
+            seed: Random seed for jitter, failures and slow responses
+            slow_rate: Fraction of calls taking slow_latency instead, to simulate tail latency
+            slow_latency: Response time of slow calls in seconds
+            list_length: Number of items of every list in structured responses
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.list_length = list_length
+        self.calls = 0
+        self.failures = 0
+        self._random = random.Random(seed)
+
+    async def generate_structured_output(
+        self, messages: ChatConversation, response_model: Type[ResponseT], temperature: float = 0.7, model_name: str | None = None
+    ) -> ResponseT:
+        await self._respond()
+        return response_model.model_validate(self._mock_value(response_model, "response", 0))
+
+    async def generate_stream(self, messages: ChatConversation, temperature: float = 0.7) -> AsyncGenerator[str, None]:
+        await self._respond()
+        for word in ("mock ", "streamed ", "response"):
+            yield word
+
+    def _mock_value(self, annotation: Any, name: str, position: int) -> Any:
+        origin = get_origin(annotation)
+        if origin in (Union, types.UnionType):
+            options = [option for option in get_args(annotation) if option is not type(None)]
+            return self._mock_value(options[0], name, position) if options else None
+        if origin is Literal:
+            return get_args(annotation)[0]
+        if origin in (list, tuple, set, frozenset):
+            item = (get_args(annotation) or (str,))[0]
+            return [self._mock_value(item, name, index) for index in range(self.list_length)]
+        if origin is dict:
+            return {}
+        if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+            return {
+                field_name: self._mock_value(field.annotation, field_name, position)
+                for field_name, field in annotation.model_fields.items()
+            }
+        if isinstance(annotation, type) and issubclass(annotation, Enum):
+            return next(iter(annotation)).value
+        if annotation is bool:
+            return False
+        if annotation in (int, float):
+            return annotation(position)
+        return f"mock {name}"
+
+    async def _respond(self) -> None:
+        self.calls += 1
+        delay = self.latency + self._random.uniform(-self.jitter, self.jitter)
+        if self.slow_rate and self._random.random() < self.slow_rate:
+            delay = self.slow_latency
+        await asyncio.sleep(max(delay, 0.0))
+        if self._random.random() < self.failure_rate:
+            self.failures += 1
+            raise RuntimeError("Simulated LLM failure")
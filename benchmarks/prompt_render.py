@@ -0,0 +1,62 @@
+"""
+Benchmark of prompt render time per chunk for LLMContextGenerator.
+
+Compares building a fresh PromptBuilder for every chunk (the previous
+behaviour) with rendering the compiled template.
+
+Usage:
+    python -m benchmarks.prompt_render [--document example.md] [--chunks 300]
+"""
+import argparse
+import time
+from pathlib import Path
+
+from document.context_generator import LLMContextGenerator
+from language_model import LLMCall
+
+
+class _UnusedLLMCall(LLMCall):
+    """Placeholder call; the benchmark only renders prompts and never sends them."""
+
+    async def generate_structured_output(self, messages, response_model, temperature=0.7, model_name=None):
+        return response_model.model_construct()
+
+    async def generate_stream(self, messages, temperature=0.7):
+        return
+        yield
+
+
+def _chunks(document: str, count: int) -> list[str]:
+    size = max(len(document) // count, 1)
+    return [document[i * size:(i + 1) * size] for i in range(count)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--document", type=Path, default=Path("example.md"))
+    parser.add_argument("--chunks", type=int, default=300)
+    args = parser.parse_args()
+
+    document = args.document.read_text()
+    chunks = _chunks(document, args.chunks)
+    generator = LLMContextGenerator(_UnusedLLMCall())
+
+    start = time.perf_counter()
+    built = [generator._get_prompt(chunk, document).build() for chunk in chunks]
+    builder_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    rendered = [generator._render_prompt(chunk, document) for chunk in chunks]
+    compiled_time = time.perf_counter() - start
+
+    if built != rendered:
+        raise SystemExit("Compiled template output differs from PromptBuilder.build()")
+
+    print(f"chunks:          {len(chunks)}")
+    print(f"PromptBuilder:   {builder_time / len(chunks) * 1e6:10.1f} us/chunk")
+    print(f"CompiledPrompt:  {compiled_time / len(chunks) * 1e6:10.1f} us/chunk")
+    print(f"speedup:         {builder_time / compiled_time:10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+"""
+Benchmark suite for TextSplitter and contextual ingestion.
+
+Generates synthetic markdown corpora, measures chunking throughput, peak
+Python heap usage and tokenizer calls, and runs context generation against
+MockLLMCall with configurable latency. Results are written as JSON so runs
+from different commits can be compared.
+
+The scan mode (use_token_index=False) re-tokenizes the remaining text for
+every chunk, so its cost grows quadratically; it is skipped for corpora
+larger than --scan-max-size.
+
+Usage:
+    python -m benchmarks.splitting [--sizes 10KB,1MB,100MB] [--output results.json]
+"""
+import argparse
+import asyncio
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+
+from document.context_generator import LLMContextGenerator
+from document.splitter import TextSplitter
+from instrumentation import InMemoryAggregator
+from instrumentation.aggregator import percentile
+from tokenization import TiktokenTokenizer, Tokenizer
+
+from .corpus import CorpusSpec, format_size, generate_corpus, parse_size
+from .mock_llm import MockLLMCall
+
+DEFAULT_SIZES = "10KB,100KB,1MB,10MB,100MB"
+
+
+class CountingTokenizer:
+    """Tokenizer wrapper counting calls and encoded characters per method."""
+
+    def __init__(self, tokenizer: Tokenizer):
+        self._tokenizer = tokenizer
+        self.wrapper_overhead = tokenizer.wrapper_overhead
+        self.piece_pattern = tokenizer.piece_pattern
+        self.calls: Counter = Counter()
+        self.characters: Counter = Counter()
+
+    def count_tokens(self, text: str) -> int:
+        self.calls["count_tokens"] += 1
+        self.characters["count_tokens"] += len(text)
+        return self._tokenizer.count_tokens(text)
+
+    def count_tokens_batch(self, texts: List[str]) -> List[int]:
+        self.calls["count_tokens_batch"] += 1
+        self.characters["count_tokens_batch"] += sum(map(len, texts))
+        return self._tokenizer.count_tokens_batch(texts)
+
+    def encode_with_offsets(self, text: str) -> Tuple[List[int], List[int]]:
+        self.calls["encode_with_offsets"] += 1
+        self.characters["encode_with_offsets"] += len(text)
+        return self._tokenizer.encode_with_offsets(text)
+
+    def format_for_tokenization(self, text: str) -> str:
+        return self._tokenizer.format_for_tokenization(text)
+
+    def reset(self) -> None:
+        self.calls.clear()
+        self.characters.clear()
+
+
+def _stage_summary(aggregator: InMemoryAggregator) -> dict:
+    stages = {
+        metric: {
+            "count": len(values),
+            "total": sum(values),
+            "p50": percentile(values, 0.5),
+            "p95": percentile(values, 0.95),
+        }
+        for metric, values in aggregator.observations.items()
+    }
+    return {"stages": stages, "counters": dict(aggregator.counters)}
+
+
+def bench_split(text: str, tokenizer: Tokenizer, limit: int, use_token_index: bool, repeat: int, measure_memory: bool) -> dict:
+    """
+    Chunk the text `repeat` times and report throughput, tokenizer calls and stage timings.
+
+    Timing runs use disabled instrumentation; stage timings, tokenizer calls and
+    peak memory come from one extra run each, so they do not skew throughput.
+    """
+    counting = CountingTokenizer(tokenizer)
+    splitter = TextSplitter(tokenizer=counting, use_token_index=use_token_index)
+
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        chunks = splitter.chunk(text, limit)
+        timings.append(time.perf_counter() - started)
+
+    counting.reset()
+    aggregator = InMemoryAggregator()
+    TextSplitter(tokenizer=counting, use_token_index=use_token_index, instrumentation=aggregator).chunk(text, limit)
+
+    result = {
+        "mode": "index" if use_token_index else "scan",
+        "chunks": len(chunks),
+        "tokens": sum(chunk.metadata.tokens for chunk in chunks),
+        "seconds_best": min(timings),
+        "seconds_median": statistics.median(timings),
+        "mb_per_second": len(text.encode()) / 1024 ** 2 / min(timings),
+        "chunks_per_second": len(chunks) / min(timings),
+        "tokenizer_calls": dict(counting.calls),
+        "tokenizer_characters": dict(counting.characters),
+        **_stage_summary(aggregator),
+    }
+
+    if measure_memory:
+        del chunks
+        tracemalloc.start()
+        splitter.chunk(text, limit)
+        result["peak_memory_bytes"] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return result
+
+
+async def bench_context(text: str, tokenizer: Tokenizer, limit: int, args: argparse.Namespace) -> dict:
+    """Run split() with LLMContextGenerator backed by MockLLMCall."""
+    call = MockLLMCall(latency=args.latency, jitter=args.jitter, failure_rate=args.failure_rate, seed=args.seed)
+    aggregator = InMemoryAggregator()
+    splitter = TextSplitter(
+        tokenizer=tokenizer,
+        context_generator=LLMContextGenerator(call),
+        use_token_index=True,
+        max_concurrency=args.concurrency,
+        max_retries=args.retries,
+        retry_delay=0.0,
+        instrumentation=aggregator,
+    )
+
+    started = time.perf_counter()
+    documents = await splitter.split(text, limit)
+    elapsed = time.perf_counter() - started
+
+    return {
+        "chunks": len(documents),
+        "seconds": elapsed,
+        "chunks_per_second": len(documents) / elapsed,
+        "llm_calls": call.calls,
+        "llm_failures": call.failures,
+        "missing_contexts": sum(document.metadata.context is None for document in documents),
+        **_stage_summary(aggregator),
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args: argparse.Namespace) -> dict:
+    tokenizer = TiktokenTokenizer(args.model)
+    results = []
+
+    for size in [parse_size(size) for size in args.sizes.split(",")]:
+        spec = CorpusSpec(
+            size=size,
+            headers_per_kb=args.headers_per_kb,
+            links_per_kb=args.links_per_kb,
+            images_per_kb=args.images_per_kb,
+            seed=args.seed,
+        )
+        started = time.perf_counter()
+        text = generate_corpus(spec)
+        print(f"{format_size(size)}: corpus generated in {time.perf_counter() - started:.2f}s", file=sys.stderr)
+
+        entry = {"corpus": spec.to_dict(), "split": [], "context": None}
+        for mode in args.modes.split(","):
+            if mode == "scan" and size > parse_size(args.scan_max_size):
+                entry["split"].append({"mode": mode, "skipped": f"corpus larger than {args.scan_max_size}"})
+                continue
+            split = bench_split(text, tokenizer, args.limit, mode == "index", args.repeat, not args.no_memory)
+            entry["split"].append(split)
+            print(f"{format_size(size)} {mode}: {split['mb_per_second']:.2f} MB/s, {split['chunks']} chunks", file=sys.stderr)
+
+        if size <= parse_size(args.context_max_size):
+            entry["context"] = asyncio.run(bench_context(text, tokenizer, args.limit, args))
+            print(f"{format_size(size)} context: {entry['context']['chunks_per_second']:.1f} chunks/s", file=sys.stderr)
+
+        results.append(entry)
+
+    return {
+        "commit": _git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "config": vars(args),
+        "results": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="comma separated corpus sizes")
+    parser.add_argument("--limit", type=int, default=1000, help="chunk token limit")
+    parser.add_argument("--modes", default="index,scan", help="comma separated splitter modes: index, scan")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per corpus and mode")
+    parser.add_argument("--headers-per-kb", type=float, default=0.5)
+    parser.add_argument("--links-per-kb", type=float, default=1.0)
+    parser.add_argument("--images-per-kb", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--model", default="gpt-4o", help="tiktoken model name")
+    parser.add_argument("--scan-max-size", default="1MB", help="largest corpus benchmarked in scan mode")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc peak memory run")
+    parser.add_argument("--context-max-size", default="100KB", help="largest corpus used for context generation")
+    parser.add_argument("--latency", type=float, default=0.05, help="mock LLM mean latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.02, help="mock LLM latency jitter in seconds")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="fraction of failing mock LLM calls")
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent context generations")
+    parser.add_argument("--retries", type=int, default=2, help="context generation retries")
+    parser.add_argument("--output", help="write JSON to this file instead of stdout")
+    args = parser.parse_args()
+
+    report = json.dumps(run(args), indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output:
+            output.write(report + "\n")
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,4 @@
 from .builder import ChatBotBuilder, GradioChatbotBuilder
+from .handlers import llm_stream_handler
 
-__all__ = ['GradioChatbotBuilder', "ChatBotBuilder"]
\ No newline at end of file
+__all__ = ['GradioChatbotBuilder', "ChatBotBuilder", "llm_stream_handler"]
\ No newline at end of file
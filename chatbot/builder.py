@@ -1,11 +1,16 @@
+import inspect
+import time
 from abc import ABC
-from typing import Callable, Self
+from functools import wraps
+from typing import AsyncGenerator, Callable, Optional, Self
 
 import gradio as gr
 
+from instrumentation import NULL_INSTRUMENTATION, Instrumentation
+
 
 class ChatBotBuilder(ABC):
-    
+
     def with_markdown_ouput(self, label: str) -> Self:
         raise NotImplementedError
 
@@ -14,6 +19,14 @@ class ChatBotBuilder(ABC):
         raise NotImplementedError
 
 
+    def with_queue(self, concurrency_limit: int = 5, max_size: Optional[int] = None, max_batch_size: Optional[int] = None) -> Self:
+        raise NotImplementedError
+
+
+    def with_instrumentation(self, instrumentation: Instrumentation) -> Self:
+        raise NotImplementedError
+
+
     def build(self, handler: Callable)-> None:
         raise NotImplementedError
 
@@ -24,6 +37,10 @@ class GradioChatbotBuilder(ChatBotBuilder):
         self._outputs = []
         self._inputs = []
         self._chat_interface_enabled = chat_interface_enabled
+        self._concurrency_limit = 5
+        self._max_queue_size = None
+        self._max_batch_size = None
+        self._instrumentation = NULL_INSTRUMENTATION
 
 
     def with_markdown_ouput(self, label: str) -> Self:
@@ -36,9 +53,85 @@ class GradioChatbotBuilder(ChatBotBuilder):
 
         return self
 
+    def with_queue(self, concurrency_limit: int = 5, max_size: Optional[int] = None, max_batch_size: Optional[int] = None) -> Self:
+        """
+        Configure the Gradio request queue.
+
+        Args:
+            concurrency_limit: Number of requests processed at the same time
+            max_size: Maximum number of queued requests, further users are rejected (unbounded by default)
+            max_batch_size: Enables batch mode for Interface handlers, which then receive and return
+                lists of up to this many inputs; ignored by the chat interface and streaming handlers
+        """
+        self._concurrency_limit = concurrency_limit
+        self._max_queue_size = max_size
+        self._max_batch_size = max_batch_size
+
+        return self
+
+    def with_instrumentation(self, instrumentation: Instrumentation) -> Self:
+        """Record time to first token and tokens per second of handlers yielding deltas (see build())."""
+        self._instrumentation = instrumentation
+
+        return self
+
     def build(self, handler: Callable)-> None:
-        if self._chat_interface_enabled:
-            gr.ChatInterface(fn=handler, flagging_mode='never', concurrency_limit=5).launch()   
-            return
+        """
+        Launch the interface with the given handler.
+
+        Generator handlers are streamed as usual in Gradio, each yielded value
+        replacing the displayed response. Handlers marked with yields_deltas
+        (e.g. created by llm_stream_handler) yield text deltas instead; the UI is
+        then updated with the accumulated response after every delta and the
+        stream is instrumented.
+        """
+        streaming = inspect.isasyncgenfunction(handler) or inspect.isgeneratorfunction(handler)
+        if getattr(handler, "yields_deltas", False):
+            handler = _accumulate_stream(handler, self._instrumentation)
 
-        gr.Interface(fn=handler, inputs=self._inputs, outputs=self._outputs, flagging_mode='never', concurrency_limit=5).launch()   
+        if self._chat_interface_enabled:
+            interface = gr.ChatInterface(fn=handler, flagging_mode='never', concurrency_limit=self._concurrency_limit)
+        else:
+            batch = self._max_batch_size is not None and not streaming
+            interface = gr.Interface(
+                fn=handler,
+                inputs=self._inputs,
+                outputs=self._outputs,
+                flagging_mode='never',
+                concurrency_limit=self._concurrency_limit,
+                batch=batch,
+                max_batch_size=self._max_batch_size if batch else 4,
+            )
+
+        interface.queue(default_concurrency_limit=self._concurrency_limit, max_size=self._max_queue_size).launch()
+
+
+def _accumulate_stream(handler: Callable[..., AsyncGenerator[str, None]], instrumentation: Instrumentation) -> Callable:
+    """
+    Wrap a handler yielding text deltas into one yielding the response accumulated so far.
+
+    Every delta is counted as one token, which matches the chunks streamed by
+    the OpenAI API.
+    """
+    @wraps(handler)
+    async def stream(*args, **kwargs) -> AsyncGenerator[str, None]:
+        started = time.perf_counter()
+        first_token = None
+        tokens = 0
+        response = ""
+
+        async for delta in handler(*args, **kwargs):
+            if first_token is None:
+                first_token = time.perf_counter()
+            tokens += 1
+            response += delta
+            yield response
+
+        if instrumentation.enabled and first_token is not None:
+            finished = time.perf_counter()
+            instrumentation.observe("chat.time_to_first_token", first_token - started)
+            instrumentation.observe("chat.response_tokens", tokens)
+            if finished > first_token:
+                instrumentation.observe("chat.tokens_per_second", tokens / (finished - first_token))
+
+    return stream
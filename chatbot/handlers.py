@@ -0,0 +1,44 @@
+from typing import AsyncGenerator, Callable, Optional
+
+from language_model import LLMCall
+from language_model.schemas import ChatConversation
+
+
+def llm_stream_handler(call: LLMCall, system_prompt: Optional[str] = None, temperature: float = 0.7) -> Callable:
+    """
+    Create a streaming chat handler for GradioChatbotBuilder(chat_interface_enabled=True).
+
+    The handler rebuilds the conversation from the Gradio history and yields
+    the deltas of LLMCall.generate_stream. It is marked with yields_deltas, so
+    the builder accumulates them into the response shown in the UI.
+
+    Args:
+        call: Language model used to answer
+        system_prompt: Optional system message prepended to every conversation
+        temperature: Randomness parameter passed to the model
+    """
+    async def handler(message: str, history: list) -> AsyncGenerator[str, None]:
+        conversation = ChatConversation()
+        if system_prompt:
+            conversation.add_system_message(system_prompt)
+
+        for entry in history:
+            if isinstance(entry, dict):
+                if entry["role"] == "user":
+                    conversation.add_user_message(entry["content"])
+                elif entry["role"] == "assistant":
+                    conversation.add_assistant_message(entry["content"])
+            else:
+                user_message, assistant_message = entry
+                if user_message:
+                    conversation.add_user_message(user_message)
+                if assistant_message:
+                    conversation.add_assistant_message(assistant_message)
+
+        conversation.add_user_message(message)
+
+        async for delta in call.generate_stream(conversation, temperature):
+            yield delta
+
+    handler.yields_deltas = True
+    return handler
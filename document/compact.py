@@ -0,0 +1,140 @@
+import sys
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from .schemas import Document, DocumentMetadata
+
+HeaderSnapshot = Tuple[Tuple[str, Tuple[str, ...]], ...]
+LinkExtractor = Callable[[str], Tuple[str, List[str], List[str]]]
+
+
+class ChunkRecord:
+    """Fragment jako zakres we wspólnym buforze tekstu wraz z indeksami do współdzielonych tablic."""
+    __slots__ = ("start", "end", "tokens", "headers_id", "urls_start", "urls_end", "images_start", "images_end", "context")
+
+    def __init__(
+        self, start: int, end: int, tokens: int, headers_id: int,
+        urls_start: int, urls_end: int, images_start: int, images_end: int,
+    ) -> None:
+        self.start = start
+        self.end = end
+        self.tokens = tokens
+        self.headers_id = headers_id
+        self.urls_start = urls_start
+        self.urls_end = urls_end
+        self.images_start = images_start
+        self.images_end = images_end
+        self.context: Optional[str] = None
+
+
+class CompactDocument:
+    """Lekki widok na fragment w ChunkStore; tekst z placeholderami powstaje dopiero przy odczycie."""
+    __slots__ = ("_store", "_record")
+
+    def __init__(self, store: "ChunkStore", record: ChunkRecord) -> None:
+        self._store = store
+        self._record = record
+
+    @property
+    def raw_text(self) -> str:
+        return self._store.source[self._record.start:self._record.end]
+
+    @property
+    def text(self) -> str:
+        record = self._record
+        if record.urls_start == record.urls_end and record.images_start == record.images_end:
+            return self.raw_text
+        return self._store.extract_links(self.raw_text)[0]
+
+    @property
+    def span(self) -> Tuple[int, int]:
+        return self._record.start, self._record.end
+
+    @property
+    def tokens(self) -> int:
+        return self._record.tokens
+
+    @property
+    def headers(self) -> dict:
+        return {key: list(values) for key, values in self._store.headers[self._record.headers_id]}
+
+    @property
+    def urls(self) -> List[str]:
+        return self._store.urls[self._record.urls_start:self._record.urls_end]
+
+    @property
+    def images(self) -> List[str]:
+        return self._store.images[self._record.images_start:self._record.images_end]
+
+    @property
+    def context(self) -> Optional[str]:
+        return self._record.context
+
+    @context.setter
+    def context(self, value: Optional[str]) -> None:
+        self._record.context = value
+
+    def to_document(self) -> Document:
+        """Tworzy pełny Document (pydantic), identyczny z wynikiem TextSplitter.chunk()."""
+        return Document(
+            text=self.text,
+            metadata=DocumentMetadata(
+                tokens=self.tokens,
+                headers=self.headers,
+                urls=self.urls,
+                images=self.images,
+                context=self.context,
+            )
+        )
+
+
+class ChunkStore:
+    """
+    Zwarta reprezentacja fragmentów dokumentu.
+
+    Zamiast kopii tekstu każdy fragment przechowuje zakres (start, end) w buforze
+    source. Stany nagłówków są internowane (fragmenty tej samej sekcji współdzielą
+    jeden wpis), a adresy URL i obrazów trafiają do wspólnych tablic, z których
+    fragment wskazuje swój przedział.
+    """
+
+    def __init__(self, source: str, extract_links: LinkExtractor) -> None:
+        """
+        Args:
+            source: Pełny tekst dokumentu.
+            extract_links: Funkcja zastępująca linki i obrazy placeholderami, zwracająca
+                (treść, urls, images), np. TextSplitter.extract_urls_and_images.
+        """
+        self.source = source
+        self.extract_links = extract_links
+        self.records: List[ChunkRecord] = []
+        self.headers: List[HeaderSnapshot] = []
+        self.urls: List[str] = []
+        self.images: List[str] = []
+        self._header_ids: Dict[HeaderSnapshot, int] = {}
+
+    def append(self, start: int, end: int, tokens: int, headers: dict, urls: List[str], images: List[str]) -> ChunkRecord:
+        snapshot = tuple((key, tuple(values)) for key, values in headers.items())
+        headers_id = self._header_ids.get(snapshot)
+        if headers_id is None:
+            headers_id = self._header_ids[snapshot] = len(self.headers)
+            self.headers.append(snapshot)
+
+        urls_start, images_start = len(self.urls), len(self.images)
+        self.urls.extend(sys.intern(url) for url in urls)
+        self.images.extend(sys.intern(image) for image in images)
+
+        record = ChunkRecord(start, end, tokens, headers_id, urls_start, len(self.urls), images_start, len(self.images))
+        self.records.append(record)
+        return record
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __getitem__(self, index: int) -> CompactDocument:
+        return CompactDocument(self, self.records[index])
+
+    def __iter__(self) -> Iterator[CompactDocument]:
+        return (CompactDocument(self, record) for record in self.records)
+
+    def to_documents(self) -> List[Document]:
+        return [document.to_document() for document in self]
@@ -0,0 +1,169 @@
+import asyncio
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional, Union
+
+from .context_generator import CacheStats, ContextGenerator, document_digest
+
+
+class SQLiteContextStore:
+    """
+    Trwały magazyn wygenerowanych kontekstów oparty na SQLite.
+
+    Baza działa w trybie WAL, więc może być współdzielona przez kilka procesów;
+    w obrębie procesu dostęp do połączenia chroni blokada, dzięki czemu magazyn
+    można wywoływać z wątków roboczych asyncio.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        max_entries: Optional[int] = None,
+        max_age: Optional[float] = None,
+        eviction_interval: int = 100,
+    ):
+        """
+        Args:
+            path: Ścieżka do pliku bazy.
+            max_entries: Maksymalna liczba wpisów; najdawniej używane są usuwane jako pierwsze.
+            max_age: Maksymalny wiek wpisu w sekundach.
+            eviction_interval: Co ile zapisów uruchamiane jest usuwanie wpisów.
+        """
+        self._max_entries = max_entries
+        self._max_age = max_age
+        self._eviction_interval = eviction_interval
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(str(path), timeout=30.0, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS contexts ("
+            "key TEXT PRIMARY KEY, context TEXT NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS contexts_accessed_at ON contexts (accessed_at)")
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT context, created_at FROM contexts WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            context, created_at = row
+            if self._max_age is not None and now - created_at > self._max_age:
+                self._connection.execute("DELETE FROM contexts WHERE key = ?", (key,))
+                return None
+            self._connection.execute("UPDATE contexts SET accessed_at = ? WHERE key = ?", (now, key))
+            return context
+
+    def put(self, key: str, context: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO contexts (key, context, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, context, now, now),
+            )
+            self._writes += 1
+            if self._writes % self._eviction_interval == 0:
+                self._evict(now)
+
+    def evict(self) -> int:
+        """Usuwa przeterminowane i nadmiarowe wpisy, zwraca liczbę usuniętych."""
+        with self._lock:
+            return self._evict(time.time())
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM contexts").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+    def _evict(self, now: float) -> int:
+        removed = 0
+        if self._max_age is not None:
+            removed += self._connection.execute(
+                "DELETE FROM contexts WHERE created_at < ?", (now - self._max_age,)
+            ).rowcount
+        if self._max_entries is not None:
+            removed += self._connection.execute(
+                "DELETE FROM contexts WHERE key IN ("
+                "SELECT key FROM contexts ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self._max_entries,),
+            ).rowcount
+        return removed
+
+
+class CachedContextGenerator(ContextGenerator):
+    """
+    Generator kontekstów zapamiętujący wyniki innego generatora w SQLiteContextStore.
+
+    Klucz wpisu to skrót fragmentu, całego dokumentu oraz odcisku generatora
+    (wyrenderowany szablon promptu i nazwa modelu), więc niezmienione dokumenty
+    są ponownie przetwarzane bez wywołań LLM.
+
+    Grupowanie fragmentów (plan_batches, generate_contexts) jest przekazywane do
+    opakowanego generatora, więc cache można łączyć z BatchedContextGenerator:
+    z partii generowane są tylko fragmenty nieobecne w magazynie.
+    """
+
+    def __init__(self, generator: ContextGenerator, store: SQLiteContextStore):
+        self._generator = generator
+        self._store = store
+        self._fingerprint = generator.fingerprint()
+        self.stats = CacheStats()
+
+    async def generate_context(self, chunk: str, original_text: str, offset: Optional[int] = None) -> str:
+        key = self._key(chunk, original_text)
+
+        cached = await asyncio.to_thread(self._store.get, key)
+        if cached is not None:
+            self.stats.hits += 1
+            return cached
+
+        self.stats.misses += 1
+        context = await self._generator.generate_context(chunk, original_text, offset)
+        await asyncio.to_thread(self._store.put, key, context)
+        return context
+
+    def plan_batches(self, chunks: List[str]) -> List[List[int]]:
+        return self._generator.plan_batches(chunks)
+
+    async def generate_contexts(
+        self, chunks: List[str], original_text: str, offsets: Optional[List[int]] = None
+    ) -> List[str]:
+        keys = [self._key(chunk, original_text) for chunk in chunks]
+        contexts = await asyncio.to_thread(lambda: [self._store.get(key) for key in keys])
+
+        missing = [index for index, context in enumerate(contexts) if context is None]
+        self.stats.hits += len(chunks) - len(missing)
+        self.stats.misses += len(missing)
+        if not missing:
+            return contexts
+
+        generated = await self._generator.generate_contexts(
+            [chunks[index] for index in missing],
+            original_text,
+            [offsets[index] for index in missing] if offsets is not None else None,
+        )
+        for index, context in zip(missing, generated):
+            contexts[index] = context
+        await asyncio.to_thread(lambda: [self._store.put(keys[index], contexts[index]) for index in missing])
+        return contexts
+
+    def fingerprint(self) -> str:
+        return self._fingerprint
+
+    def _key(self, chunk: str, original_text: str) -> str:
+        digest = hashlib.sha256()
+        for part in (self._fingerprint, document_digest(original_text), chunk):
+            encoded = part.encode()
+            digest.update(len(encoded).to_bytes(8, "big"))
+            digest.update(encoded)
+        return digest.hexdigest()
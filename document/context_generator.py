@@ -1,18 +1,68 @@
+import hashlib
 from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
+from typing import List, Optional
 
 from pydantic import BaseModel
 
 from language_model import LLMCall
-from language_model.prompt import PromptBuilder
+from language_model.prompt import CompiledPrompt, PromptBuilder
+from language_model.prompt.template import format_context
 from language_model.schemas import ChatConversation
+from tokenization import TiktokenTokenizer, Tokenizer
+
+
+@lru_cache(maxsize=16)
+def document_digest(text: str) -> str:
+    """
+    Skrót SHA-256 tekstu dokumentu, używany jako klucz cache'y per dokument.
+
+    Ostatnie skróty są zapamiętywane, więc kolejne fragmenty tego samego
+    dokumentu nie haszują go ponownie.
+    """
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
 
 
 class ContextGenerator(ABC):
 
     @abstractmethod
-    async def generate_context(self, chunk: str, original_text: str) -> str:
-        pass
+    async def generate_context(self, chunk: str, original_text: str, offset: Optional[int] = None) -> str:
+        """
+        Generuje kontekst fragmentu dokumentu.
+
+        Args:
+            offset: Pozycja początku fragmentu w original_text, jeśli jest znana
+                (TextSplitter przekazuje ją zawsze); generatory mogą ją pominąć.
+        """
+
+    def fingerprint(self) -> str:
+        """Identyfikuje konfigurację generatora (np. szablon promptu i model) na potrzeby cache."""
+        return type(self).__qualname__
+
+    def plan_batches(self, chunks: List[str]) -> List[List[int]]:
+        """Dzieli fragmenty (indeksy) na partie generowane jednym wywołaniem. Domyślnie każdy fragment osobno."""
+        return [[index] for index in range(len(chunks))]
+
+    async def generate_contexts(
+        self, chunks: List[str], original_text: str, offsets: Optional[List[int]] = None
+    ) -> List[str]:
+        """Generuje konteksty dla partii fragmentów tego samego dokumentu, zachowując ich kolejność."""
+        positions = offsets if offsets is not None else [None] * len(chunks)
+        return [await self.generate_context(chunk, original_text, offset) for chunk, offset in zip(chunks, positions)]
 
 
 
@@ -22,28 +72,59 @@ class Context(BaseModel):
 
 class LLMContextGenerator(ContextGenerator):
 
-    def __init__(self, call: LLMCall) -> None:
+    def __init__(self, call: LLMCall, prefix_stable: bool = False, prefix_cache_size: int = 8) -> None:
+        """
+        Args:
+            call: Model językowy generujący konteksty.
+            prefix_stable: Jeśli True, instrukcje, przykłady i pełny dokument trafiają do wiadomości
+                systemowej identycznej dla wszystkich fragmentów dokumentu, a sam fragment do osobnej,
+                ostatniej wiadomości. Stały prefiks pozwala dostawcy na cache'owanie promptu.
+            prefix_cache_size: Liczba dokumentów, których prefiksy są przechowywane w pamięci;
+                przy współbieżnym przetwarzaniu kilku dokumentów powinna być co najmniej ich liczbą.
+        """
         self._call = call
+        self._template: CompiledPrompt | None = None
+        self._prefix_stable = prefix_stable
+        self._prefix_cache_size = prefix_cache_size
+        self._prefixes: OrderedDict[str, str] = OrderedDict()
+        self.prefix_stats = CacheStats()
         
 
     
-    async def generate_context(self, chunk: str, original_text: str) -> str:
-        prompt_builder = self._get_prompt(chunk, original_text)
-        conversation = self._get_chat_conversation(prompt_builder)
+    async def generate_context(self, chunk: str, original_text: str, offset: Optional[int] = None) -> str:
+        if self._prefix_stable:
+            conversation = self._get_prefix_stable_conversation(chunk, original_text)
+        else:
+            conversation = self._get_chat_conversation(self._render_prompt(chunk, original_text))
         
         response = await self._call.generate_structured_output(messages=conversation, response_model=Context, temperature=0.0)
 
         return response.context
+
+    def fingerprint(self) -> str:
+        if self._prefix_stable:
+            template = f"{self._build_prefix('{original_text}')}\n{format_context({'chunk': '{chunk}'})}"
+        else:
+            template = self._get_prompt("{chunk}", "{original_text}").build()
+        digest = hashlib.sha256(template.encode()).hexdigest()
+        return f"{type(self).__qualname__}:{self._call.model_name}:{digest}"
     
-    def _get_prompt(self, chunk: str, original_text: str) -> PromptBuilder:
-        main_body = (
+    def _render_prompt(self, chunk: str, original_text: str) -> str:
+        if self._template is None:
+            self._template = self._get_prompt(chunk, original_text).compile()
+
+        return self._template.render(self._get_body(original_text), {"chunk": chunk})
+
+    def _get_body(self, original_text: str) -> str:
+        return (
             "Analyze the document chunk in context of full document\n"
             f"<full_document>\n{original_text}\n</full_document>\n\n"
             "Generate contextual metadata for this chunk:"
         )
-        
+    
+    def _get_prompt(self, chunk: str, original_text: str) -> PromptBuilder:
         return (
-            PromptBuilder(main_body)
+            PromptBuilder(self._get_body(original_text))
             .with_title("Contextual Retrieval")
             .with_rules([
                 "Generate 1-2 sentence context explaining the chunk's position in the document",
@@ -58,8 +139,176 @@ class LLMContextGenerator(ContextGenerator):
             .with_confirmation("Remember: Only return the contextual information, nothing else")
         )
     
-    def _get_chat_conversation(self, builder: PromptBuilder) -> ChatConversation:
+    def _get_chat_conversation(self, prompt: str) -> ChatConversation:
         conversation = ChatConversation()
-        conversation.add_system_message(builder.build())
+        conversation.add_system_message(prompt)
         
         return conversation
+
+    def _get_prefix_stable_conversation(self, chunk: str, original_text: str) -> ChatConversation:
+        conversation = ChatConversation()
+        conversation.add_system_message(self._render_prefix(original_text))
+        conversation.add_user_message(format_context({"chunk": chunk}))
+
+        return conversation
+
+    def _render_prefix(self, original_text: str) -> str:
+        """
+        Stały prefiks promptu dla dokumentu; budowany raz i używany dla kolejnych fragmentów.
+
+        Prefiksy ostatnich prefix_cache_size dokumentów przechowywane są w cache LRU
+        według skrótu dokumentu, więc przeplatane fragmenty kilku dokumentów nie
+        wymuszają ponownego budowania prefiksu.
+        """
+        key = document_digest(original_text)
+        prefix = self._prefixes.get(key)
+        if prefix is not None:
+            self.prefix_stats.hits += 1
+            self._prefixes.move_to_end(key)
+            return prefix
+
+        self.prefix_stats.misses += 1
+        prefix = self._prefixes[key] = self._build_prefix(original_text)
+        while len(self._prefixes) > self._prefix_cache_size:
+            self._prefixes.popitem(last=False)
+        return prefix
+
+    def _build_prefix(self, original_text: str) -> str:
+        instructions = (
+            PromptBuilder("Analyze the document chunk from the user message in context of the full document below "
+                          "and generate contextual metadata for this chunk.")
+            .with_title("Contextual Retrieval")
+            .with_rules([
+                "Generate 1-2 sentence context explaining the chunk's position in the document",
+                "Include key entities and document structure information",
+                "Do not include any markdown formatting",
+                "Respond only with the contextual information"
+            ])
+            .with_examples(Path("prompts/examples/context_retrieval_examples.yaml"))
+            .with_confirmation("Remember: Only return the contextual information, nothing else")
+            .build()
+        )
+        return f"{instructions}\n\n<full_document>\n{original_text}\n</full_document>"
+
+
+class ChunkContext(BaseModel):
+    index: int
+    context: str
+
+
+class ChunkContexts(BaseModel):
+    contexts: List[ChunkContext]
+
+
+@dataclass
+class BatchStats:
+    requests: int = 0
+    chunks: int = 0
+    fallbacks: int = 0
+
+
+class BatchedContextGenerator(LLMContextGenerator):
+    """
+    Generator kontekstu wysyłający kilka fragmentów tego samego dokumentu w jednym zapytaniu.
+
+    Dokument trafia do promptu raz na partię zamiast raz na fragment. Odpowiedź
+    zawiera listę kontekstów z indeksami fragmentów; fragmenty bez odpowiedzi
+    są generowane osobno, jak w LLMContextGenerator, jeden po drugim, więc partia
+    nigdy nie zajmuje więcej niż jednego miejsca w limicie współbieżności splittera.
+    """
+
+    def __init__(
+        self,
+        call: LLMCall,
+        batch_token_budget: int = 4000,
+        max_batch_size: int = 16,
+        tokenizer: Optional[Tokenizer] = None,
+    ) -> None:
+        """
+        Args:
+            call: Model językowy generujący konteksty.
+            batch_token_budget: Maksymalna łączna liczba tokenów fragmentów w jednej partii.
+            max_batch_size: Maksymalna liczba fragmentów w jednej partii.
+            tokenizer: Tokenizer do liczenia tokenów fragmentów. Domyślnie TiktokenTokenizer.
+        """
+        super().__init__(call)
+        self.batch_token_budget = batch_token_budget
+        self.max_batch_size = max_batch_size
+        self.tokenizer = tokenizer if tokenizer is not None else TiktokenTokenizer()
+        self.stats = BatchStats()
+        self._batch_template: CompiledPrompt | None = None
+
+    def plan_batches(self, chunks: List[str]) -> List[List[int]]:
+        """Grupuje kolejne fragmenty, dopóki mieszczą się w batch_token_budget i max_batch_size."""
+        batches: List[List[int]] = []
+        current: List[int] = []
+        tokens = 0
+        for index, count in enumerate(self.tokenizer.count_tokens_batch(chunks)):
+            count -= self.tokenizer.wrapper_overhead
+            if current and (tokens + count > self.batch_token_budget or len(current) >= self.max_batch_size):
+                batches.append(current)
+                current, tokens = [], 0
+            current.append(index)
+            tokens += count
+        if current:
+            batches.append(current)
+        return batches
+
+    async def generate_contexts(
+        self, chunks: List[str], original_text: str, offsets: Optional[List[int]] = None
+    ) -> List[str]:
+        positions = offsets if offsets is not None else [None] * len(chunks)
+        if len(chunks) == 1:
+            return [await self.generate_context(chunks[0], original_text, positions[0])]
+
+        self.stats.requests += 1
+        self.stats.chunks += len(chunks)
+
+        conversation = self._get_chat_conversation(self._render_batch_prompt(chunks, original_text))
+        response = await self._call.generate_structured_output(messages=conversation, response_model=ChunkContexts, temperature=0.0)
+
+        contexts: List[Optional[str]] = [None] * len(chunks)
+        for item in response.contexts:
+            if 0 <= item.index < len(chunks) and item.context.strip():
+                contexts[item.index] = item.context
+
+        missing = [index for index, context in enumerate(contexts) if context is None]
+        if missing:
+            self.stats.fallbacks += len(missing)
+            for index in missing:
+                contexts[index] = await self.generate_context(chunks[index], original_text, positions[index])
+
+        return contexts
+
+    def fingerprint(self) -> str:
+        template = self._get_batch_prompt(["{chunk}"], "{original_text}").build()
+        digest = hashlib.sha256(template.encode()).hexdigest()
+        return f"{super().fingerprint()}:{digest}"
+
+    def _render_batch_prompt(self, chunks: List[str], original_text: str) -> str:
+        if self._batch_template is None:
+            self._batch_template = self._get_batch_prompt(chunks, original_text).compile()
+
+        return self._batch_template.render(self._get_body(original_text), {"chunks": self._format_chunks(chunks)})
+
+    @staticmethod
+    def _format_chunks(chunks: List[str]) -> str:
+        return "\n" + "\n".join(f'<chunk index="{index}">\n{chunk}\n</chunk>' for index, chunk in enumerate(chunks)) + "\n"
+
+    def _get_batch_prompt(self, chunks: List[str], original_text: str) -> PromptBuilder:
+        return (
+            PromptBuilder(self._get_body(original_text))
+            .with_title("Contextual Retrieval")
+            .with_rules([
+                "For every chunk generate 1-2 sentence context explaining the chunk's position in the document",
+                "Include key entities and document structure information",
+                "Do not include any markdown formatting",
+                "Return exactly one context per chunk, with the index attribute of the chunk it describes",
+            ])
+            .with_context({
+                "chunks": self._format_chunks(chunks)
+            })
+            .with_examples(Path("prompts/examples/context_retrieval_examples.yaml"))
+            .with_confirmation("Remember: Only return the contextual information for each chunk index, nothing else")
+        )
+
@@ -0,0 +1,248 @@
+import hashlib
+import re
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple, Union
+
+from pydantic import BaseModel
+
+from .schemas import Document
+from .splitter import TextSplitter
+from .token_index import TokenIndex
+
+PLACEHOLDER_PATTERN = re.compile(r'\{\{\$(url|img)(\d+)\}\}')
+# Obraz ![alt](url) zamieniany jest najpierw na ![alt]({{$imgN}}), a następnie wzorzec linku
+# zamienia [alt]({{$imgN}}) na [alt]({{$urlM}}), więc placeholdery bywają zagnieżdżone.
+MAX_PLACEHOLDER_DEPTH = 4
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def restore_links(document: Document) -> str:
+    """
+    Odtwarza surowy tekst fragmentu, podstawiając adresy URL i obrazów w miejsce placeholderów.
+
+    Podstawienia powtarzane są, dopóki zmieniają tekst (najwyżej MAX_PLACEHOLDER_DEPTH razy),
+    co rozwija zagnieżdżone placeholdery obrazów.
+    """
+    urls, images = document.metadata.urls, document.metadata.images
+
+    def replace(match: re.Match) -> str:
+        kind, index = match.group(1), int(match.group(2))
+        links = urls if kind == "url" else images
+        return links[index] if index < len(links) else match.group(0)
+
+    text = document.text
+    for _ in range(MAX_PLACEHOLDER_DEPTH):
+        restored = PLACEHOLDER_PATTERN.sub(replace, text)
+        if restored == text:
+            break
+        text = restored
+    return text
+
+
+class ManifestEntry(BaseModel):
+    start: int
+    end: int
+    digest: str
+    context: Optional[str] = None
+
+
+class ChunkManifest(BaseModel):
+    """Granice i skróty fragmentów poprzedniego podziału dokumentu wraz z ich kontekstami."""
+    length: int
+    limit: int
+    entries: List[ManifestEntry]
+
+    @classmethod
+    def from_documents(cls, documents: List[Document], limit: int) -> "ChunkManifest":
+        """Buduje manifest z wyniku split()/chunk(); fragmenty są ciągłe, więc pozycje to sumy ich długości."""
+        entries = []
+        position = 0
+        for document in documents:
+            raw = restore_links(document)
+            entries.append(ManifestEntry(
+                start=position, end=position + len(raw), digest=_digest(raw), context=document.metadata.context
+            ))
+            position += len(raw)
+        return cls(length=position, limit=limit, entries=entries)
+
+    @classmethod
+    def from_split(cls, text: str, documents: List[Document], spans: List[Tuple[int, int]], limit: int) -> "ChunkManifest":
+        entries = [
+            ManifestEntry(start=start, end=end, digest=_digest(text[start:end]), context=document.metadata.context)
+            for (start, end), document in zip(spans, documents)
+        ]
+        return cls(length=len(text), limit=limit, entries=entries)
+
+
+class ContextRefreshPolicy(ABC):
+    """Decyduje, czy konteksty niezmienionych fragmentów wymagają ponownego wygenerowania."""
+
+    @abstractmethod
+    def should_refresh(self, changed_chars: int, total_chars: int) -> bool:
+        pass
+
+
+class NeverRefresh(ContextRefreshPolicy):
+    def should_refresh(self, changed_chars: int, total_chars: int) -> bool:
+        return False
+
+
+class ChangedFractionRefresh(ContextRefreshPolicy):
+    """Odświeża wszystkie konteksty, gdy zmieniona część dokumentu przekracza podany ułamek."""
+
+    def __init__(self, threshold: float = 0.2) -> None:
+        self.threshold = threshold
+
+    def should_refresh(self, changed_chars: int, total_chars: int) -> bool:
+        return changed_chars > self.threshold * max(total_chars, 1)
+
+
+@dataclass
+class IncrementalResult:
+    documents: List[Document]
+    manifest: ChunkManifest
+    reused: int
+    resplit: int
+    refreshed: bool
+
+
+class IncrementalSplitter:
+    """
+    Ponowny podział zmienionego dokumentu z wykorzystaniem poprzedniego wyniku.
+
+    Fragmenty z niezmienionego początku dokumentu są zachowywane, tekst dzielony
+    jest od pierwszej zmiany do miejsca, w którym nowa granica pokrywa się z granicą
+    niezmienionego fragmentu z końca dokumentu, a dalsze fragmenty są ponownie używane.
+    Konteksty generowane są tylko dla nowych fragmentów, chyba że polityka odświeżania
+    uzna zmianę za istotną dla całego dokumentu.
+    """
+
+    def __init__(self, splitter: TextSplitter, refresh_policy: ContextRefreshPolicy | None = None) -> None:
+        """
+        Args:
+            splitter: TextSplitter używany do wyznaczania granic i generowania kontekstów.
+            refresh_policy: Polityka odświeżania kontekstów ponownie użytych fragmentów.
+                Domyślnie ChangedFractionRefresh(0.2).
+        """
+        self.splitter = splitter
+        self.refresh_policy = refresh_policy if refresh_policy is not None else ChangedFractionRefresh()
+
+    async def split(
+        self, text: str, limit: int, previous: Union[ChunkManifest, List[Document], None] = None
+    ) -> IncrementalResult:
+        if isinstance(previous, list):
+            previous = ChunkManifest.from_documents(previous, limit)
+        if previous is None or previous.limit != limit or not previous.entries:
+            previous = ChunkManifest(length=0, limit=limit, entries=[])
+
+        entries = previous.entries
+        prefix = self._unchanged_prefix(text, entries)
+        suffix = self._unchanged_suffix(text, entries, previous.length, prefix)
+
+        position = entries[prefix - 1].end if prefix else 0
+        shift = len(text) - previous.length
+        suffix_starts = {entries[i].start + shift: i for i in range(suffix, len(entries))}
+
+        spans = [(entry.start, entry.end) for entry in entries[:prefix]]
+        new_spans, aligned = self._resplit(text, position, limit, suffix_starts)
+        spans.extend(new_spans)
+        reused_suffix = entries[aligned:] if aligned is not None else []
+        spans.extend((entry.start + shift, entry.end + shift) for entry in reused_suffix)
+
+        documents = self._build_documents(text, spans)
+        reused = entries[:prefix] + reused_suffix
+        changed_chars = max(sum(end - start for start, end in new_spans), previous.length - sum(e.end - e.start for e in reused))
+        refreshed = bool(reused) and self.refresh_policy.should_refresh(changed_chars, len(text))
+
+        contexts: Dict[int, Optional[str]] = {}
+        if not refreshed:
+            contexts.update({i: entry.context for i, entry in enumerate(entries[:prefix])})
+            offset = prefix + len(new_spans)
+            contexts.update({offset + i: entry.context for i, entry in enumerate(reused_suffix)})
+
+        if self.splitter.context_generator is not None:
+            missing = [i for i in range(len(documents)) if contexts.get(i) is None]
+            generated = await self.splitter.generate_contexts(
+                [documents[i].text for i in missing], text, offsets=[spans[i][0] for i in missing]
+            )
+            contexts.update(zip(missing, generated))
+
+        for i, document in enumerate(documents):
+            document.metadata.context = contexts.get(i)
+
+        return IncrementalResult(
+            documents=documents,
+            manifest=ChunkManifest.from_split(text, documents, spans, limit),
+            reused=len(reused),
+            resplit=len(new_spans),
+            refreshed=refreshed,
+        )
+
+    @staticmethod
+    def _unchanged_prefix(text: str, entries: List[ManifestEntry]) -> int:
+        count = 0
+        for entry in entries:
+            if entry.end > len(text) or _digest(text[entry.start:entry.end]) != entry.digest:
+                break
+            count += 1
+        return count
+
+    @staticmethod
+    def _unchanged_suffix(text: str, entries: List[ManifestEntry], length: int, prefix: int) -> int:
+        """Indeks pierwszego fragmentu niezmienionego końca dokumentu (len(entries), jeśli brak)."""
+        shift = len(text) - length
+        first = len(entries)
+        prefix_end = entries[prefix - 1].end if prefix else 0
+        for index in range(len(entries) - 1, prefix - 1, -1):
+            entry = entries[index]
+            start = entry.start + shift
+            if start < prefix_end or _digest(text[start:entry.end + shift]) != entry.digest:
+                break
+            first = index
+        return first
+
+    def _resplit(
+        self, text: str, position: int, limit: int, suffix_starts: Dict[int, int]
+    ) -> Tuple[List[Tuple[int, int]], Optional[int]]:
+        """Dzieli tekst od position, aż granica trafi na początek niezmienionego fragmentu z końca."""
+        splitter = self.splitter
+        instrumentation = splitter.instrumentation
+        base = position
+        index = None
+        if splitter.use_token_index:
+            started = time.perf_counter() if instrumentation.enabled else 0.0
+            index = TokenIndex.build(text[base:], splitter.tokenizer)
+            if instrumentation.enabled:
+                instrumentation.observe("split.index_build", time.perf_counter() - started)
+
+        spans = []
+        while position < len(text):
+            if position in suffix_starts:
+                return spans, suffix_starts[position]
+
+            started = time.perf_counter() if instrumentation.enabled else 0.0
+            if index is not None:
+                _, end = splitter.get_indexed_chunk(index, position - base, limit)
+                end += base
+            else:
+                _, end = splitter.get_chunk(text, position, limit)
+            if instrumentation.enabled:
+                instrumentation.observe("split.boundary_search", time.perf_counter() - started)
+
+            spans.append((position, end))
+            position = end
+
+        return spans, None
+
+    def _build_documents(self, text: str, spans: List[Tuple[int, int]]) -> List[Document]:
+        chunk_texts = [text[start:end] for start, end in spans]
+        current_headers = {}
+        return [
+            self.splitter._build_document(chunk_text, current_headers, tokens)
+            for chunk_text, tokens in zip(chunk_texts, self.splitter.tokenizer.count_tokens_batch(chunk_texts))
+        ]
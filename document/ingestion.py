@@ -0,0 +1,146 @@
+import asyncio
+import glob
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+from tokenization import TiktokenTokenizer
+
+from .context_generator import ContextGenerator
+from .schemas import Document
+from .splitter import TextSplitter
+
+_worker_splitter: Optional[TextSplitter] = None
+
+
+def _init_worker(model_name: str, use_token_index: bool) -> None:
+    global _worker_splitter
+    _worker_splitter = TextSplitter(tokenizer=TiktokenTokenizer(model_name), use_token_index=use_token_index)
+
+
+def _chunk_file(path: str, limit: int) -> Tuple[str, str, List[Document], List[int]]:
+    text = Path(path).read_text(encoding="utf-8")
+    spans = _worker_splitter.chunk_spans(text, limit)
+    return path, text, _worker_splitter.build_documents(text, spans), [start for start, _ in spans]
+
+
+def resolve_sources(source: str, pattern: str = "*.md") -> List[Path]:
+    """Zwraca pliki z katalogu (rekurencyjnie, wg wzorca) albo pasujące do wzorca glob."""
+    path = Path(source)
+    if path.is_dir():
+        return sorted(p for p in path.rglob(pattern) if p.is_file())
+    return sorted(Path(p) for p in glob.glob(source, recursive=True) if os.path.isfile(p))
+
+
+@dataclass
+class IngestionStats:
+    documents: int = 0
+    chunks: int = 0
+    tokens: int = 0
+    failed: List[str] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    def summary(self) -> str:
+        elapsed = self.elapsed or float('inf')
+        return (
+            f"Ingested {self.documents} documents ({self.chunks} chunks, {self.tokens} tokens) "
+            f"in {self.elapsed:.2f}s: {self.documents / elapsed:.2f} docs/s, "
+            f"{self.chunks / elapsed:.2f} chunks/s, {self.tokens / elapsed:.0f} tokens/s"
+            + (f"; {len(self.failed)} failed" if self.failed else "")
+        )
+
+
+class CorpusIngestion:
+    """
+    Przetwarza zbiór dokumentów: tokenizacja i podział na fragmenty (CPU) wykonywane są
+    w puli procesów, a generowanie kontekstu we wspólnym asynchronicznym potoku
+    z jednym limitem współbieżności dla całego korpusu. Wynik zapisywany jest
+    strumieniowo do pliku JSONL.
+    """
+
+    def __init__(
+        self,
+        limit: int,
+        context_generator: ContextGenerator | None = None,
+        workers: int | None = None,
+        max_concurrency: int = 8,
+        max_retries: int = 2,
+        model_name: str = "gpt-4o",
+        use_token_index: bool = True,
+    ):
+        self.limit = limit
+        self.workers = workers
+        self.model_name = model_name
+        self.use_token_index = use_token_index
+        self._max_concurrency = max_concurrency
+        self._splitter = TextSplitter(
+            tokenizer=TiktokenTokenizer(model_name),
+            context_generator=context_generator,
+            max_concurrency=max_concurrency,
+            max_retries=max_retries,
+        )
+
+    async def run(self, paths: Iterable[Path], sink: Path) -> IngestionStats:
+        stats = IngestionStats()
+        started = time.perf_counter()
+        semaphore = asyncio.Semaphore(self._max_concurrency)
+        loop = asyncio.get_running_loop()
+
+        with ProcessPoolExecutor(
+            max_workers=self.workers, initializer=_init_worker, initargs=(self.model_name, self.use_token_index)
+        ) as pool, open(sink, 'w', encoding='utf-8') as output:
+            async def chunk(path: Path) -> Optional[Tuple[str, str, List[Document], List[int]]]:
+                try:
+                    return await loop.run_in_executor(pool, _chunk_file, str(path), self.limit)
+                except Exception as error:
+                    stats.failed.append(f"{path}: {error!r}")
+                    return None
+
+            contextualized = []
+            for next_chunked in asyncio.as_completed([chunk(path) for path in paths]):
+                result = await next_chunked
+                if result is None:
+                    continue
+
+                path, text, documents, offsets = result
+                if self._splitter.context_generator is None:
+                    self._write(output, path, documents, stats)
+                else:
+                    contextualized.append(asyncio.create_task(
+                        self._contextualize(output, path, text, documents, offsets, semaphore, stats)
+                    ))
+
+            await asyncio.gather(*contextualized)
+
+        stats.elapsed = time.perf_counter() - started
+        return stats
+
+    async def _contextualize(
+        self,
+        output,
+        path: str,
+        text: str,
+        documents: List[Document],
+        offsets: List[int],
+        semaphore: asyncio.Semaphore,
+        stats: IngestionStats,
+    ) -> None:
+        contexts = await self._splitter.generate_contexts(
+            [doc.text for doc in documents], text, semaphore=semaphore, offsets=offsets
+        )
+        for document, context in zip(documents, contexts):
+            document.metadata.context = context
+        self._write(output, path, documents, stats)
+
+    def _write(self, output, path: str, documents: List[Document], stats: IngestionStats) -> None:
+        for position, document in enumerate(documents):
+            record = {"source": path, "chunk": position, "document": document.model_dump()}
+            output.write(json.dumps(record, ensure_ascii=False) + "\n")
+        stats.documents += 1
+        stats.chunks += len(documents)
+        stats.tokens += sum(document.metadata.tokens for document in documents)
+
@@ -0,0 +1,287 @@
+import asyncio
+import re
+from bisect import bisect_right
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+from pydantic import BaseModel
+
+from language_model import LLMCall
+from language_model.schemas import ChatConversation
+from tokenization import TiktokenTokenizer, Tokenizer
+
+from .context_generator import Context, LLMContextGenerator, document_digest
+from .splitter import HEADER_PATTERN
+
+PLACEHOLDER_PATTERN = re.compile(r'\{\{\$(?:url|img)\d+\}\}')
+
+
+class DocumentSummary(BaseModel):
+    summary: str
+
+
+@dataclass
+class Section:
+    start: int
+    end: int
+    path: str
+    tokens: int
+
+
+@dataclass
+class DocumentOutline:
+    outline: str
+    summary: str
+    sections: List[Section]
+    tokens: int
+    cursor: int = 0
+    """
+    Pozycja za początkiem ostatnio odnalezionego fragmentu bez podanego offsetu; kolejne
+    takie fragmenty szukane są od niej.
+    """
+    starts: List[int] = field(init=False, repr=False)
+    """Posortowane początki sekcji, do wyszukiwania sekcji fragmentu przez bisect."""
+
+    def __post_init__(self) -> None:
+        self.starts = [section.start for section in self.sections]
+
+
+@dataclass
+class WindowStats:
+    """
+    Porównanie liczby tokenów dokumentu wysyłanych w promptach z trybem pełnego dokumentu.
+
+    full_document_tokens to tokeny, które tryb pełnego dokumentu wysłałby dla tych
+    samych fragmentów, windowed_tokens to tokeny konspektu, streszczenia i okna sekcji,
+    a summary_tokens to jednorazowe koszty wygenerowania streszczeń.
+    """
+    chunks: int = 0
+    full_document_tokens: int = 0
+    windowed_tokens: int = 0
+    summary_tokens: int = 0
+
+    @property
+    def reduction(self) -> float:
+        if not self.full_document_tokens:
+            return 0.0
+        return 1 - (self.windowed_tokens + self.summary_tokens) / self.full_document_tokens
+
+
+class SectionWindowContextGenerator(LLMContextGenerator):
+    """
+    Generator kontekstu wysyłający zamiast całego dokumentu jego konspekt, streszczenie
+    i ograniczone liczbą tokenów okno sąsiednich sekcji.
+
+    Konspekt (drzewo nagłówków markdown) i streszczenie powstają raz na dokument,
+    więc koszt promptu nie rośnie z rozmiarem dokumentu dla każdego fragmentu.
+    """
+
+    def __init__(
+        self,
+        call: LLMCall,
+        window_tokens: int = 2000,
+        summary_input_tokens: int = 8000,
+        outline_tokens: int = 1000,
+        tokenizer: Optional[Tokenizer] = None,
+        max_documents: int = 32,
+    ) -> None:
+        """
+        Args:
+            call: Model językowy generujący streszczenia i konteksty.
+            window_tokens: Limit tokenów okna sekcji otaczających fragment.
+            summary_input_tokens: Limit tokenów tekstu przekazywanego do wygenerowania streszczenia
+                (konspekt i początki sekcji).
+            outline_tokens: Limit tokenów konspektu; przy dłuższym pomijane są najgłębsze poziomy
+                nagłówków, a w ostateczności konspekt jest obcinany.
+            tokenizer: Tokenizer do liczenia tokenów sekcji. Domyślnie TiktokenTokenizer.
+            max_documents: Liczba dokumentów, których konspekty są przechowywane w pamięci.
+        """
+        super().__init__(call)
+        self.window_tokens = window_tokens
+        self.summary_input_tokens = summary_input_tokens
+        self.outline_tokens = outline_tokens
+        self.tokenizer = tokenizer if tokenizer is not None else TiktokenTokenizer()
+        self.max_documents = max_documents
+        self.stats = WindowStats()
+        self._outlines: OrderedDict[str, asyncio.Task] = OrderedDict()
+
+    async def generate_context(self, chunk: str, original_text: str, offset: Optional[int] = None) -> str:
+        outline = await self._get_outline(original_text)
+        path, window = self._get_window(outline, chunk, original_text, offset)
+        view = (
+            f"<document_outline>\n{outline.outline}\n</document_outline>\n\n"
+            f"<document_summary>\n{outline.summary}\n</document_summary>\n\n"
+            f"<chunk_section>{path}</chunk_section>\n\n"
+            f"<surrounding_sections>\n{window}\n</surrounding_sections>"
+        )
+
+        self.stats.chunks += 1
+        self.stats.full_document_tokens += outline.tokens
+        self.stats.windowed_tokens += self.tokenizer.count_tokens(view)
+
+        conversation = self._get_chat_conversation(self._render_prompt(chunk, view))
+        response = await self._call.generate_structured_output(messages=conversation, response_model=Context, temperature=0.0)
+
+        return response.context
+
+    def fingerprint(self) -> str:
+        return f"{super().fingerprint()}:{self.window_tokens}:{self.summary_input_tokens}:{self.outline_tokens}"
+
+    def _get_body(self, document_view: str) -> str:
+        return (
+            "Analyze the document chunk using the outline, summary and surrounding sections of the document\n"
+            f"{document_view}\n\n"
+            "Generate contextual metadata for this chunk:"
+        )
+
+    async def _get_outline(self, text: str) -> DocumentOutline:
+        key = document_digest(text)
+        task = self._outlines.get(key)
+        if task is None or (task.done() and (task.cancelled() or task.exception() is not None)):
+            task = asyncio.ensure_future(self._build_outline(text))
+            self._outlines[key] = task
+            while len(self._outlines) > self.max_documents:
+                self._outlines.popitem(last=False)
+        else:
+            self._outlines.move_to_end(key)
+        return await asyncio.shield(task)
+
+    async def _build_outline(self, text: str) -> DocumentOutline:
+        sections, outline = self._parse_sections(text)
+        summary_input = self._summary_input(outline, sections, text)
+        self.stats.summary_tokens += self.tokenizer.count_tokens(summary_input)
+
+        conversation = ChatConversation()
+        conversation.add_system_message(
+            "Summarize the document described below in 3-5 sentences. "
+            "Mention its subject, purpose and main topics. Respond only with the summary.\n\n"
+            f"{summary_input}"
+        )
+        response = await self._call.generate_structured_output(
+            messages=conversation, response_model=DocumentSummary, temperature=0.0
+        )
+
+        return DocumentOutline(
+            outline=outline,
+            summary=response.summary,
+            sections=sections,
+            tokens=self.tokenizer.count_tokens(text),
+        )
+
+    def _parse_sections(self, text: str) -> Tuple[List[Section], str]:
+        starts = [0]
+        paths = [""]
+        outline_lines: List[Tuple[int, str]] = []
+        current_headers: dict = {}
+
+        for match in HEADER_PATTERN.finditer(text):
+            level = len(match.group(2))
+            title = match.group(3).strip()
+            current_headers = {k: v for k, v in current_headers.items() if k < level}
+            current_headers[level] = title
+            starts.append(match.start(2))
+            paths.append(" > ".join(current_headers[k] for k in sorted(current_headers)))
+            outline_lines.append((level, f"{'  ' * (level - 1)}- {title}"))
+
+        ends = starts[1:] + [len(text)]
+        spans = [(start, end, path) for start, end, path in zip(starts, ends, paths) if end > start]
+        counts = self.tokenizer.count_tokens_batch([text[start:end] for start, end, _ in spans])
+        overhead = self.tokenizer.wrapper_overhead
+        sections = [Section(start, end, path, tokens - overhead) for (start, end, path), tokens in zip(spans, counts)]
+
+        return sections, self._cap_outline(outline_lines)
+
+    def _cap_outline(self, lines: List[Tuple[int, str]]) -> str:
+        """Konspekt w limicie outline_tokens: najpierw pomijane są najgłębsze poziomy nagłówków."""
+        if not lines:
+            return "(no headers)"
+
+        overhead = self.tokenizer.wrapper_overhead
+        outline = ""
+        for depth in range(max(level for level, _ in lines), 0, -1):
+            outline = "\n".join(line for level, line in lines if level <= depth)
+            tokens = self.tokenizer.count_tokens(outline) - overhead
+            if tokens <= self.outline_tokens:
+                return outline
+        return self._truncate(outline, tokens, self.outline_tokens)
+
+    def _summary_input(self, outline: str, sections: List[Section], text: str) -> str:
+        parts = [f"Outline:\n{outline}"]
+        budget = self.summary_input_tokens - self.tokenizer.count_tokens(parts[0])
+        share = max(budget // max(len(sections), 1), 0)
+
+        for section in sections:
+            if budget <= 0:
+                break
+            excerpt = self._truncate(text[section.start:section.end], section.tokens, min(share, budget))
+            parts.append(excerpt)
+            budget -= min(section.tokens, share)
+
+        return "\n\n".join(parts)
+
+    def _get_window(self, outline: DocumentOutline, chunk: str, text: str, offset: Optional[int] = None) -> Tuple[str, str]:
+        """
+        Zwraca ścieżkę nagłówków sekcji zawierającej fragment oraz tekst okna sąsiednich sekcji.
+
+        Fragment umieszczany jest w dokumencie według offsetu przekazanego przez splitter;
+        bez niego jest wyszukiwany w tekście (_locate).
+        """
+        sections = outline.sections
+        if offset is not None:
+            position = offset
+        else:
+            position = self._locate(chunk, text, outline.cursor)
+            if position is not None:
+                outline.cursor = position + 1
+        if position is None or not sections:
+            return "", ""
+
+        index = max(bisect_right(outline.starts, position) - 1, 0)
+        current = sections[index]
+        if current.tokens >= self.window_tokens:
+            return current.path, self._around(text, current, position, self.window_tokens)
+
+        first, last = index, index
+        budget = self.window_tokens - current.tokens
+        while True:
+            grown = False
+            for candidate in (first - 1, last + 1):
+                if 0 <= candidate < len(sections) and sections[candidate].tokens <= budget:
+                    budget -= sections[candidate].tokens
+                    first, last = min(first, candidate), max(last, candidate)
+                    grown = True
+            if not grown:
+                break
+
+        return current.path, text[sections[first].start:sections[last].end]
+
+    @staticmethod
+    def _locate(chunk: str, text: str, start: int = 0) -> Optional[int]:
+        """
+        Pozycja fragmentu w dokumencie; fragmenty zawierają placeholdery URL, więc szukany jest najdłuższy odcinek bez nich.
+
+        Fragmenty napływają zwykle w kolejności dokumentu, więc wyszukiwanie zaczyna się za pozycją
+        poprzedniego fragmentu (start), a od początku dokumentu dopiero, gdy dalej go nie ma.
+        Powtarzający się tekst jest dzięki temu przypisywany do właściwej sekcji.
+        """
+        anchor = max(PLACEHOLDER_PATTERN.split(chunk), key=len).strip()
+        if not anchor:
+            return None
+        position = text.find(anchor, start)
+        if position < 0:
+            position = text.find(anchor)
+        return position if position >= 0 else None
+
+    @staticmethod
+    def _truncate(text: str, tokens: int, limit: int) -> str:
+        if tokens <= limit:
+            return text
+        return text[:int(len(text) * limit / max(tokens, 1))]
+
+    @staticmethod
+    def _around(text: str, section: Section, position: int, limit: int) -> str:
+        length = section.end - section.start
+        size = int(length * limit / max(section.tokens, 1))
+        start = min(max(position - size // 2, section.start), max(section.end - size, section.start))
+        return text[start:start + size]
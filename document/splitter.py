@@ -1,99 +1,428 @@
 import asyncio
+import logging
 import re
-from typing import List, Optional, Tuple
+import time
+from collections import deque
+from typing import AsyncIterator, Awaitable, Callable, List, Optional, Tuple, TypeVar
 
-from anyio import Path
+from instrumentation import NULL_INSTRUMENTATION, Instrumentation
+from tokenization import TiktokenTokenizer, Tokenizer
 
-from language_model.base import LLMCall
-from language_model.openai import OpenAILLMCall
-
-from .context_generator import ContextGenerator, LLMContextGenerator
+from .compact import ChunkStore
+from .context_generator import ContextGenerator
 from .schemas import Document, DocumentMetadata
-from .tokenizer import TiktokenTokenizer, Tokenizer
+from .stream import TextSource, iter_text
+from .token_index import TokenIndex
+
+
+HEADER_PATTERN = re.compile(r'(^|\n)(#{1,6})\s+(.*)')
+IMAGE_PATTERN = re.compile(r'!\[([^\]]*)\]\(([^)]+)\)')
+URL_PATTERN = re.compile(r'\[([^\]]+)\]\(([^)]+)\)')
+
+# Górne oszacowanie liczby znaków pojedynczego tokenu; okno split_stream o rozmiarze
+# limit * MAX_TOKEN_CHARS zawsze mieści fragment o limicie tokenów.
+MAX_TOKEN_CHARS = 128
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
 
 
 class TextSplitter:
-    def __init__(self, tokenizer: Optional[Tokenizer] = None, context_generator: ContextGenerator | None = None):
+    def __init__(
+        self,
+        tokenizer: Optional[Tokenizer] = None,
+        context_generator: ContextGenerator | None = None,
+        use_token_index: bool = False,
+        max_concurrency: int | None = None,
+        max_retries: int = 0,
+        retry_delay: float = 1.0,
+        instrumentation: Instrumentation | None = None,
+    ):
         """
         Inicjalizuje TextSplitter z podanym tokenizerem.
         
         Args:
             tokenizer: Implementacja TokenizerProtocol. Jeśli nie podano, używa domyślnego TiktokenTokenizer.
+            use_token_index: Jeśli True, dokument jest tokenizowany jednokrotnie, a granice fragmentów
+                wyznaczane są na podstawie TokenIndex zamiast ponownej tokenizacji pozostałego tekstu.
+            max_concurrency: Maksymalna liczba jednocześnie generowanych kontekstów. Jeśli nie podano,
+                konteksty generowane są kolejno, fragment po fragmencie.
+            max_retries: Liczba ponowień generowania kontekstu dla pojedynczego fragmentu.
+            retry_delay: Początkowe opóźnienie (w sekundach) między ponowieniami, podwajane przy każdej próbie.
+            instrumentation: Odbiorca metryk (czasy etapów, liczba iteracji). Domyślnie wyłączony.
         """
+        if max_concurrency is not None and max_concurrency < 1:
+            raise ValueError("max_concurrency must be a positive integer")
+
         self.tokenizer = tokenizer if tokenizer is not None else TiktokenTokenizer()
         self.context_generator = context_generator
+        self.use_token_index = use_token_index
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.instrumentation = instrumentation if instrumentation is not None else NULL_INSTRUMENTATION
 
     async def split(self, text: str, limit: int) -> List[Document]:
-        print(f"Starting split process with limit: {limit} tokens")
-        chunks = []
+        spans = self.chunk_spans(text, limit)
+        chunks = self.build_documents(text, spans)
+
+        if self.context_generator:
+            contexts = await self.generate_contexts(
+                [chunk.text for chunk in chunks], text, offsets=[start for start, _ in spans]
+            )
+            for chunk, context in zip(chunks, contexts):
+                chunk.metadata.context = context
+
+        return chunks
+
+    def chunk(self, text: str, limit: int) -> List[Document]:
+        """Dzieli tekst na fragmenty bez generowania kontekstu."""
+        return self.build_documents(text, self.chunk_spans(text, limit))
+
+    def build_documents(self, text: str, spans: List[Tuple[int, int]]) -> List[Document]:
+        """Buduje dokumenty dla zakresów (start, end) wyznaczonych przez chunk_spans()."""
+        chunk_texts = [text[start:end] for start, end in spans]
+        current_headers = {}
+
+        started = time.perf_counter() if self.instrumentation.enabled else 0.0
+        token_counts = self.tokenizer.count_tokens_batch(chunk_texts)
+        if self.instrumentation.enabled:
+            self.instrumentation.observe("split.token_counting", time.perf_counter() - started)
+
+        return [
+            self._build_document(chunk_text, current_headers, tokens)
+            for chunk_text, tokens in zip(chunk_texts, token_counts)
+        ]
+
+    def chunk_compact(self, text: str, limit: int, batch_size: int = 1024) -> ChunkStore:
+        """
+        Dzieli tekst jak chunk(), ale zwraca ChunkStore: zakresy we wspólnym buforze
+        zamiast kopii tekstu i obiektów pydantic dla każdego fragmentu.
+
+        Args:
+            batch_size: Liczba fragmentów, których tekst jest jednocześnie materializowany
+                na potrzeby liczenia tokenów i wyodrębniania linków.
+        """
+        store = ChunkStore(text, self.extract_urls_and_images)
+        spans = self.chunk_spans(text, limit)
+        current_headers = {}
+
+        for offset in range(0, len(spans), batch_size):
+            batch = spans[offset:offset + batch_size]
+            chunk_texts = [text[start:end] for start, end in batch]
+            for (start, end), chunk_text, tokens in zip(batch, chunk_texts, self.tokenizer.count_tokens_batch(chunk_texts)):
+                self.update_current_headers(current_headers, self.extract_headers(chunk_text))
+                _, urls, images = self.extract_urls_and_images(chunk_text)
+                store.append(start, end, tokens, current_headers, urls, images)
+
+        return store
+
+    def chunk_spans(self, text: str, limit: int) -> List[Tuple[int, int]]:
+        """Wyznacza granice fragmentów jako zakresy (start, end) w tekście."""
+        instrumentation = self.instrumentation
+        spans = []
         position = 0
         total_length = len(text)
-        current_headers = {}
+
+        index = None
+        if self.use_token_index:
+            started = time.perf_counter() if instrumentation.enabled else 0.0
+            index = TokenIndex.build(text, self.tokenizer)
+            if instrumentation.enabled:
+                instrumentation.observe("split.index_build", time.perf_counter() - started)
 
         while position < total_length:
-            print(f"Processing chunk starting at position: {position}")
-            chunk_text, chunk_end = self.get_chunk(text, position, limit)
-            tokens = self.tokenizer.count_tokens(chunk_text)
-            print(f"Chunk tokens: {tokens}")
-
-            headers_in_chunk = self.extract_headers(chunk_text)
-            self.update_current_headers(current_headers, headers_in_chunk)
-
-            content, urls, images = self.extract_urls_and_images(chunk_text)
-            context = None
-            if self.context_generator:
-                context =  await self.context_generator.generate_context(content, text)
-
-            chunks.append(Document(
-                text=content,
-                metadata=DocumentMetadata(
-                    tokens=tokens,
-                    headers=current_headers,
-                    urls=urls,
-                    images=images,
-                    context=context
-                )
-            ))
-
-            print(f"Chunk processed. New position: {chunk_end}")
+            started = time.perf_counter() if instrumentation.enabled else 0.0
+            if index is not None:
+                _, chunk_end = self.get_indexed_chunk(index, position, limit)
+            else:
+                _, chunk_end = self.get_chunk(text, position, limit)
+            if instrumentation.enabled:
+                instrumentation.observe("split.boundary_search", time.perf_counter() - started)
+
+            spans.append((position, chunk_end))
             position = chunk_end
 
-        print(f"Split process completed. Total chunks: {len(chunks)}")
-        return chunks
+        return spans
+
+    async def split_stream(
+        self, source: TextSource, limit: int, window_size: int = 64 * 1024, prefix_size: int = 16 * 1024
+    ) -> AsyncIterator[Document]:
+        """
+        Dzieli tekst odczytywany przyrostowo z pliku lub strumienia, zwracając
+        kolejne dokumenty, gdy tylko zostaną ukończone.
+
+        W pamięci przechowywane jest jedynie okno tekstu o rozmiarze około window_size
+        znaków, liczonym od początku bieżącego fragmentu, oraz początek dokumentu
+        o długości prefix_size. Szacowanie granic fragmentów korzysta z okna, a kontekst
+        generowany jest dla początku dokumentu połączonego z oknem, więc wynik jest
+        identyczny ze split() dla dokumentów mieszczących się w oknie. Stan nagłówków
+        jest przenoszony między kolejnymi oknami.
+
+        Okno jest powiększane, gdy cała jego reszta mieści się w jednym fragmencie,
+        ale nie ponad limit * MAX_TOKEN_CHARS znaków; po osiągnięciu tej granicy
+        fragment kończy się na końcu okna.
+
+        Args:
+            source: Ścieżka do pliku albo asynchroniczny strumień str/bytes.
+            limit: Maksymalna liczba tokenów fragmentu.
+            window_size: Rozmiar okna tekstu (w znakach); powinien znacznie przekraczać rozmiar fragmentu.
+            prefix_size: Liczba znaków z początku dokumentu dołączanych do okna przy generowaniu kontekstu.
+        """
+        reader = iter_text(source)
+        window = ""
+        window_start = 0
+        prefix = ""
+        position = 0
+        index = None
+        exhausted = False
+        max_window_size = max(window_size, limit * MAX_TOKEN_CHARS)
+        current_headers = {}
+        pending: deque[Tuple[Document, asyncio.Task]] = deque()
+        in_flight = self.max_concurrency or 1
+
+        try:
+            while True:
+                while not exhausted and len(window) - position < window_size:
+                    block = await anext(reader, None)
+                    if block is None:
+                        exhausted = True
+                    else:
+                        if len(prefix) < prefix_size:
+                            prefix += block[:prefix_size - len(prefix)]
+                        window_start += position
+                        window = window[position:] + block
+                        position = 0
+                        index = None
+
+                if position >= len(window):
+                    break
+
+                if self.use_token_index:
+                    if index is None:
+                        started = time.perf_counter() if self.instrumentation.enabled else 0.0
+                        index = TokenIndex.build(window, self.tokenizer)
+                        if self.instrumentation.enabled:
+                            self.instrumentation.observe("split.index_build", time.perf_counter() - started)
+                    chunk_text, chunk_end = self.get_indexed_chunk(index, position, limit)
+                else:
+                    chunk_text, chunk_end = self.get_chunk(window, position, limit)
+                if chunk_end >= len(window) and not exhausted and window_size < max_window_size:
+                    window_size = min(window_size * 2, max_window_size)
+                    continue
+
+                document = self._build_document(chunk_text, current_headers, self.tokenizer.count_tokens(chunk_text))
+                chunk_start, position = position, chunk_end
+
+                if self.context_generator is None:
+                    yield document
+                    continue
+
+                original_text = window
+                if window_start > 0:
+                    separator = "" if window_start <= len(prefix) else "\n\n[...]\n\n"
+                    original_text = prefix[:window_start] + separator + window
+                offset = len(original_text) - len(window) + chunk_start
+                pending.append((document, asyncio.create_task(
+                    self._generate_context_with_retry(document.text, original_text, offset)
+                )))
+                while len(pending) >= in_flight:
+                    yield await self._finish_context(*pending.popleft())
+
+            while pending:
+                yield await self._finish_context(*pending.popleft())
+        finally:
+            for _, task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*(task for _, task in pending), return_exceptions=True)
+            await reader.aclose()
+
+    async def _finish_context(self, document: Document, task: asyncio.Task) -> Document:
+        if self.max_concurrency is None:
+            document.metadata.context = await task
+            return document
+
+        try:
+            document.metadata.context = await task
+        except Exception as error:
+            self.instrumentation.increment("split.context_failures")
+            logger.warning("Context generation failed for chunk: %r", error)
+        return document
+
+    def _build_document(self, chunk_text: str, current_headers: dict, tokens: int) -> Document:
+        started = time.perf_counter() if self.instrumentation.enabled else 0.0
+
+        headers_in_chunk = self.extract_headers(chunk_text)
+        self.update_current_headers(current_headers, headers_in_chunk)
+
+        content, urls, images = self.extract_urls_and_images(chunk_text)
+
+        if self.instrumentation.enabled:
+            self.instrumentation.observe("split.regex_extraction", time.perf_counter() - started)
+
+        return Document(
+            text=content,
+            metadata=DocumentMetadata(
+                tokens=tokens,
+                headers=current_headers,
+                urls=urls,
+                images=images,
+            )
+        )
+
+    async def generate_contexts(
+        self,
+        chunks: List[str],
+        text: str,
+        semaphore: asyncio.Semaphore | None = None,
+        offsets: List[int] | None = None,
+    ) -> List[str | None]:
+        """
+        Generuje konteksty dla fragmentów, zachowując ich kolejność.
+
+        W trybie współbieżnym (max_concurrency lub przekazany semaphore) błąd pojedynczego
+        fragmentu nie przerywa całej partii - po wyczerpaniu ponowień fragment otrzymuje
+        kontekst None. Jeśli generator grupuje fragmenty (plan_batches), każda grupa
+        generowana jest jednym wywołaniem i ponawiana w całości, a po wyczerpaniu ponowień
+        jej fragmenty generowane są osobno.
+
+        Args:
+            semaphore: Współdzielony limit wywołań, np. dla wielu dokumentów przetwarzanych równolegle.
+                Domyślnie tworzony jest nowy limit o wartości max_concurrency.
+            offsets: Pozycje początków fragmentów w text (np. z chunk_spans), przekazywane
+                do generatora, aby nie musiał odszukiwać fragmentów w dokumencie.
+        """
+        plan = self.context_generator.plan_batches(chunks)
+        batches = [[chunks[index] for index in batch] for batch in plan]
+        batch_offsets = [[offsets[index] for index in batch] if offsets is not None else None for batch in plan]
+
+        if self.max_concurrency is None and semaphore is None:
+            contexts = []
+            for batch, positions in zip(batches, batch_offsets):
+                contexts.extend(await self._generate_batch_with_retry(batch, text, offsets=positions))
+            return contexts
+
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def generate(batch: List[str], positions: List[int] | None) -> List[str]:
+            async with semaphore:
+                return await self._generate_batch_with_retry(batch, text, isolate_failures=True, offsets=positions)
+
+        results = await asyncio.gather(*(generate(*args) for args in zip(batches, batch_offsets)), return_exceptions=True)
+
+        for result in results:
+            if isinstance(result, BaseException) and not isinstance(result, Exception):
+                raise result
+
+        contexts = []
+        for batch, result in zip(batches, results):
+            if isinstance(result, Exception):
+                self.instrumentation.increment("split.context_failures", len(batch))
+                logger.warning("Context generation failed for chunks %d-%d: %r", len(contexts), len(contexts) + len(batch) - 1, result)
+                contexts.extend([None] * len(batch))
+            else:
+                contexts.extend(result)
+        return contexts
+
+    async def _generate_context_with_retry(self, chunk: str, text: str, offset: int | None = None) -> str:
+        return await self._with_retry(lambda: self.context_generator.generate_context(chunk, text, offset=offset))
+
+    async def _generate_batch_with_retry(
+        self, chunks: List[str], text: str, isolate_failures: bool = False, offsets: List[int] | None = None
+    ) -> List[str | None]:
+        """
+        Generuje konteksty partii; gdy ponowienia całej partii zawiodą, każdy fragment
+        generowany jest osobno (z własnymi ponowieniami).
+
+        Args:
+            isolate_failures: Jeśli True, fragment, którego nie udało się wygenerować osobno,
+                otrzymuje kontekst None zamiast przerywać całą partię.
+        """
+        positions = offsets if offsets is not None else [None] * len(chunks)
+        if len(chunks) == 1:
+            return [await self._generate_context_with_retry(chunks[0], text, positions[0])]
+
+        try:
+            return await self._with_retry(lambda: self.context_generator.generate_contexts(chunks, text, offsets=offsets))
+        except Exception as error:
+            self.instrumentation.increment("split.batch_fallbacks")
+            logger.warning("Batched context generation failed for %d chunks, generating them separately: %r", len(chunks), error)
+
+        contexts = []
+        for chunk, offset in zip(chunks, positions):
+            try:
+                contexts.append(await self._generate_context_with_retry(chunk, text, offset))
+            except Exception as error:
+                if not isolate_failures:
+                    raise
+                self.instrumentation.increment("split.context_failures")
+                logger.warning("Context generation failed for chunk: %r", error)
+                contexts.append(None)
+        return contexts
+
+    async def _with_retry(self, generate: Callable[[], Awaitable[T]]) -> T:
+        instrumentation = self.instrumentation
+        for attempt in range(self.max_retries + 1):
+            started = time.perf_counter() if instrumentation.enabled else 0.0
+            try:
+                return await generate()
+            except Exception:
+                if attempt == self.max_retries:
+                    raise
+            finally:
+                if instrumentation.enabled:
+                    instrumentation.observe("split.context_generation", time.perf_counter() - started)
+            instrumentation.increment("split.context_retries")
+            await asyncio.sleep(self.retry_delay * 2 ** attempt)
 
     def get_chunk(self, text: str, start: int, limit: int) -> Tuple[str, int]:
-        print(f"Getting chunk starting at {start} with limit {limit}")
-        
-        empty_text_tokens = self.tokenizer.count_tokens('')
-        formatted_empty_text_tokens = self.tokenizer.count_tokens(self.tokenizer.format_for_tokenization(''))
-        overhead = formatted_empty_text_tokens - empty_text_tokens
-        
         if start >= len(text):
             return "", start
-            
-        remaining_text = text[start:]
-        remaining_tokens = self.tokenizer.count_tokens(remaining_text)
-        
+
+        return self._fit_chunk(text, start, limit, self.tokenizer.count_tokens(text[start:]))
+
+    def get_indexed_chunk(self, index: TokenIndex, start: int, limit: int) -> Tuple[str, int]:
+        """
+        Odpowiednik get_chunk korzystający z TokenIndex: liczba tokenów pozostałego
+        tekstu odczytywana jest z indeksu zamiast tokenizacji całego sufiksu.
+
+        Zliczenie z indeksu jest dokładne, a dalsze zawężanie fragmentu przebiega
+        jak w get_chunk, więc oba tryby wyznaczają identyczne granice.
+        """
+        text = index.text
+
+        if start >= len(text):
+            return "", start
+
+        return self._fit_chunk(text, start, limit, index.count_tokens_from(start))
+
+    def _fit_chunk(self, text: str, start: int, limit: int, remaining_tokens: int) -> Tuple[str, int]:
+        overhead = self.tokenizer.wrapper_overhead
+
         if remaining_tokens == 0:
             return "", start
-            
-        end = min(start + int(len(remaining_text) * limit / remaining_tokens), len(text))
-        
+
+        end = min(start + int((len(text) - start) * limit / remaining_tokens), len(text))
+
         chunk_text = text[start:end]
         tokens = self.tokenizer.count_tokens(chunk_text)
-        
+
+        iterations = 0
         while tokens + overhead > limit and end > start:
-            print(f"Chunk exceeds limit with {tokens + overhead} tokens. Adjusting end position...")
+            iterations += 1
             end = self.find_new_chunk_end(text, start, end)
             chunk_text = text[start:end]
             tokens = self.tokenizer.count_tokens(chunk_text)
 
+        if self.instrumentation.enabled:
+            self.instrumentation.observe("split.shrink_iterations", iterations)
+
         end = self.adjust_chunk_end(text, start, end, tokens + overhead, limit)
 
-        chunk_text = text[start:end]
-        tokens = self.tokenizer.count_tokens(chunk_text)
-        print(f"Final chunk end: {end}")
-        return chunk_text, end
+        return text[start:end], end
 
     def adjust_chunk_end(self, text: str, start: int, end: int, current_tokens: int, limit: int) -> int:
         min_chunk_tokens = limit * 0.8
@@ -103,18 +432,14 @@ class TextSplitter:
 
         if next_newline != -1 and next_newline < len(text):
             extended_end = next_newline + 1
-            chunk_text = text[start:extended_end]
-            tokens = self.tokenizer.count_tokens(chunk_text)
+            tokens = self.tokenizer.count_tokens(text[start:extended_end])
             if tokens <= limit and tokens >= min_chunk_tokens:
-                print(f"Extending chunk to next newline at position {extended_end}")
                 return extended_end
 
         if prev_newline > start:
             reduced_end = prev_newline + 1
-            chunk_text = text[start:reduced_end]
-            tokens = self.tokenizer.count_tokens(chunk_text)
+            tokens = self.tokenizer.count_tokens(text[start:reduced_end])
             if tokens <= limit and tokens >= min_chunk_tokens:
-                print(f"Reducing chunk to previous newline at position {reduced_end}")
                 return reduced_end
 
         return end
@@ -127,8 +452,9 @@ class TextSplitter:
 
     def extract_headers(self, text: str) -> dict:
         headers = dict()
-        header_regex = re.compile(r'(^|\n)(#{1,6})\s+(.*)')
-        for match in header_regex.finditer(text):
+        if '#' not in text:
+            return headers
+        for match in HEADER_PATTERN.finditer(text):
             level = len(match.group(2))
             content = match.group(3).strip()
             key = f'h{level}'
@@ -149,6 +475,9 @@ class TextSplitter:
     def extract_urls_and_images(self, text: str) -> Tuple[str, List[str], List[str]]:
         urls = []
         images = []
+        if '](' not in text:
+            return text, urls, images
+
         url_index = 0
         image_index = 0
 
@@ -170,8 +499,8 @@ class TextSplitter:
             url_index += 1
             return result
 
-        content = re.sub(r'!\[([^\]]*)\]\(([^)]+)\)', replace_image, text)
-        content = re.sub(r'\[([^\]]+)\]\(([^)]+)\)', replace_url, content)
+        content = IMAGE_PATTERN.sub(replace_image, text) if '![' in text else text
+        content = URL_PATTERN.sub(replace_url, content)
 
         return content, urls, images
 
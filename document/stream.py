@@ -0,0 +1,34 @@
+import asyncio
+import codecs
+import io
+import os
+from typing import AsyncIterable, AsyncIterator, Union
+
+TextSource = Union[str, os.PathLike, AsyncIterable[str], AsyncIterable[bytes]]
+
+
+async def iter_text(source: TextSource, block_size: int = 64 * 1024) -> AsyncIterator[str]:
+    """
+    Odczytuje tekst przyrostowo z pliku lub asynchronicznego strumienia.
+
+    Args:
+        source: Ścieżka do pliku (UTF-8) albo asynchroniczny strumień fragmentów str lub bytes.
+            Strumień bajtów dekodowany jest jako UTF-8 z normalizacją znaków końca linii,
+            tak jak przy Path.read_text().
+        block_size: Rozmiar bloku odczytu z pliku (w znakach).
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'r', encoding='utf-8') as file:
+            while block := await asyncio.to_thread(file.read, block_size):
+                yield block
+        return
+
+    decoder = io.IncrementalNewlineDecoder(codecs.getincrementaldecoder('utf-8')(), translate=True)
+    async for piece in source:
+        if isinstance(piece, str):
+            yield piece
+        elif text := decoder.decode(piece):
+            yield text
+
+    if tail := decoder.decode(b'', final=True):
+        yield tail
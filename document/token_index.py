@@ -0,0 +1,79 @@
+from bisect import bisect_left
+from typing import TYPE_CHECKING, List, Optional
+
+from tokenization import Tokenizer
+
+if TYPE_CHECKING:
+    import regex
+
+
+class TokenIndex:
+    """
+    Indeks tokenów dokumentu budowany jednym przebiegiem tokenizera.
+
+    Przechowuje znakowe przesunięcia początków kolejnych tokenów oraz
+    oznaczenia tokenów rozpoczynających fragment pre-tokenizacji. Tokenizer
+    BPE koduje każdy taki fragment niezależnie, więc tokeny sufiksu
+    dokumentu od pierwszej wspólnej granicy fragmentów są identyczne jak
+    w tokenizacji całości. Dzięki temu liczbę tokenów pozostałego tekstu
+    można wyznaczyć dokładnie, tokenizując jedynie jego krótki początek.
+    """
+
+    def __init__(
+        self,
+        text: str,
+        offsets: List[int],
+        tokenizer: Tokenizer,
+        piece_starts: Optional[bytearray] = None,
+    ):
+        self.text = text
+        self._offsets = offsets
+        self._tokenizer = tokenizer
+        self._pattern: Optional["regex.Pattern"] = tokenizer.piece_pattern if piece_starts is not None else None
+        self._piece_starts = piece_starts
+
+    @classmethod
+    def build(cls, text: str, tokenizer: Tokenizer) -> "TokenIndex":
+        """Tokenizuje cały dokument raz i buduje dla niego indeks."""
+        _, offsets = tokenizer.encode_with_offsets(text)
+        pattern = tokenizer.piece_pattern
+        if pattern is None:
+            return cls(text, offsets, tokenizer)
+
+        piece_starts = bytearray(len(offsets))
+        for match in pattern.finditer(text):
+            # Pierwszy token o danym przesunięciu to token zaczynający znak;
+            # kolejne mogą być dalszymi bajtami tego samego znaku UTF-8.
+            token = bisect_left(offsets, match.start())
+            if token < len(offsets) and offsets[token] == match.start():
+                piece_starts[token] = 1
+        return cls(text, offsets, tokenizer, piece_starts)
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def count_tokens_from(self, start: int) -> int:
+        """
+        Zlicza tokeny sufiksu text[start:] dokładnie tak jak Tokenizer.count_tokens,
+        czyli razem z narzutem formatowania ChatML.
+
+        Fragmenty pre-tokenizacji sufiksu są dopasowywane od start aż do pierwszej
+        granicy, która jest też granicą fragmentu w całym dokumencie; tokenizowany
+        jest tylko tekst przed nią, a tokeny za nią odczytywane są z indeksu.
+        Bez wyrażenia pre-tokenizacji tokenizowany jest cały sufiks.
+        """
+        text = self.text
+        if self._pattern is None:
+            return self._tokenizer.count_tokens(text[start:])
+
+        position = start
+        while position < len(text):
+            token = bisect_left(self._offsets, position)
+            if token < len(self._offsets) and self._offsets[token] == position and self._piece_starts[token]:
+                return self._tokenizer.count_tokens(text[start:position]) + len(self._offsets) - token
+            match = self._pattern.match(text, position)
+            if match is None or match.end() == position:
+                break
+            position = match.end()
+
+        return self._tokenizer.count_tokens(text[start:])
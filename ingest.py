@@ -0,0 +1,68 @@
+import argparse
+import asyncio
+from pathlib import Path
+
+from document.context_generator import LLMContextGenerator
+from document.ingestion import CorpusIngestion, resolve_sources
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Split a corpus of markdown documents into contextualized chunks.")
+    parser.add_argument('source', help="Directory (searched recursively) or glob pattern")
+    parser.add_argument('--pattern', default='*.md', help="File pattern used when source is a directory")
+    parser.add_argument('--output', type=Path, default=Path('chunks.jsonl'))
+    parser.add_argument('--limit', type=int, default=300)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--with-context', action='store_true', help="Generate chunk contexts with OpenAI")
+    parser.add_argument('--max-concurrency', type=int, default=8)
+    parser.add_argument('--section-window', type=int, default=None, metavar='TOKENS',
+                        help="Send the document outline, summary and a window of neighbouring sections "
+                             "of this many tokens instead of the full document with every chunk")
+    parser.add_argument('--prefix-stable', action='store_true',
+                        help="Keep the instructions and document in a fixed prompt prefix so the provider can cache it")
+    args = parser.parse_args()
+    if args.prefix_stable and args.section_window is not None:
+        parser.error("--prefix-stable cannot be combined with --section-window, whose prompts have no full-document prefix")
+
+    context_generator = None
+    if args.with_context:
+        from language_model import OpenAILLMCall
+        from openai_client import ClientConfig, get_client
+
+        client = get_client(with_observability=True, config=ClientConfig(max_keepalive_connections=args.max_concurrency))
+        call = OpenAILLMCall(client=client)
+        if args.section_window is None:
+            context_generator = LLMContextGenerator(call, prefix_stable=args.prefix_stable)
+        else:
+            from document.section_context import SectionWindowContextGenerator
+
+            context_generator = SectionWindowContextGenerator(call, window_tokens=args.section_window)
+
+    ingestion = CorpusIngestion(
+        limit=args.limit,
+        context_generator=context_generator,
+        workers=args.workers,
+        max_concurrency=args.max_concurrency,
+    )
+    try:
+        stats = await ingestion.run(resolve_sources(args.source, args.pattern), args.output)
+    finally:
+        if args.with_context:
+            from openai_client import close_clients
+
+            await close_clients()
+    print(stats.summary())
+    if args.with_context:
+        cache_stats = call.cache_stats
+        print(f"Prompt cache: {cache_stats.cached_tokens}/{cache_stats.prompt_tokens} prompt tokens cached "
+              f"({cache_stats.cached_rate:.1%}), {cache_stats.cache_hits}/{cache_stats.requests} requests hit")
+    if args.with_context and args.section_window is not None:
+        window_stats = context_generator.stats
+        print(f"Section window: {window_stats.windowed_tokens + window_stats.summary_tokens} document tokens sent "
+              f"instead of {window_stats.full_document_tokens} ({window_stats.reduction:.1%} reduction)")
+    for failure in stats.failed:
+        print(f"Failed: {failure}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
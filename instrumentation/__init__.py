@@ -0,0 +1,4 @@
+from .aggregator import InMemoryAggregator
+from .base import NULL_INSTRUMENTATION, Instrumentation, NullInstrumentation
+
+__all__ = ["Instrumentation", "NullInstrumentation", "NULL_INSTRUMENTATION", "InMemoryAggregator"]
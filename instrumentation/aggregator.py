@@ -0,0 +1,46 @@
+from collections import defaultdict
+from typing import Dict, List
+
+from .base import Instrumentation
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of the values (fraction in 0.0-1.0)."""
+    ordered = sorted(values)
+    rank = max(int(round(fraction * len(ordered) + 0.5)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+class InMemoryAggregator(Instrumentation):
+    """
+    Instrumentation keeping every observation in memory and summarizing
+    them as count, total, p50 and p95 per metric.
+    """
+
+    def __init__(self) -> None:
+        self.observations: Dict[str, List[float]] = defaultdict(list)
+        self.counters: Dict[str, int] = defaultdict(int)
+
+    def observe(self, metric: str, value: float) -> None:
+        self.observations[metric].append(value)
+
+    def increment(self, counter: str, value: int = 1) -> None:
+        self.counters[counter] += value
+
+    def summary(self) -> str:
+        """
+        Render a table with count, total, p50 and p95 of every metric, followed by counters.
+        """
+        lines = [f"{'metric':<32} {'count':>8} {'total':>12} {'p50':>12} {'p95':>12}"]
+        for metric in sorted(self.observations):
+            values = self.observations[metric]
+            lines.append(
+                f"{metric:<32} {len(values):>8} {sum(values):>12.4f} "
+                f"{percentile(values, 0.5):>12.4f} {percentile(values, 0.95):>12.4f}"
+            )
+        for counter in sorted(self.counters):
+            lines.append(f"{counter:<32} {self.counters[counter]:>8}")
+        return "\n".join(lines)
+
+    def print_summary(self) -> None:
+        print(self.summary())
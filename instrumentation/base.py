@@ -0,0 +1,47 @@
+from abc import ABC, abstractmethod
+
+
+class Instrumentation(ABC):
+    """
+    Sink for hot-path metrics (stage timings, iteration counts, LLM latency and usage).
+
+    Instrumented code checks `enabled` before measuring anything, so a disabled
+    instrumentation costs a single attribute lookup per call site.
+    """
+    enabled: bool = True
+
+    @abstractmethod
+    def observe(self, metric: str, value: float) -> None:
+        """
+        Record a single observation of a distribution metric.
+
+        Args:
+            metric: Metric name, e.g. "split.boundary_search" or "llm.latency"
+            value: Observed value (seconds for timings)
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def increment(self, counter: str, value: int = 1) -> None:
+        """
+        Increase a counter.
+
+        Args:
+            counter: Counter name, e.g. "split.context_failures"
+            value: Amount to add
+        """
+        raise NotImplementedError
+
+
+class NullInstrumentation(Instrumentation):
+    """Disabled instrumentation used by default."""
+    enabled = False
+
+    def observe(self, metric: str, value: float) -> None:
+        pass
+
+    def increment(self, counter: str, value: int = 1) -> None:
+        pass
+
+
+NULL_INSTRUMENTATION = NullInstrumentation()
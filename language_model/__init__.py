@@ -1,5 +1,39 @@
-from .base import LLMCall
-from .openai import OpenAILLMCall
+from importlib import import_module
+from typing import TYPE_CHECKING
 
+if TYPE_CHECKING:
+    from .base import LLMCall
+    from .batch import OpenAIBatchLLMCall
+    from .coalescing import CoalescingLLMCall
+    from .embedding import Embedder, HashingEmbedder, OpenAIEmbedder
+    from .hedging import HedgedLLMCall
+    from .openai import OpenAILLMCall
 
-__all__ = ["LLMCall", "OpenAILLMCall"]
+
+# Submodules are imported on first attribute access, so that e.g. importing LLMCall
+# does not load the openai SDK (PEP 562).
+_EXPORTS = {
+    "LLMCall": ".base",
+    "OpenAILLMCall": ".openai",
+    "OpenAIBatchLLMCall": ".batch",
+    "CoalescingLLMCall": ".coalescing",
+    "Embedder": ".embedding",
+    "OpenAIEmbedder": ".embedding",
+    "HashingEmbedder": ".embedding",
+    "HedgedLLMCall": ".hedging",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
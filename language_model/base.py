@@ -13,6 +13,14 @@ class LLMCall(ABC):
     Abstract base class for language model interactions.
     Parameterized with response type (ResponseT), which must inherit from BaseModel from pydantic.
     """
+    @property
+    def model_name(self) -> str:
+        """
+        Name of the model used for structured output, e.g. for cache keys.
+        Defaults to the implementation class name.
+        """
+        return type(self).__name__
+
     @abstractmethod
     async def generate_structured_output(
         self, messages: ChatConversation, response_model: Type[ResponseT], temperature: float
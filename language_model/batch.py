@@ -0,0 +1,260 @@
+import asyncio
+import itertools
+import json
+from dataclasses import dataclass
+from typing import AsyncGenerator, Dict, List, Optional, Type
+
+from openai import AsyncOpenAI
+from pydantic import BaseModel
+
+from .base import LLMCall, ResponseT
+from .schemas import ChatConversation
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+TERMINAL_STATUSES = frozenset({"completed", "failed", "expired", "cancelled"})
+MAX_BATCH_REQUESTS = 50_000
+MAX_INPUT_FILE_BYTES = 200 * 1024 * 1024
+
+
+class BatchRequestError(RuntimeError):
+    """Raised for a request that did not produce a valid response within its batch."""
+
+
+@dataclass
+class _PendingRequest:
+    custom_id: str
+    line: bytes
+    response_model: Type
+    future: asyncio.Future
+
+
+def response_format(response_model: Type[BaseModel]) -> dict:
+    """Build a strict json_schema response_format for the pydantic model."""
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": response_model.__name__,
+            "schema": _strict_schema(response_model.model_json_schema()),
+            "strict": True,
+        },
+    }
+
+
+def _strict_schema(schema):
+    """Apply the structured outputs constraints: closed objects with every property required."""
+    if isinstance(schema, list):
+        return [_strict_schema(item) for item in schema]
+    if not isinstance(schema, dict):
+        return schema
+
+    schema = {key: _strict_schema(value) for key, value in schema.items() if not (key == "default" and value is None)}
+    if schema.get("type") == "object":
+        schema["additionalProperties"] = False
+        schema["required"] = list(schema.get("properties", {}))
+    return schema
+
+
+class OpenAIBatchLLMCall(LLMCall):
+    """
+    Implementation of language model for the OpenAI Batch API.
+
+    Calls to generate_structured_output are queued and submitted together as a
+    single batch job. Each caller awaits until the batch completes and then
+    receives its own parsed response, so it can be used as a drop-in LLMCall
+    for offline bulk workloads where latency does not matter.
+
+    A queue is submitted when it reaches max_batch_size requests, when the next
+    request would push its input file over max_file_bytes, or flush_interval
+    seconds after its first request, so every job stays within the Batch API
+    limits of 50,000 requests and 200 MB per input file.
+
+    Every job has a turnaround of up to completion_window (24h). Callers that
+    limit their in-flight requests submit only that many requests per job:
+    TextSplitter with max_concurrency=8 produces a job of 8 requests, waits for
+    it to complete, and only then queues the next 8, so a document of N chunks
+    takes up to N / 8 sequential 24h jobs. Use a max_concurrency (or a shared
+    semaphore) at least as large as the number of chunks of all documents
+    processed together.
+    """
+
+    def __init__(
+        self,
+        client: AsyncOpenAI,
+        model_name: str = 'gpt-4o-mini',
+        max_batch_size: int = MAX_BATCH_REQUESTS,
+        max_file_bytes: int = MAX_INPUT_FILE_BYTES,
+        flush_interval: float = 5.0,
+        poll_interval: float = 30.0,
+        completion_window: str = "24h",
+    ):
+        """
+        Initialize the OpenAI batch model.
+
+        Args:
+            client: AsyncOpenAI client instance (or any object exposing the same files and batches endpoints)
+            model_name: Name of the OpenAI model to use
+            max_batch_size: Number of queued requests that triggers an immediate submission (at most 50,000)
+            max_file_bytes: Maximum size of the JSONL input file of a single batch job
+            flush_interval: Seconds to wait for more requests after the first one is queued
+            poll_interval: Seconds between batch status checks
+            completion_window: Completion window requested for the batch job
+
+        Raises:
+            ValueError: If max_batch_size or max_file_bytes exceed the Batch API limits
+        """
+        if not 0 < max_batch_size <= MAX_BATCH_REQUESTS:
+            raise ValueError(f"max_batch_size must be between 1 and {MAX_BATCH_REQUESTS}")
+        if not 0 < max_file_bytes <= MAX_INPUT_FILE_BYTES:
+            raise ValueError(f"max_file_bytes must be between 1 and {MAX_INPUT_FILE_BYTES}")
+        self._client = client
+        self._model_name = model_name
+        self._max_batch_size = max_batch_size
+        self._max_file_bytes = max_file_bytes
+        self._flush_interval = flush_interval
+        self._poll_interval = poll_interval
+        self._completion_window = completion_window
+        self._queue: List[_PendingRequest] = []
+        self._queue_bytes = 0
+        self._ids = itertools.count()
+        self._flush_timer: Optional[asyncio.Task] = None
+        self._batches: set[asyncio.Task] = set()
+
+    @property
+    def model_name(self) -> str:
+        return self._model_name
+
+    async def generate_structured_output(
+        self, messages: ChatConversation, response_model: Type[ResponseT], temperature: float = 0.7, model_name: str | None = None
+    ) -> ResponseT:
+        """
+        Queue a structured output request and wait for its batch to complete.
+
+        Args:
+            messages: Conversation to be processed by the model
+            response_model: Pydantic model the response is parsed into
+            temperature: Randomness parameter (0.0-2.0)
+            model_name: Overrides the model configured for this instance
+
+        Returns:
+            Structured response conforming to the specified response model
+
+        Raises:
+            ValueError: If the request alone exceeds max_file_bytes
+        """
+        custom_id = f"request-{next(self._ids)}"
+        line = json.dumps({
+            "custom_id": custom_id,
+            "method": "POST",
+            "url": BATCH_ENDPOINT,
+            "body": {
+                "model": model_name or self._model_name,
+                "messages": messages.to_openai_format(),
+                "temperature": temperature,
+                "response_format": response_format(response_model),
+            },
+        }).encode() + b"\n"
+        if len(line) > self._max_file_bytes:
+            raise ValueError(f"Batch request of {len(line)} bytes exceeds max_file_bytes ({self._max_file_bytes})")
+        if self._queue_bytes + len(line) > self._max_file_bytes:
+            self.flush()
+
+        future = asyncio.get_running_loop().create_future()
+        self._queue.append(_PendingRequest(custom_id=custom_id, line=line, response_model=response_model, future=future))
+        self._queue_bytes += len(line)
+
+        if len(self._queue) >= self._max_batch_size:
+            self.flush()
+        elif self._flush_timer is None:
+            self._flush_timer = asyncio.create_task(self._flush_later())
+
+        return await future
+
+    async def generate_stream(self, messages: ChatConversation, temperature: float = 0.7) -> AsyncGenerator[str, None]:
+        raise NotImplementedError("The Batch API does not support streaming")
+
+    def flush(self) -> None:
+        """Submit all queued requests as a batch job without waiting for the flush interval."""
+        if self._flush_timer is not None and self._flush_timer is not asyncio.current_task():
+            self._flush_timer.cancel()
+        self._flush_timer = None
+
+        if not self._queue:
+            return
+
+        requests, self._queue = self._queue, []
+        self._queue_bytes = 0
+        task = asyncio.create_task(self._run_batch(requests))
+        self._batches.add(task)
+        task.add_done_callback(self._batches.discard)
+
+    async def aclose(self) -> None:
+        """Submit pending requests and wait for every submitted batch to finish."""
+        self.flush()
+        if self._batches:
+            await asyncio.gather(*self._batches, return_exceptions=True)
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self._flush_interval)
+        self.flush()
+
+    async def _run_batch(self, requests: List[_PendingRequest]) -> None:
+        pending = {request.custom_id: request for request in requests}
+        try:
+            batch = await self._submit(requests)
+            while batch.status not in TERMINAL_STATUSES:
+                await asyncio.sleep(self._poll_interval)
+                batch = await self._client.batches.retrieve(batch.id)
+
+            if batch.output_file_id:
+                self._resolve(pending, await self._read_lines(batch.output_file_id))
+            if batch.error_file_id:
+                self._resolve(pending, await self._read_lines(batch.error_file_id))
+
+            for request in pending.values():
+                if not request.future.done():
+                    request.future.set_exception(BatchRequestError(
+                        f"Batch {batch.id} finished with status '{batch.status}' without a result for {request.custom_id}"
+                    ))
+        except BaseException as error:
+            for request in pending.values():
+                if not request.future.done():
+                    request.future.set_exception(error)
+            if not isinstance(error, Exception):
+                raise
+
+    async def _submit(self, requests: List[_PendingRequest]):
+        input_file = await self._client.files.create(
+            file=("batch.jsonl", b"".join(request.line for request in requests)), purpose="batch"
+        )
+        return await self._client.batches.create(
+            input_file_id=input_file.id, endpoint=BATCH_ENDPOINT, completion_window=self._completion_window
+        )
+
+    async def _read_lines(self, file_id: str) -> List[dict]:
+        content = await self._client.files.content(file_id)
+        return [json.loads(line) for line in content.text.splitlines() if line.strip()]
+
+    def _resolve(self, pending: Dict[str, _PendingRequest], lines: List[dict]) -> None:
+        for line in lines:
+            request = pending.pop(line.get("custom_id"), None)
+            if request is None or request.future.done():
+                continue
+
+            try:
+                request.future.set_result(self._parse(request, line))
+            except Exception as error:
+                request.future.set_exception(error)
+
+    def _parse(self, request: _PendingRequest, line: dict):
+        if line.get("error"):
+            raise BatchRequestError(f"{request.custom_id} failed: {line['error']}")
+
+        response = line.get("response") or {}
+        if response.get("status_code") != 200:
+            raise BatchRequestError(f"{request.custom_id} failed with status {response.get('status_code')}: {response.get('body')}")
+
+        message = response["body"]["choices"][0]["message"]
+        if message.get("refusal") or not message.get("content"):
+            raise ValueError("Failed to parse response into the specified model")
+
+        return request.response_model.model_validate_json(message["content"])
@@ -0,0 +1,123 @@
+import asyncio
+import hashlib
+import json
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import AsyncGenerator, Dict, Type
+
+from .base import LLMCall, ResponseT
+from .schemas import ChatConversation
+
+
+@lru_cache(maxsize=128)
+def _schema_digest(response_model: Type) -> str:
+    schema = json.dumps(response_model.model_json_schema(), sort_keys=True)
+    return f"{response_model.__module__}.{response_model.__qualname__}:{hashlib.sha256(schema.encode()).hexdigest()}"
+
+
+@dataclass
+class CoalescingStats:
+    calls: int = 0
+    coalesced: int = 0
+
+    @property
+    def coalesced_rate(self) -> float:
+        return self.coalesced / self.calls if self.calls else 0.0
+
+
+@dataclass
+class _InFlight:
+    task: asyncio.Task
+    waiters: int = 0
+
+
+class CoalescingLLMCall(LLMCall):
+    """
+    LLMCall decorator sharing a single in-flight request between identical concurrent calls.
+
+    Calls with the same messages, model, response model and temperature that
+    arrive while the first one is still running await its result instead of
+    sending another request. Errors are raised to every waiter. The request is
+    cancelled only when all of its waiters are cancelled.
+    """
+
+    def __init__(self, call: LLMCall, deterministic_only: bool = True):
+        """
+        Args:
+            call: Wrapped LLMCall that performs the requests
+            deterministic_only: Coalesce only calls with temperature 0.0; sampled calls are
+                expected to return independent answers, so they are always sent separately
+        """
+        self._call = call
+        self._deterministic_only = deterministic_only
+        self._in_flight: Dict[str, _InFlight] = {}
+        self.stats = CoalescingStats()
+
+    @property
+    def model_name(self) -> str:
+        return self._call.model_name
+
+    async def generate_structured_output(
+        self, messages: ChatConversation, response_model: Type[ResponseT], temperature: float = 0.7, model_name: str | None = None
+    ) -> ResponseT:
+        """
+        Generate structured output, joining an identical request that is already in flight.
+
+        Args:
+            messages: Conversation to be processed by the model
+            response_model: Pydantic model the response is parsed into
+            temperature: Randomness parameter (0.0-2.0)
+            model_name: Overrides the model configured for the wrapped call
+
+        Returns:
+            Structured response conforming to the specified response model; waiters
+            joining an in-flight request receive their own copy of it
+        """
+        self.stats.calls += 1
+        overrides = {"model_name": model_name} if model_name is not None else {}
+
+        if self._deterministic_only and temperature != 0.0:
+            return await self._call.generate_structured_output(messages, response_model, temperature, **overrides)
+
+        key = self._fingerprint(messages, response_model, temperature, model_name or self._call.model_name)
+        in_flight = self._in_flight.get(key)
+        leader = in_flight is None
+        if leader:
+            task = asyncio.create_task(
+                self._call.generate_structured_output(messages, response_model, temperature, **overrides)
+            )
+            in_flight = self._in_flight[key] = _InFlight(task)
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        else:
+            self.stats.coalesced += 1
+
+        in_flight.waiters += 1
+        try:
+            response = await asyncio.shield(in_flight.task)
+        except asyncio.CancelledError:
+            if in_flight.task.cancelled():
+                raise
+            in_flight.waiters -= 1
+            if in_flight.waiters == 0:
+                in_flight.task.cancel()
+            raise
+
+        return response if leader else response.model_copy(deep=True)
+
+    async def generate_stream(self, messages: ChatConversation, temperature: float = 0.7) -> AsyncGenerator[str, None]:
+        async for delta in self._call.generate_stream(messages, temperature):
+            yield delta
+
+    @staticmethod
+    def _fingerprint(messages: ChatConversation, response_model: Type, temperature: float, model_name: str) -> str:
+        payload = json.dumps(
+            {
+                "messages": messages.to_openai_format(),
+                "response_model": _schema_digest(response_model),
+                "temperature": temperature,
+                "model": model_name,
+            },
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
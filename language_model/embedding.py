@@ -0,0 +1,137 @@
+import asyncio
+import hashlib
+import re
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING, List
+
+import numpy as np
+
+from tokenization import TiktokenTokenizer, Tokenizer
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+_WORD_PATTERN = re.compile(r'\w+')
+
+
+class Embedder(ABC):
+    """
+    Abstract base class for text embedding models.
+    """
+
+    @property
+    @abstractmethod
+    def dimensions(self) -> int:
+        """Length of the produced vectors."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts.
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            float32 matrix of shape (len(texts), dimensions), rows in input order
+        """
+        raise NotImplementedError
+
+
+class OpenAIEmbedder(Embedder):
+    """
+    Embedder using the OpenAI embeddings endpoint.
+
+    Texts are grouped into requests by a token budget and the requests are
+    sent concurrently through the given (shared) client.
+    """
+
+    def __init__(
+        self,
+        client: "AsyncOpenAI",
+        model_name: str = "text-embedding-3-small",
+        dimensions: int = 1536,
+        batch_token_budget: int = 100_000,
+        max_batch_size: int = 2048,
+        max_concurrency: int = 4,
+        tokenizer: Tokenizer | None = None,
+    ):
+        """
+        Args:
+            client: AsyncOpenAI client instance
+            model_name: Embedding model name
+            dimensions: Vector length requested from the model
+            batch_token_budget: Maximum number of input tokens per request
+            max_batch_size: Maximum number of inputs per request
+            max_concurrency: Number of requests sent at the same time
+            tokenizer: Tokenizer used to estimate input sizes, TiktokenTokenizer by default
+        """
+        self._client = client
+        self._model_name = model_name
+        self._dimensions = dimensions
+        self._batch_token_budget = batch_token_budget
+        self._max_batch_size = max_batch_size
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._tokenizer = tokenizer if tokenizer is not None else TiktokenTokenizer()
+
+    @property
+    def dimensions(self) -> int:
+        return self._dimensions
+
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        result = np.empty((len(texts), self._dimensions), dtype=np.float32)
+        batches = self._plan_batches(texts)
+        await asyncio.gather(*(self._embed_batch(texts, batch, result) for batch in batches))
+        return result
+
+    def _plan_batches(self, texts: List[str]) -> List[range]:
+        overhead = self._tokenizer.wrapper_overhead
+        batches = []
+        start = tokens = 0
+        for index, count in enumerate(self._tokenizer.count_tokens_batch(texts)):
+            count -= overhead
+            if index > start and (tokens + count > self._batch_token_budget or index - start >= self._max_batch_size):
+                batches.append(range(start, index))
+                start, tokens = index, 0
+            tokens += count
+        if start < len(texts):
+            batches.append(range(start, len(texts)))
+        return batches
+
+    async def _embed_batch(self, texts: List[str], batch: range, result: np.ndarray) -> None:
+        async with self._semaphore:
+            response = await self._client.embeddings.create(
+                model=self._model_name,
+                input=[texts[index] for index in batch],
+                dimensions=self._dimensions,
+            )
+        for item in response.data:
+            result[batch.start + item.index] = item.embedding
+
+
+class HashingEmbedder(Embedder):
+    """
+    Deterministic local embedder based on feature hashing of lowercased words.
+
+    It needs no network or model, produces identical vectors across runs and
+    processes, and texts sharing words get similar vectors, which makes it a
+    stand-in for OpenAIEmbedder in tests and offline runs.
+    """
+
+    def __init__(self, dimensions: int = 256):
+        self._dimensions = dimensions
+
+    @property
+    def dimensions(self) -> int:
+        return self._dimensions
+
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        result = np.zeros((len(texts), self._dimensions), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in _WORD_PATTERN.findall(text.lower()):
+                digest = int.from_bytes(hashlib.blake2b(word.encode(), digest_size=8).digest(), "little")
+                result[row, digest % self._dimensions] += 1.0 if digest >> 63 else -1.0
+        norms = np.linalg.norm(result, axis=1, keepdims=True)
+        np.divide(result, norms, out=result, where=norms > 0)
+        return result
@@ -0,0 +1,292 @@
+import asyncio
+import math
+import time
+from dataclasses import dataclass, field
+from typing import AsyncGenerator, Dict, List, Optional, Sequence, Type
+
+from instrumentation import NULL_INSTRUMENTATION, Instrumentation
+
+from .base import LLMCall, ResponseT
+from .schemas import ChatConversation
+
+
+class LatencyHistogram:
+    """
+    Histogram of request latencies with logarithmic buckets.
+
+    Bucket i counts latencies up to min_latency * growth ** i, so percentiles are
+    accurate to the bucket growth (10% by default) at any latency scale. When the
+    number of samples exceeds max_samples all counts are halved, so old samples
+    fade out and the histogram follows changes of backend latency.
+    """
+
+    def __init__(self, min_latency: float = 0.001, growth: float = 1.1, buckets: int = 160, max_samples: int = 1000):
+        """
+        Args:
+            min_latency: Upper bound of the first bucket in seconds
+            growth: Ratio of upper bounds of consecutive buckets
+            buckets: Number of buckets; larger latencies fall into the last one
+            max_samples: Sample count at which the counts are halved
+        """
+        self.min_latency = min_latency
+        self.growth = growth
+        self.max_samples = max_samples
+        self.counts = [0.0] * buckets
+        self.count = 0.0
+
+    def record(self, latency: float) -> None:
+        bucket = 0
+        if latency > self.min_latency:
+            bucket = min(math.ceil(math.log(latency / self.min_latency, self.growth)), len(self.counts) - 1)
+        self.counts[bucket] += 1
+        self.count += 1
+        if self.count > self.max_samples:
+            self.counts = [count / 2 for count in self.counts]
+            self.count /= 2
+
+    def percentile(self, fraction: float) -> float:
+        """Upper bound of the bucket holding the given fraction (0.0-1.0) of samples; 0.0 when empty."""
+        if not self.count:
+            return 0.0
+        threshold = fraction * self.count
+        cumulative = 0.0
+        for bucket, count in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= threshold and count:
+                return self.min_latency * self.growth ** bucket
+        return self.min_latency * self.growth ** (len(self.counts) - 1)
+
+
+@dataclass
+class Backend:
+    """
+    A wrapped LLMCall with its latency statistics.
+
+    Attributes:
+        call: Underlying LLMCall
+        name: Name used in metrics and stats
+        histogram: Latencies of successful requests
+        success_rate: Exponential moving average of successful requests (1.0 = no failures)
+        requests: Started requests, including hedges
+        wins: Requests that returned the response
+    """
+    call: LLMCall
+    name: str
+    histogram: LatencyHistogram = field(default_factory=LatencyHistogram)
+    success_rate: float = 1.0
+    requests: int = 0
+    wins: int = 0
+
+
+@dataclass
+class HedgeStats:
+    calls: int = 0
+    hedges: int = 0
+    hedge_wins: int = 0
+    fallbacks: int = 0
+
+    @property
+    def hedge_rate(self) -> float:
+        return self.hedges / self.calls if self.calls else 0.0
+
+
+class HedgedLLMCall(LLMCall):
+    """
+    LLMCall composite sending each request to one of several backends and hedging slow ones.
+
+    Backends are e.g. different models, API keys or OpenAI-compatible endpoints.
+    A request goes to the primary backend, the one with the lowest expected time
+    to a successful response (median latency divided by success rate). If it
+    does not answer within the hedge percentile of its own latency histogram,
+    the same request is sent to the next backend, and the first valid structured
+    response wins while the other requests are cancelled. A backend that fails
+    is replaced by the next one immediately.
+
+    Backends without min_samples latencies are ranked first, so every backend is
+    measured before the ranking relies on it. A request cancelled because
+    another backend won only tells that its latency exceeds the elapsed time.
+    Hedges start late, so that bound is recorded only for the primary and only
+    when it is at least the primary's median; a slow primary that keeps losing
+    drops in the ranking, while hedges that lose never look faster than they are.
+    """
+
+    def __init__(
+        self,
+        calls: Sequence[LLMCall],
+        hedge_percentile: float = 0.95,
+        initial_hedge_delay: float = 2.0,
+        min_hedge_delay: float = 0.05,
+        max_hedges: int = 1,
+        min_samples: int = 20,
+        names: Optional[Sequence[str]] = None,
+        instrumentation: Instrumentation | None = None,
+    ):
+        """
+        Args:
+            calls: Backends, in order of preference until their latencies are known
+            hedge_percentile: Latency percentile (0.0-1.0) of the primary after which a hedge request is sent
+            initial_hedge_delay: Hedge delay in seconds while the primary has fewer than min_samples latencies
+            min_hedge_delay: Lower bound of the hedge delay in seconds
+            max_hedges: Maximum number of hedge requests per call; failures are always retried
+                on the remaining backends
+            min_samples: Latencies needed before a backend's histogram is used
+            names: Backend names used in stats and metrics, "<index>:<model_name>" by default
+            instrumentation: Receives per-backend latencies and hedge counters (disabled by default)
+
+        Raises:
+            ValueError: If no calls are given
+        """
+        if not calls:
+            raise ValueError("HedgedLLMCall requires at least one backend")
+        names = names or [f"{index}:{call.model_name}" for index, call in enumerate(calls)]
+        self.backends = [Backend(call, name) for call, name in zip(calls, names)]
+        self.hedge_percentile = hedge_percentile
+        self.initial_hedge_delay = initial_hedge_delay
+        self.min_hedge_delay = min_hedge_delay
+        self.max_hedges = max_hedges
+        self.min_samples = min_samples
+        self.stats = HedgeStats()
+        self._instrumentation = instrumentation if instrumentation is not None else NULL_INSTRUMENTATION
+
+    @property
+    def model_name(self) -> str:
+        return self.rank()[0].call.model_name
+
+    def rank(self) -> List[Backend]:
+        """Backends ordered from the current primary to the last fallback."""
+        def expected_latency(backend: Backend) -> float:
+            if backend.histogram.count < self.min_samples:
+                return 0.0
+            return backend.histogram.percentile(0.5) / max(backend.success_rate, 0.01)
+
+        return sorted(self.backends, key=expected_latency)
+
+    def hedge_delay(self, backend: Backend) -> float:
+        """Seconds to wait for the backend before sending a hedge request."""
+        if backend.histogram.count < self.min_samples:
+            return max(self.initial_hedge_delay, self.min_hedge_delay)
+        return max(backend.histogram.percentile(self.hedge_percentile), self.min_hedge_delay)
+
+    async def generate_structured_output(
+        self, messages: ChatConversation, response_model: Type[ResponseT], temperature: float = 0.7, model_name: str | None = None
+    ) -> ResponseT:
+        """
+        Generate structured output from the fastest backend.
+
+        Args:
+            messages: Conversation to be processed by the model
+            response_model: Pydantic model the response is parsed into
+            temperature: Randomness parameter (0.0-2.0)
+            model_name: Overrides the model of every backend
+
+        Returns:
+            The first valid structured response
+
+        Raises:
+            Exception: The error of the last backend when every backend failed
+        """
+        self.stats.calls += 1
+        overrides = {"model_name": model_name} if model_name is not None else {}
+        queue = self.rank()
+        primary = queue[0]
+        running: Dict[asyncio.Task, Backend] = {}
+        started: Dict[asyncio.Task, float] = {}
+        hedges = 0
+        error: Optional[BaseException] = None
+
+        def start(backend: Backend) -> None:
+            backend.requests += 1
+            task = asyncio.create_task(self._timed(backend, messages, response_model, temperature, overrides))
+            running[task] = backend
+            started[task] = time.perf_counter()
+
+        start(queue.pop(0))
+        try:
+            while running:
+                timeout = None
+                if len(running) == 1 and queue and hedges < self.max_hedges:
+                    timeout = self.hedge_delay(next(iter(running.values())))
+                done, _ = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    hedges += 1
+                    self.stats.hedges += 1
+                    self._instrumentation.increment("llm.hedges")
+                    start(queue.pop(0))
+                    continue
+
+                winner: Optional[asyncio.Task] = None
+                winner_backend: Optional[Backend] = None
+                for task in done:
+                    backend = running.pop(task)
+                    if task.cancelled():
+                        error = RuntimeError(f"Request to backend {backend.name} was cancelled")
+                    elif task.exception() is not None:
+                        error = task.exception()
+                    elif winner is None:
+                        winner = task
+                        winner_backend = backend
+
+                if winner is not None:
+                    winner_backend.wins += 1
+                    now = time.perf_counter()
+                    for loser, loser_backend in running.items():
+                        elapsed = now - started[loser]
+                        if loser_backend is primary and elapsed >= primary.histogram.percentile(0.5):
+                            primary.histogram.record(elapsed)
+                    if hedges and winner_backend is not primary:
+                        self.stats.hedge_wins += 1
+                        self._instrumentation.increment("llm.hedge_wins")
+                    return winner.result()
+
+                if not running and queue:
+                    self.stats.fallbacks += 1
+                    self._instrumentation.increment("llm.fallbacks")
+                    start(queue.pop(0))
+        finally:
+            for task in running:
+                task.cancel()
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
+
+        raise error
+
+    async def generate_stream(self, messages: ChatConversation, temperature: float = 0.7) -> AsyncGenerator[str, None]:
+        """
+        Stream from the primary backend, falling back to the next one if it fails before the first delta.
+
+        Streams are not hedged: once a backend has produced output it cannot be replaced.
+        """
+        error: Optional[BaseException] = None
+        for backend in self.rank():
+            started = False
+            try:
+                async for delta in backend.call.generate_stream(messages, temperature):
+                    started = True
+                    yield delta
+                return
+            except Exception as e:
+                if started:
+                    raise
+                error = e
+                self.stats.fallbacks += 1
+        raise error
+
+    async def _timed(
+        self, backend: Backend, messages: ChatConversation, response_model: Type[ResponseT], temperature: float, overrides: dict
+    ) -> ResponseT:
+        started = time.perf_counter()
+        try:
+            response = await backend.call.generate_structured_output(messages, response_model, temperature, **overrides)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            backend.success_rate *= 0.9
+            raise
+
+        latency = time.perf_counter() - started
+        backend.success_rate = 0.9 * backend.success_rate + 0.1
+        backend.histogram.record(latency)
+        if self._instrumentation.enabled:
+            self._instrumentation.observe(f"llm.backend_latency.{backend.name}", latency)
+        return response
@@ -1,20 +1,43 @@
+import time
+from dataclasses import dataclass
 from typing import AsyncGenerator, Type
 
 from openai import AsyncOpenAI
 
+from instrumentation import NULL_INSTRUMENTATION, Instrumentation
+
 from .base import LLMCall, ResponseT
+from .rate_limit import RateLimiter
 from .schemas import ChatConversation
 
 
+@dataclass
+class PromptCacheStats:
+    requests: int = 0
+    prompt_tokens: int = 0
+    cached_tokens: int = 0
+    cache_hits: int = 0
+
+    @property
+    def cached_rate(self) -> float:
+        """Fraction of prompt tokens served from the provider's prompt cache."""
+        return self.cached_tokens / self.prompt_tokens if self.prompt_tokens else 0.0
+
+
 class OpenAILLMCall(LLMCall):
     """
     Implementation of language model for OpenAI API with structured output support.
+
+    Token usage of every request, streamed or not, is accumulated in cache_stats
+    regardless of instrumentation.
     """
 
     def __init__(
         self,
         client: AsyncOpenAI,
-        model_name: str = 'gpt-4o-mini'
+        model_name: str = 'gpt-4o-mini',
+        instrumentation: Instrumentation | None = None,
+        rate_limiter: RateLimiter | None = None,
     ):
         """
         Initialize the OpenAI structured output model.
@@ -24,12 +47,21 @@ class OpenAILLMCall(LLMCall):
             response_model: Pydantic model class that defines the expected response structure
             client: AsyncOpenAI client instance
             messages:
+            instrumentation: Receives request latency and token usage metrics (disabled by default)
+            rate_limiter: Schedules structured output requests within RPM/TPM budgets and retries 429s
         """
         self._client = client
         self._model_name = model_name
+        self._instrumentation = instrumentation if instrumentation is not None else NULL_INSTRUMENTATION
+        self._rate_limiter = rate_limiter
+        self.cache_stats = PromptCacheStats()
+
+    @property
+    def model_name(self) -> str:
+        return self._model_name
 
     async def generate_structured_output(
-        self, messages: ChatConversation, response_model: Type[ResponseT], temperature: float = 0.7, model_name: str = 'gpt-4o-mini'
+        self, messages: ChatConversation, response_model: Type[ResponseT], temperature: float = 0.7, model_name: str | None = None
     ) -> ResponseT:
         """
         Generate structured output using OpenAI's beta.chat.completions.parse method.
@@ -37,18 +69,42 @@ class OpenAILLMCall(LLMCall):
         Args:
             message: User message or prompt
             temperature: Randomness parameter (0.0-2.0)
+            model_name: Overrides the model configured for this instance
 
         Returns:
             Structured response conforming to the specified response model
         """
+        instrumentation = self._instrumentation
+        started = time.perf_counter() if instrumentation.enabled else 0.0
 
-        completion = await self._client.beta.chat.completions.parse(
+        request = dict(
             messages=messages.to_openai_format(),
-            model=model_name,
+            model=model_name or self._model_name,
             response_format=response_model,
             temperature=temperature
         )
 
+        if self._rate_limiter is None:
+            completion = await self._client.beta.chat.completions.parse(**request)
+        else:
+            estimated_tokens = self._rate_limiter.estimate_tokens(messages)
+            response = await self._rate_limiter.run(
+                lambda: self._client.beta.chat.completions.with_raw_response.parse(**request), estimated_tokens
+            )
+            completion = response.parse()
+            self._rate_limiter.settle(estimated_tokens, completion.usage.total_tokens if completion.usage else None)
+
+        cached_tokens = self._record_usage(completion.usage)
+
+        if instrumentation.enabled:
+            latency = time.perf_counter() - started
+            instrumentation.observe("llm.latency", latency)
+            instrumentation.observe("llm.latency_cached" if cached_tokens else "llm.latency_uncached", latency)
+            if completion.usage is not None:
+                instrumentation.observe("llm.prompt_tokens", completion.usage.prompt_tokens)
+                instrumentation.observe("llm.completion_tokens", completion.usage.completion_tokens)
+                instrumentation.observe("llm.cached_tokens", cached_tokens)
+
         parsed_response = completion.choices[0].message.parsed
 
         if parsed_response is None:
@@ -69,13 +125,40 @@ class OpenAILLMCall(LLMCall):
         Yields:
             Text chunks from the streaming response
         """
+        instrumentation = self._instrumentation
+        started = time.perf_counter() if instrumentation.enabled else 0.0
+
         stream = await self._client.chat.completions.create(
             model=self._model_name,
             messages=messages.to_openai_format(),
             temperature=temperature,
-            stream=True
+            stream=True,
+            stream_options={"include_usage": True},
         )
         
         async for chunk in stream:
             if chunk.choices and chunk.choices[0].delta.content:
-                yield chunk.choices[0].delta.content        
+                yield chunk.choices[0].delta.content
+            if chunk.usage is not None:
+                cached_tokens = self._record_usage(chunk.usage)
+                if instrumentation.enabled:
+                    instrumentation.observe("llm.prompt_tokens", chunk.usage.prompt_tokens)
+                    instrumentation.observe("llm.completion_tokens", chunk.usage.completion_tokens)
+                    instrumentation.observe("llm.cached_tokens", cached_tokens)
+
+        if instrumentation.enabled:
+            instrumentation.observe("llm.stream_latency", time.perf_counter() - started)
+
+    def _record_usage(self, usage) -> int:
+        """Update cache_stats with the usage of a completion and return its cached prompt tokens."""
+        if usage is None:
+            return 0
+
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached_tokens = (details.cached_tokens or 0) if details is not None else 0
+
+        self.cache_stats.requests += 1
+        self.cache_stats.prompt_tokens += usage.prompt_tokens
+        self.cache_stats.cached_tokens += cached_tokens
+        self.cache_stats.cache_hits += bool(cached_tokens)
+        return cached_tokens
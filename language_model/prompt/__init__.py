@@ -1,3 +1,4 @@
 from .builder import PromptBuilder
+from .template import CompiledPrompt
 
-__all__ = ["PromptBuilder"]
\ No newline at end of file
+__all__ = ["PromptBuilder", "CompiledPrompt"]
\ No newline at end of file
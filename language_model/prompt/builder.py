@@ -3,7 +3,7 @@ from dataclasses import dataclass
 from pathlib import Path
 from typing import List, Optional, Self, Union
 
-import yaml
+from .template import CompiledPrompt, format_context, load_examples
 
 
 class PromptBuilder:
@@ -17,6 +17,7 @@ class PromptBuilder:
         self._body: str = body
         self._title: Optional[str] = None
         self._examples: List[dict] = []
+        self._example_sources: List[Path] = []
         self._rules: List[str] = []
         self._context: Optional[str] = None
         self._confirmation: Optional[str] = None
@@ -46,16 +47,8 @@ class PromptBuilder:
             The builder instance for method chaining.
         """
         path = Path(yaml_path)
-        with open(path, 'r') as file:
-            examples_data = yaml.safe_load(file)
-            
-        for key, value in examples_data.items():
-            if key.startswith('example_') and isinstance(value, dict):
-                if 'request' in value and 'response' in value:
-                    self._examples.append({
-                        'request': value['request'],
-                        'response': value['response']
-                    })
+        self._examples.extend(load_examples(path))
+        self._example_sources.append(path)
         
         return self
     
@@ -83,13 +76,7 @@ class PromptBuilder:
         Returns:
             The builder instance for method chaining.
         """
-        # Format the context as XML-like tags
-        formatted_sections = []
-        for key, value in context.items():
-            formatted_sections.append(f"<{key}>{value}</{key}>")
-        
-        # Join all formatted sections with newlines
-        self._context = "\n".join(formatted_sections)
+        self._context = format_context(context)
         return self
     
     def with_confirmation(self, confirmation: str) -> Self:
@@ -105,6 +92,22 @@ class PromptBuilder:
         self._confirmation = confirmation
         return self
     
+    def compile(self) -> CompiledPrompt:
+        """
+        Compile the static sections (title, rules, examples, confirmation) into
+        a reusable template. The body and context are supplied per render.
+        
+        Returns:
+            A CompiledPrompt rendering the same output as build().
+        """
+        return CompiledPrompt(
+            body=self._body,
+            title=self._title,
+            rules=list(self._rules),
+            example_sources=list(self._example_sources),
+            confirmation=self._confirmation,
+        )
+    
     def build(self) -> str:
         """
         Build and return the complete prompt according to the specified format.
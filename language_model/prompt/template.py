@@ -0,0 +1,141 @@
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+import yaml
+
+_examples_cache: Dict[Path, Tuple[int, List[dict]]] = {}
+
+
+def load_examples(yaml_path: Union[str, Path]) -> List[dict]:
+    """
+    Load request/response examples from a YAML file.
+
+    Parsed examples are cached per file and re-read only when the file's
+    modification time changes.
+
+    Args:
+        yaml_path: Path to the YAML file containing examples.
+                   Format should be example_n: {request: "...", response: "..."}
+
+    Returns:
+        List of {'request': ..., 'response': ...} dictionaries.
+    """
+    path = Path(yaml_path).resolve()
+    mtime = os.stat(path).st_mtime_ns
+
+    cached = _examples_cache.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    with open(path, 'r') as file:
+        examples_data = yaml.safe_load(file)
+
+    examples = []
+    for key, value in examples_data.items():
+        if key.startswith('example_') and isinstance(value, dict):
+            if 'request' in value and 'response' in value:
+                examples.append({
+                    'request': value['request'],
+                    'response': value['response']
+                })
+
+    _examples_cache[path] = (mtime, examples)
+    return examples
+
+
+def format_context(context: dict[str, str]) -> str:
+    """Format context sections as <key>value</key> lines."""
+    return "\n".join(f"<{key}>{value}</{key}>" for key, value in context.items())
+
+
+class CompiledPrompt:
+    """
+    Prompt with its static sections (title, rules, examples, confirmation)
+    rendered once. Only the body and context slots are filled per call.
+
+    The output of render() is identical to PromptBuilder.build() for the same
+    body and context. Example files are checked for modification on every
+    render and the static sections are re-rendered when they change.
+    """
+
+    def __init__(
+        self,
+        body: str,
+        title: Optional[str],
+        rules: List[str],
+        example_sources: List[Path],
+        confirmation: Optional[str],
+    ) -> None:
+        self._body = body
+        self._title = title
+        self._rules = rules
+        self._example_sources = example_sources
+        self._confirmation = confirmation
+        self._source_mtimes: Tuple[int, ...] = ()
+        self._compile()
+
+    def render(self, body: Optional[str] = None, context: Optional[dict[str, str]] = None) -> str:
+        """
+        Render the prompt.
+
+        Args:
+            body: The main body of the prompt. Defaults to the body the template was compiled with.
+            context: Context sections, formatted as in PromptBuilder.with_context.
+
+        Returns:
+            The complete prompt.
+        """
+        if self._example_sources and self._current_mtimes() != self._source_mtimes:
+            self._compile()
+
+        formatted_context = format_context(context) if context else ""
+        body = self._body if body is None else body
+
+        if formatted_context:
+            return f"{self._prefix}{body}{self._middle}{formatted_context}{self._context_suffix}"
+        return f"{self._prefix}{body}{self._no_context_suffix}"
+
+    def _current_mtimes(self) -> Tuple[int, ...]:
+        return tuple(os.stat(path).st_mtime_ns for path in self._example_sources)
+
+    def _compile(self) -> None:
+        self._source_mtimes = self._current_mtimes()
+
+        examples: List[dict] = []
+        for path in self._example_sources:
+            examples.extend(load_examples(path))
+
+        prefix = ""
+        if self._title:
+            prefix = f"{self._title}\n\n"
+
+        middle = "\n\n"
+        if self._rules:
+            rules = "".join(f"- {rule}\n" for rule in self._rules)
+            middle += f"<rules>\n\n{rules}\n</prompt_rules>\n\n"
+
+        tail_parts: List[str] = []
+        if examples:
+            tail_parts.append("<examples>")
+            for i, example in enumerate(examples):
+                if i > 0:
+                    tail_parts.append("")
+                tail_parts.append(f"USER: {example['request']}")
+                tail_parts.append(f"AI: {example['response']}")
+            tail_parts.append("")
+            tail_parts.append("</examples>")
+            tail_parts.append("")
+        if self._confirmation:
+            tail_parts.append(self._confirmation)
+        tail = "\n".join(tail_parts)
+
+        # build() joins every section with "\n"; the last section never gets a trailing newline.
+        self._prefix = prefix
+        self._middle = middle
+        if tail_parts:
+            self._context_suffix = f"\n\n{tail}"
+            self._no_context_suffix = f"{middle}{tail}"
+        else:
+            self._context_suffix = "\n"
+            self._no_context_suffix = middle[:-1]
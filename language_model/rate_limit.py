@@ -0,0 +1,251 @@
+import asyncio
+import random
+import re
+import time
+from typing import Awaitable, Callable, Mapping, Optional, TypeVar
+
+import openai
+
+from instrumentation import NULL_INSTRUMENTATION, Instrumentation
+from tokenization import TiktokenTokenizer, Tokenizer
+
+from .schemas import ChatConversation
+
+RawResponseT = TypeVar("RawResponseT")
+
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APIConnectionError,
+    openai.APITimeoutError,
+    openai.InternalServerError,
+)
+
+_DURATION_PART = re.compile(r'(\d+(?:\.\d+)?)(ms|h|m|s)')
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_reset_duration(value: str | None) -> Optional[float]:
+    """
+    Parse an OpenAI reset duration such as "20ms", "1.5s" or "6m0s" into seconds.
+
+    Returns:
+        Number of seconds, or None if the value is missing or malformed
+    """
+    if not value:
+        return None
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(number) * _DURATION_UNITS[unit] for number, unit in parts)
+
+
+class TokenBucket:
+    """
+    Asynchronous token bucket refilled continuously at a constant rate.
+
+    Waiters are served in FIFO order, so a large request is not starved by
+    a stream of small ones.
+    """
+
+    def __init__(self, capacity: float, refill_per_second: float):
+        """
+        Args:
+            capacity: Maximum number of tokens the bucket can hold (the allowed burst)
+            refill_per_second: Number of tokens added per second
+        """
+        if capacity <= 0 or refill_per_second <= 0:
+            raise ValueError("capacity and refill_per_second must be positive")
+
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    @property
+    def available(self) -> float:
+        self._refill()
+        return self._tokens
+
+    async def acquire(self, amount: float) -> float:
+        """
+        Wait until `amount` tokens are available and take them.
+
+        Amounts larger than the capacity are capped to it, so they wait for a
+        full bucket instead of forever.
+
+        Returns:
+            Time spent waiting in seconds
+        """
+        amount = min(amount, self.capacity)
+        started = time.monotonic()
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._blocked_until:
+                    await asyncio.sleep(self._blocked_until - now)
+                    continue
+
+                self._refill()
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return time.monotonic() - started
+                await asyncio.sleep((amount - self._tokens) / self.refill_per_second)
+
+    def release(self, amount: float) -> None:
+        """Return tokens that were acquired but not used, e.g. when a request used fewer tokens than estimated."""
+        self._refill()
+        self._tokens = min(self._tokens + amount, self.capacity)
+
+    def sync(self, remaining: float | None, reset_seconds: float | None = None) -> None:
+        """
+        Align the bucket with the quota reported by the server.
+
+        The server's view also includes usage by other processes sharing the
+        same key, so the local balance is never allowed to exceed it.
+        """
+        if remaining is None:
+            return
+        self._refill()
+        self._tokens = min(self._tokens, remaining)
+        if remaining <= 0 and reset_seconds:
+            self.pause(reset_seconds)
+
+    def pause(self, seconds: float) -> None:
+        """Block all acquisitions for the given number of seconds."""
+        self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self._tokens + (now - self._updated) * self.refill_per_second, self.capacity)
+        self._updated = now
+
+
+class RateLimiter:
+    """
+    Scheduler enforcing requests-per-minute and tokens-per-minute budgets for OpenAI requests.
+
+    Each request is admitted once both budgets allow it, using a token estimate
+    of the prompt plus the expected completion. Budgets are corrected with the
+    x-ratelimit-* response headers and the actual token usage, and requests that
+    fail with a 429 or a transient error are retried with jittered exponential
+    backoff. A 429 pauses every pending request, not only the failing one.
+
+    The client's own retries should be disabled (AsyncOpenAI(max_retries=0)),
+    otherwise they run before the limiter sees the error.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: int,
+        tokens_per_minute: int,
+        tokenizer: Tokenizer | None = None,
+        completion_tokens: int = 256,
+        max_retries: int = 5,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+        instrumentation: Instrumentation | None = None,
+    ):
+        """
+        Args:
+            requests_per_minute: Request budget (RPM limit of the account or a share of it)
+            tokens_per_minute: Token budget (TPM limit of the account or a share of it)
+            tokenizer: Tokenizer used to estimate prompt tokens, TiktokenTokenizer by default
+            completion_tokens: Expected completion size added to every estimate
+            max_retries: Number of retries for rate-limited or transient failures
+            base_delay: Backoff delay in seconds before the first retry, doubled with every attempt
+            max_delay: Upper bound of a single backoff delay
+            instrumentation: Receives wait times and retry counters (disabled by default)
+        """
+        self.requests = TokenBucket(requests_per_minute, requests_per_minute / 60)
+        self.tokens = TokenBucket(tokens_per_minute, tokens_per_minute / 60)
+        self.tokenizer = tokenizer if tokenizer is not None else TiktokenTokenizer()
+        self.completion_tokens = completion_tokens
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.instrumentation = instrumentation if instrumentation is not None else NULL_INSTRUMENTATION
+
+    def estimate_tokens(self, messages: ChatConversation) -> int:
+        """Estimate prompt tokens of the conversation plus the expected completion."""
+        contents = [message.content for message in messages.messages]
+        return sum(self.tokenizer.count_tokens_batch(contents)) + self.completion_tokens
+
+    async def run(self, request: Callable[[], Awaitable[RawResponseT]], estimated_tokens: int) -> RawResponseT:
+        """
+        Execute a request within the budgets, retrying rate-limited and transient failures.
+
+        Args:
+            request: Coroutine factory performing the call and returning a raw response with headers
+                (e.g. client.chat.completions.with_raw_response.create)
+            estimated_tokens: Token cost reserved for the request, see estimate_tokens
+
+        Returns:
+            The raw response returned by the request
+        """
+        attempt = 0
+        while True:
+            waited = await self.requests.acquire(1)
+            waited += await self.tokens.acquire(estimated_tokens)
+            if self.instrumentation.enabled:
+                self.instrumentation.observe("llm.rate_limit_wait", waited)
+
+            try:
+                response = await request()
+            except RETRYABLE_ERRORS as error:
+                # A failed attempt used none of its reservation; keeping it would drain
+                # the bucket during a failure burst and throttle healthy requests.
+                self.settle(estimated_tokens, 0)
+                if attempt == self.max_retries:
+                    raise
+
+                headers = error.response.headers if getattr(error, "response", None) is not None else {}
+                retry_after = self._retry_after(headers)
+                delay = self._backoff(attempt, retry_after)
+                if isinstance(error, openai.RateLimitError):
+                    self.instrumentation.increment("llm.rate_limited")
+                    self.update_from_headers(headers)
+                    self.requests.pause(delay)
+                    self.tokens.pause(delay)
+                self.instrumentation.increment("llm.retries")
+                await asyncio.sleep(delay)
+                attempt += 1
+            else:
+                self.update_from_headers(response.headers)
+                return response
+
+    def settle(self, estimated_tokens: int, used_tokens: int | None) -> None:
+        """Give back the part of the reservation a completed (or failed, used_tokens=0) request did not use."""
+        if used_tokens is not None and used_tokens < estimated_tokens:
+            self.tokens.release(estimated_tokens - used_tokens)
+
+    def update_from_headers(self, headers: Mapping[str, str]) -> None:
+        """Adapt the budgets to the x-ratelimit-* headers of a response."""
+        self.requests.sync(
+            self._number(headers.get("x-ratelimit-remaining-requests")),
+            parse_reset_duration(headers.get("x-ratelimit-reset-requests")),
+        )
+        self.tokens.sync(
+            self._number(headers.get("x-ratelimit-remaining-tokens")),
+            parse_reset_duration(headers.get("x-ratelimit-reset-tokens")),
+        )
+
+    def _backoff(self, attempt: int, retry_after: float | None) -> float:
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+    def _retry_after(self, headers: Mapping[str, str]) -> Optional[float]:
+        retry_after_ms = self._number(headers.get("retry-after-ms"))
+        if retry_after_ms is not None:
+            return retry_after_ms / 1000
+        return self._number(headers.get("retry-after"))
+
+    @staticmethod
+    def _number(value: str | None) -> Optional[float]:
+        try:
+            return float(value) if value is not None else None
+        except ValueError:
+            return None
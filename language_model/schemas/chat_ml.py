@@ -1,8 +1,12 @@
+import inspect
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, Literal, Optional
+from typing import Any, Callable, Dict, List, Literal, Optional
+
+from tokenization import TiktokenTokenizer, Tokenizer
 
 RoleType = Literal["system", "user", "assistant", "environment"]
 
+
 @dataclass(frozen=True)
 class ChatMessage:
     role: RoleType
@@ -18,9 +22,73 @@ class ChatMessage:
 
         return result
 
+    def __getstate__(self) -> Dict[str, Any]:
+        # Cached payload and token count are not part of the message's state.
+        return {key: value for key, value in self.__dict__.items() if not key.startswith("_")}
+
+    def to_openai_dict(self) -> Dict[str, Any]:
+        """
+        A new to_dict() of the message.
+
+        The dict is built once and cached on the (immutable) instance; every
+        call returns a shallow copy of it, so callers may modify the result.
+        """
+        payload = self.__dict__.get("_payload")
+        if payload is None:
+            payload = self.to_dict()
+            object.__setattr__(self, "_payload", payload)
+        return dict(payload)
+
+    def count_tokens(self, tokenizer: Tokenizer) -> int:
+        """
+        Number of tokens of the message, cached on the instance for the last tokenizer used.
+
+        The message is immutable, so the count stays valid for its lifetime;
+        counting with a different tokenizer replaces the cached value.
+        """
+        cached = self.__dict__.get("_tokens")
+        if cached is None or cached[0] is not tokenizer:
+            cached = (tokenizer, tokenizer.count_tokens(self.content))
+            object.__setattr__(self, "_tokens", cached)
+        return cached[1]
+
 @dataclass
 class ChatConversation:
+    """
+    Conversation history in ChatML format.
+
+    With token_budget set the conversation keeps a running token total and,
+    once it exceeds the budget, drops the oldest turns (leading system messages
+    are kept) until it is below token_budget * trim_ratio. Trimming past the
+    budget instead of to it means it happens rarely and in one step, so
+    appending stays O(1) amortized. If a summarizer is given, the dropped turns
+    are replaced with a system message containing their summary.
+
+    Trimming happens while a message is added, so the summarizer is called
+    synchronously and cannot be a coroutine function; to summarize with an async
+    LLMCall, leave summarizer unset and summarize the oldest turns before adding
+    messages.
+    """
     messages: List[ChatMessage] = field(default_factory=list)
+    token_budget: Optional[int] = None
+    tokenizer: Optional[Tokenizer] = field(default=None, repr=False, compare=False)
+    summarizer: Optional[Callable[[List[ChatMessage]], str]] = field(default=None, repr=False, compare=False)
+    trim_ratio: float = 0.75
+    _total_tokens: int = field(default=0, init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        if inspect.iscoroutinefunction(self.summarizer):
+            raise TypeError("summarizer must be a synchronous function, got a coroutine function")
+        if self.token_budget is not None:
+            if self.tokenizer is None:
+                self.tokenizer = TiktokenTokenizer()
+            self._total_tokens = sum(message.count_tokens(self.tokenizer) for message in self.messages)
+            self._trim()
+
+    @property
+    def total_tokens(self) -> int:
+        """Token count of all messages, tracked only when token_budget is set."""
+        return self._total_tokens
 
     def add_system_message(self, content: str) -> None:
         self._add_message(role="system", content=content, name=None, metadata=None)
@@ -41,16 +109,53 @@ class ChatConversation:
         name: Optional[str] = None,
         metadata: Optional[Dict[str, Any]] = None,
     ) -> None:
-        self.messages.append(
-            ChatMessage(
-                role=role,
-                content=content,
-                name=name,
-                metadata=metadata,
-            )
+        message = ChatMessage(
+            role=role,
+            content=content,
+            name=name,
+            metadata=metadata,
         )
+        self.messages.append(message)
+
+        if self.token_budget is not None:
+            self._total_tokens += message.count_tokens(self.tokenizer)
+            if self._total_tokens > self.token_budget:
+                self._trim()
+
+    def _trim(self) -> None:
+        if self.token_budget is None or self._total_tokens <= self.token_budget:
+            return
+
+        pinned = 0
+        while pinned < len(self.messages) and self.messages[pinned].role == "system":
+            pinned += 1
+        if self.summarizer is not None and pinned > 0 and self.messages[pinned - 1].metadata == {"summary": True}:
+            pinned -= 1
+
+        target = self.token_budget * self.trim_ratio
+        end = pinned
+        total = self._total_tokens
+        while end < len(self.messages) - 1 and total > target:
+            total -= self.messages[end].count_tokens(self.tokenizer)
+            end += 1
+
+        if end == pinned:
+            return
+
+        replacement = []
+        if self.summarizer is not None:
+            summary = ChatMessage(role="system", content=self.summarizer(self.messages[pinned:end]), metadata={"summary": True})
+            total += summary.count_tokens(self.tokenizer)
+            replacement.append(summary)
+
+        self.messages[pinned:end] = replacement
+        self._total_tokens = total
 
-    
     def to_openai_format(self) -> list:
-        return [message.to_dict() for message in self.messages]
+        """
+        Messages in the OpenAI API format.
 
+        The list and its dicts are new on every call and always reflect the
+        current messages; the dicts are copied from ones cached on each message.
+        """
+        return [message.to_openai_dict() for message in self.messages]
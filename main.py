@@ -4,21 +4,21 @@ from pathlib import Path
 from document.context_generator import LLMContextGenerator
 from document.splitter import TextSplitter
 from language_model import OpenAILLMCall
-from openai_client import get_client
+from openai_client import client_lifespan, get_client
 
 
 async def main():
-    llm_call = OpenAILLMCall(
-        client=get_client(with_observability=True)
-    )
-    splitter = TextSplitter(context_generator=LLMContextGenerator(llm_call))
-    article = Path() / 'example.md'
+    async with client_lifespan():
+        llm_call = OpenAILLMCall(
+            client=get_client(with_observability=True)
+        )
+        splitter = TextSplitter(context_generator=LLMContextGenerator(llm_call), max_concurrency=8, max_retries=2)
+        article = Path() / 'example.md'
 
-    docs = await splitter.split(article.read_text(), limit=300)
-    for doc in docs:
-        print(doc)
-        print("context")
-        print(doc.metadata.context)
+        async for doc in splitter.split_stream(article, limit=300):
+            print(doc)
+            print("context")
+            print(doc.metadata.context)
 
 
 if __name__ == "__main__":
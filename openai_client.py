@@ -1,17 +1,101 @@
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, Tuple
+
+import httpx
 from openai import AsyncOpenAI
-from langfuse.openai import AsyncOpenAI as LangfuseOpenAI
-from langfuse.openai import openai
 
-from settings import settings
+from settings import get_settings
+
+
+@dataclass(frozen=True)
+class ClientConfig:
+    """
+    Connection settings of a shared client.
+
+    Attributes:
+        max_connections: Maximum number of concurrent connections in the pool
+        max_keepalive_connections: Number of idle connections kept open for reuse
+        keepalive_expiry: Seconds an idle connection is kept open
+        http2: Use HTTP/2 (h2 package from the httpx[http2] extra), multiplexing requests over fewer connections
+        connect_timeout: Seconds to wait for a connection to be established
+        read_timeout: Seconds to wait for response data
+        max_retries: Retries performed by the OpenAI client itself
+    """
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 30.0
+    http2: bool = False
+    connect_timeout: float = 5.0
+    read_timeout: float = 60.0
+    max_retries: int = 2
+
+
+_clients: Dict[Tuple[bool, ClientConfig], AsyncOpenAI] = {}
+
+
+def get_client(with_observability: bool = False, config: ClientConfig | None = None) -> AsyncOpenAI:
+    """
+    Return the shared client for the given configuration, creating it on first use.
+
+    Clients keep a pool of warm connections, so they should be closed with
+    close_clients() (or by using client_lifespan()) before the event loop ends.
+    """
+    config = config or ClientConfig()
+    key = (with_observability, config)
+    if key not in _clients:
+        _clients[key] = _create_client(with_observability, config)
+    return _clients[key]
+
+
+async def close_clients() -> None:
+    """Close every shared client and its connection pool."""
+    clients = list(_clients.values())
+    _clients.clear()
+    for client in clients:
+        await client.close()
+
+
+@asynccontextmanager
+async def client_lifespan() -> AsyncIterator[None]:
+    """
+    Close every shared client when the block exits.
+
+    This includes clients created before the block was entered, since
+    close_clients() closes all of them.
+    """
+    try:
+        yield
+    finally:
+        await close_clients()
+
+
+def _create_client(with_observability: bool, config: ClientConfig) -> AsyncOpenAI:
+    timeout = httpx.Timeout(config.read_timeout, connect=config.connect_timeout)
+    http_client = httpx.AsyncClient(
+        http2=config.http2,
+        timeout=timeout,
+        limits=httpx.Limits(
+            max_connections=config.max_connections,
+            max_keepalive_connections=config.max_keepalive_connections,
+            keepalive_expiry=config.keepalive_expiry,
+        ),
+    )
+    settings = get_settings()
+    options = dict(
+        api_key=settings.llm_settings.api_key,
+        http_client=http_client,
+        timeout=timeout,
+        max_retries=config.max_retries,
+    )
 
-def get_client(with_observability: bool = False) -> AsyncOpenAI:
- 
     if with_observability:
+        from langfuse.openai import AsyncOpenAI as LangfuseOpenAI
+        from langfuse.openai import openai
+
         openai.langfuse_public_key = settings.observability_settings.public_key
         openai.langfuse_secret_key = settings.observability_settings.secret_key
         openai.langfuse_host = settings.observability_settings.host
-        return LangfuseOpenAI(api_key=settings.llm_settings.api_key)
+        return LangfuseOpenAI(**options)
 
-    return AsyncOpenAI(
-        api_key=settings.llm_settings.api_key
-    )
\ No newline at end of file
+    return AsyncOpenAI(**options)
@@ -0,0 +1,5 @@
+from .bm25 import BM25Index
+from .embedding_stage import EmbeddingStage
+from .vector_index import IVFIndex, VectorIndex
+
+__all__ = ["BM25Index", "EmbeddingStage", "VectorIndex", "IVFIndex"]
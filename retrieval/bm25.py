@@ -0,0 +1,267 @@
+import io
+import json
+import math
+import re
+from array import array
+from collections import Counter
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from document.schemas import Document
+
+Analyzer = Callable[[str], List[str]]
+
+_WORD_PATTERN = re.compile(r'\w+')
+_PLACEHOLDER_PATTERN = re.compile(r'\{\{\$(?:url|img)\d+\}\}')
+_MAX_TERM_FREQUENCY = 65535
+
+
+def analyze(text: str) -> List[str]:
+    """Default analyzer: lowercased words, without the url/image placeholders of split chunks."""
+    return _WORD_PATTERN.findall(_PLACEHOLDER_PATTERN.sub(" ", text).lower())
+
+
+def index_text(document: Document) -> str:
+    """Text indexed for a chunk: header path, generated context and the chunk itself."""
+    headers = document.metadata.headers
+    path = " ".join(title for key in sorted(headers) for title in headers[key])
+    return "\n".join(part for part in (path, document.metadata.context, document.text) if part)
+
+
+def _encode(value) -> np.ndarray:
+    return np.frombuffer(json.dumps(value).encode("utf-8"), dtype=np.uint8)
+
+
+def _decode(data: np.ndarray):
+    return json.loads(data.tobytes().decode("utf-8"))
+
+
+class BM25Index:
+    """
+    In-memory BM25 inverted index over split chunks.
+
+    Each term has a postings list of internal document numbers and term
+    frequencies kept in compact typed arrays (4 + 2 bytes per posting), and
+    the length normalization k1 * (1 - b + b * length / avgdl) is precomputed
+    for all documents and refreshed only after the index changes. A query
+    touches just the postings of its terms and scores them with vectorized
+    NumPy operations.
+
+    Removed documents are tombstoned and skipped when scoring; once they make
+    up more than compact_ratio of the index, postings are rewritten without them.
+    """
+    _DENSE_FRACTION = 8
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75, analyzer: Optional[Analyzer] = None, compact_ratio: float = 0.5):
+        """
+        Args:
+            k1: Term frequency saturation
+            b: Strength of the document length normalization
+            analyzer: Function splitting text into terms, analyze() by default
+            compact_ratio: Fraction of removed documents that triggers compact()
+        """
+        self.k1 = k1
+        self.b = b
+        self.analyzer = analyzer if analyzer is not None else analyze
+        self.compact_ratio = compact_ratio
+
+        self._terms: Dict[str, int] = {}
+        self._postings_docs: List[array] = []
+        self._postings_tfs: List[array] = []
+        self._lengths = array("i")
+        self._alive = bytearray()
+        self._ids: List[Optional[str]] = []
+        self._positions: Dict[str, int] = {}
+        self._norms: Optional[np.ndarray] = None
+        self._next_id = 0
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def __contains__(self, id: str) -> bool:
+        return id in self._positions
+
+    def add(self, id: str, text: str) -> None:
+        """
+        Index text under the given id, replacing the previous text of that id.
+        """
+        if id in self._positions:
+            self.remove(id)
+
+        doc = len(self._ids)
+        frequencies = Counter(self.analyzer(text))
+        for term, frequency in frequencies.items():
+            term_id = self._terms.get(term)
+            if term_id is None:
+                term_id = self._terms[term] = len(self._postings_docs)
+                self._postings_docs.append(array("i"))
+                self._postings_tfs.append(array("H"))
+            self._postings_docs[term_id].append(doc)
+            self._postings_tfs[term_id].append(min(frequency, _MAX_TERM_FREQUENCY))
+
+        self._lengths.append(sum(frequencies.values()))
+        self._alive.append(1)
+        self._ids.append(id)
+        self._positions[id] = doc
+        self._norms = None
+
+    def add_documents(self, documents: List[Document], ids: Optional[Sequence[str]] = None) -> List[str]:
+        """
+        Index chunks returned by TextSplitter.split().
+
+        Args:
+            documents: Chunks to index
+            ids: Ids of the chunks; by default numbers from a counter of the index that
+                never reuses an id, even after remove() and compact()
+
+        Returns:
+            Ids of the added chunks
+        """
+        ids = list(ids) if ids is not None else [self._new_id() for _ in documents]
+        for id, document in zip(ids, documents):
+            self.add(id, index_text(document))
+        return ids
+
+    def remove(self, id: str) -> None:
+        """
+        Remove a document from the index.
+
+        Raises:
+            KeyError: If the id is not indexed
+        """
+        doc = self._positions.pop(id)
+        self._alive[doc] = 0
+        self._ids[doc] = None
+        self._norms = None
+        if len(self._ids) - len(self._positions) > self.compact_ratio * len(self._ids):
+            self.compact()
+
+    def search(self, query: str, k: int = 10) -> List[Tuple[str, float]]:
+        """
+        Find the k documents with the highest BM25 score for the query.
+
+        Returns:
+            (id, score) pairs, highest score first; documents matching no query term are omitted
+        """
+        term_ids = [self._terms[term] for term in set(self.analyzer(query)) if term in self._terms]
+        if not term_ids or not self._positions:
+            return []
+
+        norms = self._get_norms()
+        alive = np.frombuffer(self._alive, dtype=np.uint8).view(bool)
+        count = len(self._positions)
+        removed = count < len(self._ids)
+        scores = np.zeros(len(self._ids), dtype=np.float32)
+        k1 = np.float32(self.k1 + 1)
+
+        postings = []
+        for term_id in term_ids:
+            docs = np.frombuffer(self._postings_docs[term_id], dtype=np.intc)
+            frequencies = np.frombuffer(self._postings_tfs[term_id], dtype=np.uint16).astype(np.float32)
+            df = int(np.count_nonzero(alive[docs])) if removed else len(docs)
+            if not df:
+                continue
+            idf = np.float32(math.log(1 + (count - df + 0.5) / (df + 0.5)))
+            scores[docs] += idf * frequencies * k1 / (frequencies + norms[docs])
+            postings.append(docs)
+
+        if removed:
+            np.multiply(scores, alive, out=scores)
+        if not postings:
+            return []
+
+        if sum(len(docs) for docs in postings) * self._DENSE_FRACTION < len(scores):
+            # Few matches: rank only the matched documents instead of the whole, mostly zero, score array.
+            # A document occurs once per query term, so the best k * len(postings) entries hold k distinct ones.
+            candidates = np.concatenate(postings)
+            limit = k * len(postings)
+            if limit < len(candidates):
+                candidates = candidates[np.argpartition(scores[candidates], -limit)[-limit:]]
+        elif k < len(scores):
+            candidates = np.argpartition(scores, -k)[-k:]
+        else:
+            candidates = np.arange(len(scores))
+
+        best = dict.fromkeys(candidates[np.argsort(-scores[candidates], kind="stable")].tolist())
+        return [(self._ids[doc], float(scores[doc])) for doc in best if scores[doc] > 0][:k]
+
+    def compact(self) -> None:
+        """Rewrite postings without removed documents and renumber the remaining ones."""
+        alive = np.frombuffer(self._alive, dtype=np.uint8).view(bool)
+        if alive.all():
+            return
+
+        renumber = np.cumsum(alive, dtype=np.intc) - 1
+        for term_id, (docs, frequencies) in enumerate(zip(self._postings_docs, self._postings_tfs)):
+            docs = np.frombuffer(docs, dtype=np.intc)
+            kept = alive[docs]
+            self._postings_docs[term_id] = array("i", renumber[docs[kept]].tobytes())
+            self._postings_tfs[term_id] = array("H", np.frombuffer(frequencies, dtype=np.uint16)[kept].tobytes())
+
+        self._lengths = array("i", np.frombuffer(self._lengths, dtype=np.intc)[alive].tobytes())
+        self._ids = [id for id in self._ids if id is not None]
+        self._positions = {id: doc for doc, id in enumerate(self._ids)}
+        self._alive = bytearray(b"\x01" * len(self._ids))
+        self._norms = None
+
+    def save(self, path: Union[str, Path]) -> None:
+        """Compact the index and save it into a single .npz file."""
+        self.compact()
+        offsets = np.zeros(len(self._postings_docs) + 1, dtype=np.int64)
+        np.cumsum([len(docs) for docs in self._postings_docs], out=offsets[1:])
+
+        buffer = io.BytesIO()
+        np.savez(
+            buffer,
+            params=_encode({"k1": self.k1, "b": self.b, "next_id": self._next_id}),
+            terms=_encode(list(self._terms)),
+            ids=_encode(self._ids),
+            offsets=offsets,
+            docs=np.frombuffer(b"".join(docs.tobytes() for docs in self._postings_docs), dtype=np.intc),
+            frequencies=np.frombuffer(b"".join(tfs.tobytes() for tfs in self._postings_tfs), dtype=np.uint16),
+            lengths=np.frombuffer(self._lengths, dtype=np.intc),
+        )
+        Path(path).write_bytes(buffer.getbuffer())
+
+    @classmethod
+    def load(cls, path: Union[str, Path], analyzer: Optional[Analyzer] = None) -> "BM25Index":
+        """
+        Load an index saved with save().
+
+        Args:
+            path: File written by save()
+            analyzer: Analyzer used when the index was built, analyze() by default
+        """
+        with np.load(path, allow_pickle=False) as data:
+            params = _decode(data["params"])
+            index = cls(k1=params["k1"], b=params["b"], analyzer=analyzer)
+            terms = _decode(data["terms"])
+            offsets, docs, frequencies = data["offsets"], data["docs"], data["frequencies"]
+
+            index._terms = {term: term_id for term_id, term in enumerate(terms)}
+            index._postings_docs = [array("i", docs[offsets[i]:offsets[i + 1]].tobytes()) for i in range(len(terms))]
+            index._postings_tfs = [array("H", frequencies[offsets[i]:offsets[i + 1]].tobytes()) for i in range(len(terms))]
+            index._lengths = array("i", data["lengths"].tobytes())
+            index._ids = _decode(data["ids"])
+
+        index._positions = {id: doc for doc, id in enumerate(index._ids)}
+        index._alive = bytearray(b"\x01" * len(index._ids))
+        index._next_id = params.get("next_id", len(index._ids))
+        return index
+
+    def _new_id(self) -> str:
+        while str(self._next_id) in self._positions:
+            self._next_id += 1
+        id = str(self._next_id)
+        self._next_id += 1
+        return id
+
+    def _get_norms(self) -> np.ndarray:
+        if self._norms is None:
+            lengths = np.frombuffer(self._lengths, dtype=np.intc).astype(np.float32)
+            alive = np.frombuffer(self._alive, dtype=np.uint8).view(bool)
+            average = lengths[alive].mean() if alive.any() else 1.0
+            self._norms = (self.k1 * (1 - self.b + self.b * lengths / max(average, 1e-9))).astype(np.float32)
+        return self._norms
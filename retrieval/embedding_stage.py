@@ -0,0 +1,53 @@
+from typing import List, Optional, Sequence, Tuple
+
+from document.schemas import Document
+from language_model.embedding import Embedder
+
+from .vector_index import VectorIndex
+
+
+def embedding_text(document: Document) -> str:
+    """Text embedded for a chunk: the generated context followed by the chunk itself."""
+    context = document.metadata.context
+    return f"{context}\n\n{document.text}" if context else document.text
+
+
+class EmbeddingStage:
+    """
+    Pipeline stage run after TextSplitter: embeds contextualized chunks and stores them in a VectorIndex.
+    """
+
+    def __init__(self, embedder: Embedder, index: Optional[VectorIndex] = None):
+        """
+        Args:
+            embedder: Embedder producing the chunk and query vectors
+            index: Index receiving the vectors, a new VectorIndex by default
+        """
+        self.embedder = embedder
+        self.index = index if index is not None else VectorIndex(embedder.dimensions)
+
+    async def add_documents(self, documents: List[Document], ids: Optional[Sequence[str]] = None) -> List[str]:
+        """
+        Embed documents and add them to the index.
+
+        Args:
+            documents: Chunks returned by TextSplitter.split()
+            ids: Ids of the chunks, consecutive positions in the index by default
+
+        Returns:
+            Ids of the added chunks
+        """
+        if ids is None:
+            ids = [str(len(self.index) + i) for i in range(len(documents))]
+        ids = list(ids)
+        if not documents:
+            return ids
+
+        vectors = await self.embedder.embed([embedding_text(document) for document in documents])
+        self.index.add(vectors, ids)
+        return ids
+
+    async def search(self, query: str, k: int = 10) -> List[Tuple[str, float]]:
+        """Embed the query and return the k most similar (id, score) pairs."""
+        vectors = await self.embedder.embed([query])
+        return self.index.search(vectors[0], k)
@@ -0,0 +1,186 @@
+import json
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+VECTORS_FILE = "vectors.npy"
+IDS_FILE = "ids.json"
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first."""
+    if k >= len(scores):
+        return np.argsort(-scores)
+    candidates = np.argpartition(-scores, k)[:k]
+    return candidates[np.argsort(-scores[candidates])]
+
+
+class VectorIndex:
+    """
+    Exact cosine similarity index over a float32 matrix.
+
+    Vectors are normalized on insertion, so a search is a single matrix-vector
+    product followed by a partial sort. The matrix grows by doubling its
+    capacity, and a saved index can be loaded memory-mapped, so large indexes
+    are paged in by the OS instead of being read into memory.
+    """
+
+    def __init__(self, dimensions: int, capacity: int = 1024):
+        """
+        Args:
+            dimensions: Length of the stored vectors
+            capacity: Initial number of rows allocated
+        """
+        self.dimensions = dimensions
+        self._vectors = np.empty((capacity, dimensions), dtype=np.float32)
+        self._size = 0
+        self.ids: List[str] = []
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def vectors(self) -> np.ndarray:
+        """Normalized vectors of the index, one row per id."""
+        return self._vectors[:self._size]
+
+    def add(self, vectors: np.ndarray, ids: Sequence[str]) -> None:
+        """
+        Add vectors with their ids.
+
+        Raises:
+            ValueError: If the number of vectors and ids differ or the dimensions do not match
+        """
+        vectors = np.atleast_2d(vectors)
+        if len(vectors) != len(ids):
+            raise ValueError("Number of vectors and ids must be equal")
+        if vectors.shape[1] != self.dimensions:
+            raise ValueError(f"Expected vectors of dimension {self.dimensions}, got {vectors.shape[1]}")
+
+        required = self._size + len(vectors)
+        if required > len(self._vectors) or not self._vectors.flags.writeable:
+            capacity = max(required, 2 * len(self._vectors), 1)
+            grown = np.empty((capacity, self.dimensions), dtype=np.float32)
+            grown[:self._size] = self._vectors[:self._size]
+            self._vectors = grown
+
+        self._vectors[self._size:required] = _normalize(vectors)
+        self._size = required
+        self.ids.extend(ids)
+
+    def search(self, query: np.ndarray, k: int = 10) -> List[Tuple[str, float]]:
+        """
+        Find the k vectors most similar to the query.
+
+        Returns:
+            (id, cosine similarity) pairs, most similar first
+        """
+        return self.search_batch(np.atleast_2d(query), k)[0]
+
+    def search_batch(self, queries: np.ndarray, k: int = 10) -> List[List[Tuple[str, float]]]:
+        """Search several queries with one matrix product."""
+        scores = self.vectors @ _normalize(queries).T
+        return [
+            [(self.ids[row], float(column[row])) for row in _top_k(column, k)]
+            for column in scores.T
+        ]
+
+    def save(self, path: Union[str, Path]) -> None:
+        """Save the index into a directory (vectors as .npy, ids as JSON)."""
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        np.save(path / VECTORS_FILE, self.vectors)
+        (path / IDS_FILE).write_text(json.dumps(self.ids), encoding="utf-8")
+
+    @classmethod
+    def load(cls, path: Union[str, Path], mmap: bool = True) -> "VectorIndex":
+        """
+        Load an index saved with save().
+
+        Args:
+            path: Directory of the saved index
+            mmap: Memory-map the vectors read-only instead of reading them into memory;
+                adding to a memory-mapped index copies it into memory first
+        """
+        path = Path(path)
+        vectors = np.load(path / VECTORS_FILE, mmap_mode="r" if mmap else None)
+        index = cls(vectors.shape[1], capacity=0)
+        index._vectors = vectors
+        index._size = len(vectors)
+        index.ids = json.loads((path / IDS_FILE).read_text(encoding="utf-8"))
+        return index
+
+
+class IVFIndex:
+    """
+    Approximate cosine search over a VectorIndex with an inverted file of k-means clusters.
+
+    Vectors are partitioned around n_lists centroids; a query is compared only
+    with the vectors of its n_probe nearest clusters, trading some recall for
+    searching a fraction of the corpus.
+
+    Vectors added to the underlying index after the clusters were built are not
+    assigned to any cluster; every search compares the query with all of them
+    exactly. Build a new IVFIndex once this tail (see `unassigned`) grows large.
+    """
+
+    def __init__(self, index: VectorIndex, n_lists: Optional[int] = None, n_probe: int = 8, iterations: int = 10, seed: int = 0):
+        """
+        Args:
+            index: Exact index whose vectors are partitioned
+            n_lists: Number of clusters, sqrt(len(index)) by default
+            n_probe: Number of nearest clusters searched per query
+            iterations: k-means iterations
+            seed: Random seed of the centroid initialization
+        """
+        self.index = index
+        self.n_probe = n_probe
+        vectors = index.vectors
+        n_lists = min(n_lists or max(int(np.sqrt(len(vectors))), 1), len(vectors))
+
+        rng = np.random.default_rng(seed)
+        self.centroids = vectors[rng.choice(len(vectors), n_lists, replace=False)].copy()
+        for _ in range(iterations):
+            assignment = self._assign(vectors)
+            for cluster in range(n_lists):
+                members = vectors[assignment == cluster]
+                if len(members):
+                    self.centroids[cluster] = _normalize(members.mean(axis=0))
+
+        assignment = self._assign(vectors)
+        order = np.argsort(assignment, kind="stable")
+        self._members = order.astype(np.int64)
+        self._offsets = np.searchsorted(assignment[order], np.arange(n_lists + 1))
+        self._assigned = len(vectors)
+
+    @property
+    def unassigned(self) -> int:
+        """Number of vectors added to the index after the clusters were built."""
+        return len(self.index) - self._assigned
+
+    def search(self, query: np.ndarray, k: int = 10) -> List[Tuple[str, float]]:
+        """Approximate top-k search; returns (id, cosine similarity) pairs, most similar first."""
+        query = _normalize(np.asarray(query).reshape(-1))
+        clusters = _top_k(self.centroids @ query, self.n_probe)
+        candidates = np.concatenate(
+            [self._members[self._offsets[c]:self._offsets[c + 1]] for c in clusters]
+            + [np.arange(self._assigned, len(self.index), dtype=np.int64)]
+        )
+        if not len(candidates):
+            return []
+
+        scores = self.index.vectors[candidates] @ query
+        return [(self.index.ids[candidates[row]], float(scores[row])) for row in _top_k(scores, k)]
+
+    def _assign(self, vectors: np.ndarray, block: int = 65536) -> np.ndarray:
+        return np.concatenate([
+            np.argmax(vectors[start:start + block] @ self.centroids.T, axis=1)
+            for start in range(0, len(vectors), block)
+        ]) if len(vectors) else np.empty(0, dtype=np.int64)
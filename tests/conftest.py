@@ -0,0 +1,36 @@
+import itertools
+import sys
+from pathlib import Path
+
+import pytest
+import tiktoken
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tokenization import TiktokenTokenizer  # noqa: E402
+
+# Pre-tokenization pattern of o200k_base; the merge table is a small local one,
+# so the tests do not download BPE files.
+_PATTERN = (
+    r"""[^\r\n\p{L}\p{N}]?[\p{Lu}\p{Lt}\p{Lm}\p{Lo}\p{M}]*[\p{Ll}\p{Lm}\p{Lo}\p{M}]+"""
+    r"""|[^\r\n\p{L}\p{N}]?[\p{Lu}\p{Lt}\p{Lm}\p{Lo}\p{M}]+[\p{Ll}\p{Lm}\p{Lo}\p{M}]*"""
+    r"""|\p{N}{1,3}| ?[^\s\p{L}\p{N}]+[\r\n/]*|\s*[\r\n]+|\s+(?!\S)|\s+"""
+)
+
+
+def _encoding() -> tiktoken.Encoding:
+    ranks = {bytes([byte]): byte for byte in range(256)}
+    letters = b"etaoinshrdlu "
+    for first, second in itertools.product(letters, letters):
+        ranks[bytes([first, second])] = len(ranks)
+    return tiktoken.Encoding("test", pat_str=_PATTERN, mergeable_ranks=ranks, special_tokens={})
+
+
+ENCODING = _encoding()
+
+
+@pytest.fixture
+def tokenizer() -> TiktokenTokenizer:
+    tokenizer = TiktokenTokenizer()
+    tokenizer.tokenizer = ENCODING
+    return tokenizer
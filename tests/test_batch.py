@@ -0,0 +1,137 @@
+import asyncio
+import itertools
+import json
+from types import SimpleNamespace
+from typing import List, Optional
+
+import pytest
+from pydantic import BaseModel
+
+from language_model.batch import OpenAIBatchLLMCall, response_format
+from language_model.schemas import ChatConversation
+
+
+class _Files:
+    def __init__(self):
+        self.contents = {}
+        self._ids = itertools.count()
+
+    async def create(self, file, purpose):
+        _, content = file
+        file_id = f"file-{next(self._ids)}"
+        self.contents[file_id] = content.decode()
+        return SimpleNamespace(id=file_id)
+
+    async def content(self, file_id):
+        return SimpleNamespace(text=self.contents[file_id])
+
+
+class _Batches:
+    """Completes every job immediately, answering each request with the user message echoed as JSON."""
+
+    def __init__(self, files: _Files):
+        self.files = files
+        self.inputs: List[List[dict]] = []
+        self._batches = {}
+
+    async def create(self, input_file_id, endpoint, completion_window):
+        requests = [json.loads(line) for line in self.files.contents[input_file_id].splitlines()]
+        self.inputs.append(requests)
+        output = "\n".join(json.dumps({
+            "custom_id": request["custom_id"],
+            "response": {"status_code": 200, "body": {"choices": [{"message": {
+                "content": json.dumps({"answer": request["body"]["messages"][-1]["content"], "tags": []}),
+            }}]}},
+        }) for request in requests)
+        output_file = await self.files.create(file=("output.jsonl", output.encode()), purpose="batch_output")
+        batch = SimpleNamespace(id=f"batch-{len(self.inputs)}", status="completed", output_file_id=output_file.id, error_file_id=None)
+        self._batches[batch.id] = batch
+        return batch
+
+    async def retrieve(self, batch_id):
+        return self._batches[batch_id]
+
+
+class _FakeBatchClient:
+    def __init__(self):
+        self.files = _Files()
+        self.batches = _Batches(self.files)
+
+
+class _Tag(BaseModel):
+    name: str
+    weight: Optional[float] = None
+
+
+class _Answer(BaseModel):
+    answer: str
+    tags: List[_Tag]
+
+
+def _conversation(text: str) -> ChatConversation:
+    conversation = ChatConversation()
+    conversation.add_user_message(text)
+    return conversation
+
+
+def test_response_format_is_strict_json_schema():
+    schema = response_format(_Answer)["json_schema"]["schema"]
+
+    assert response_format(_Answer)["json_schema"]["strict"] is True
+    assert schema["additionalProperties"] is False
+    assert schema["required"] == ["answer", "tags"]
+    tag = schema["$defs"]["_Tag"]
+    assert tag["additionalProperties"] is False
+    assert tag["required"] == ["name", "weight"]
+    assert "default" not in tag["properties"]["weight"]
+
+
+def test_batch_call_resolves_every_request():
+    async def run():
+        client = _FakeBatchClient()
+        call = OpenAIBatchLLMCall(client, flush_interval=0.01, poll_interval=0.01)
+        answers = await asyncio.gather(*(
+            call.generate_structured_output(_conversation(f"question {index}"), _Answer) for index in range(5)
+        ))
+        return client, answers
+
+    client, answers = asyncio.run(run())
+
+    assert [answer.answer for answer in answers] == [f"question {index}" for index in range(5)]
+    assert len(client.batches.inputs) == 1
+
+
+def test_batch_call_splits_jobs_by_input_file_size():
+    async def run():
+        client = _FakeBatchClient()
+        line_size = len(json.dumps({
+            "custom_id": "request-0", "method": "POST", "url": "/v1/chat/completions",
+            "body": {
+                "model": "gpt-4o-mini", "messages": _conversation("question 0").to_openai_format(),
+                "temperature": 0.7, "response_format": response_format(_Answer),
+            },
+        })) + 1
+        call = OpenAIBatchLLMCall(client, max_file_bytes=2 * line_size + 10, flush_interval=0.01, poll_interval=0.01)
+        answers = await asyncio.gather(*(
+            call.generate_structured_output(_conversation(f"question {index}"), _Answer) for index in range(5)
+        ))
+        return client, answers
+
+    client, answers = asyncio.run(run())
+
+    assert [answer.answer for answer in answers] == [f"question {index}" for index in range(5)]
+    assert [len(requests) for requests in client.batches.inputs] == [2, 2, 1]
+
+
+def test_batch_call_rejects_request_larger_than_input_file():
+    async def run():
+        call = OpenAIBatchLLMCall(_FakeBatchClient(), max_file_bytes=100)
+        await call.generate_structured_output(_conversation("question"), _Answer)
+
+    with pytest.raises(ValueError):
+        asyncio.run(run())
+
+
+def test_batch_call_rejects_batch_size_over_api_limit():
+    with pytest.raises(ValueError):
+        OpenAIBatchLLMCall(_FakeBatchClient(), max_batch_size=50_001)
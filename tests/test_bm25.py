@@ -0,0 +1,81 @@
+from document.schemas import Document, DocumentMetadata
+from retrieval import BM25Index
+
+
+def _documents(count: int) -> list:
+    return [
+        Document(text=f"doc{index} shared words", metadata=DocumentMetadata(tokens=5, headers={}, urls=[], images=[]))
+        for index in range(count)
+    ]
+
+
+def test_search_ranks_matching_documents():
+    index = BM25Index()
+    index.add("a", "rockets launch into orbit")
+    index.add("b", "apples and oranges")
+    index.add("c", "rockets rockets rockets")
+
+    results = index.search("rockets")
+
+    assert [id_ for id_, _ in results] == ["c", "a"]
+    assert index.search("violin") == []
+
+
+def test_add_replaces_text_of_existing_id():
+    index = BM25Index()
+    index.add("a", "rockets")
+    index.add("a", "apples")
+
+    assert len(index) == 1
+    assert index.search("rockets") == []
+    assert [id_ for id_, _ in index.search("apples")] == ["a"]
+
+
+def test_remove_and_compact_keep_remaining_documents_searchable():
+    index = BM25Index(compact_ratio=1.0)
+    assert index.add_documents(_documents(6)) == [str(number) for number in range(6)]
+    index.remove("1")
+    index.remove("4")
+
+    assert "1" not in index and len(index) == 4
+    assert index.search("doc1") == []
+
+    index.compact()
+
+    assert [index.search(f"doc{number}")[0][0] for number in (0, 2, 3, 5)] == ["0", "2", "3", "5"]
+    assert sorted(id_ for id_, _ in index.search("shared")) == ["0", "2", "3", "5"]
+
+
+def test_default_ids_are_not_reused_after_compaction():
+    index = BM25Index()
+    index.add_documents(_documents(10))
+    for number in range(6):
+        index.remove(str(number))
+
+    added = index.add_documents(_documents(4))
+
+    assert added == ["10", "11", "12", "13"]
+    assert len(index) == 8
+    assert [id_ for id_, _ in index.search("doc6")][0] == "6"
+    assert [id_ for id_, _ in index.search("doc7")][0] == "7"
+
+
+def test_default_ids_skip_explicit_ids():
+    index = BM25Index()
+    index.add("0", "explicit")
+
+    assert index.add_documents(_documents(1)) == ["1"]
+
+
+def test_save_load_round_trip(tmp_path):
+    index = BM25Index(k1=1.5, b=0.5)
+    index.add_documents(_documents(5))
+    index.remove("2")
+    path = tmp_path / "bm25.npz"
+    index.save(path)
+
+    loaded = BM25Index.load(path)
+
+    assert (loaded.k1, loaded.b, len(loaded)) == (1.5, 0.5, 4)
+    assert loaded.search("shared doc3") == index.search("shared doc3")
+    assert loaded.add_documents(_documents(1)) == ["5"]
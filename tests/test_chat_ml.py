@@ -0,0 +1,116 @@
+import copy
+import json
+import pickle
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from language_model.schemas import ChatConversation, ChatMessage
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _conversation() -> ChatConversation:
+    conversation = ChatConversation()
+    conversation.add_system_message("system")
+    conversation.add_user_message("hello", name="alice")
+    return conversation
+
+
+def test_to_openai_format_returns_fresh_dicts():
+    conversation = _conversation()
+    payload = conversation.to_openai_format()
+
+    payload[0]["content"] = "changed"
+    payload[1]["tool_calls"] = []
+
+    assert conversation.to_openai_format() == [
+        {"role": "system", "content": "system"},
+        {"role": "user", "content": "hello", "name": "alice"},
+    ]
+    assert type(payload[0]) is dict
+    assert json.loads(json.dumps(conversation.to_openai_format())) == conversation.to_openai_format()
+
+
+def test_message_copies_do_not_carry_caches(tokenizer):
+    message = ChatMessage(role="user", content="hello")
+    message.to_openai_dict()
+    message.count_tokens(tokenizer)
+
+    for copied in (copy.deepcopy(message), pickle.loads(pickle.dumps(message))):
+        assert copied == message
+        assert "_payload" not in copied.__dict__ and "_tokens" not in copied.__dict__
+
+
+def test_to_openai_format_reflects_direct_message_changes():
+    conversation = _conversation()
+    conversation.to_openai_format()
+
+    conversation.messages[1] = ChatMessage(role="user", content="replaced")
+    conversation.to_openai_format().append({"role": "user", "content": "not stored"})
+
+    assert conversation.to_openai_format() == [
+        {"role": "system", "content": "system"},
+        {"role": "user", "content": "replaced"},
+    ]
+
+
+def test_message_token_count_is_cached_per_tokenizer(tokenizer):
+    class _Fixed:
+        def count_tokens(self, text: str) -> int:
+            return 1000
+
+    message = ChatMessage(role="user", content="hello world")
+
+    assert message.count_tokens(tokenizer) == tokenizer.count_tokens("hello world")
+    assert message.count_tokens(_Fixed()) == 1000
+    assert message.count_tokens(tokenizer) == tokenizer.count_tokens("hello world")
+
+
+def test_token_budget_trims_oldest_turns(tokenizer):
+    conversation = ChatConversation(token_budget=400, tokenizer=tokenizer)
+    conversation.add_system_message("system")
+    for index in range(10):
+        conversation.add_user_message(f"message {index}")
+
+    assert conversation.total_tokens <= 400
+    assert conversation.messages[0].role == "system"
+    assert conversation.to_openai_format()[-1] == {"role": "user", "content": "message 9"}
+    assert conversation.total_tokens == sum(message.count_tokens(tokenizer) for message in conversation.messages)
+
+
+def test_token_budget_replaces_dropped_turns_with_summary(tokenizer):
+    summarized = []
+
+    def summarizer(messages):
+        summarized.append([message.content for message in messages])
+        return "summary"
+
+    conversation = ChatConversation(token_budget=400, tokenizer=tokenizer, summarizer=summarizer)
+    conversation.add_system_message("system")
+    for index in range(10):
+        conversation.add_user_message(f"message {index}")
+
+    assert summarized and summarized[0][0] == "message 0"
+    assert conversation.messages[1].content == "summary" and conversation.messages[1].metadata == {"summary": True}
+    assert conversation.total_tokens <= 400
+
+
+def test_async_summarizer_is_rejected(tokenizer):
+    async def summarizer(messages):
+        return "summary"
+
+    with pytest.raises(TypeError, match="synchronous"):
+        ChatConversation(token_budget=400, tokenizer=tokenizer, summarizer=summarizer)
+
+
+def test_language_model_does_not_import_document():
+    code = (
+        "import sys, language_model.schemas, language_model.rate_limit, language_model.embedding; "
+        "print(any(name == 'document' or name.startswith('document.') for name in sys.modules))"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, cwd=ROOT, check=True)
+
+    assert result.stdout.strip() == "False"
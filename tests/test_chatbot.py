@@ -0,0 +1,84 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("gradio")
+
+from benchmarks.mock_llm import MockLLMCall
+from chatbot import GradioChatbotBuilder, llm_stream_handler
+from chatbot import builder as builder_module
+from instrumentation import InMemoryAggregator
+
+
+class _StreamingLLMCall(MockLLMCall):
+    def __init__(self, deltas: list):
+        super().__init__(latency=0.0)
+        self.deltas = deltas
+        self.conversations = []
+
+    async def generate_stream(self, messages, temperature=0.7):
+        self.conversations.append(messages)
+        for delta in self.deltas:
+            yield delta
+
+
+def _build(monkeypatch, handler, builder: GradioChatbotBuilder):
+    """Build the chat interface without launching it and return the function passed to Gradio."""
+    captured = {}
+
+    def interface(fn, **kwargs):
+        captured["fn"] = fn
+        return SimpleNamespace(queue=lambda **kwargs: SimpleNamespace(launch=lambda: None))
+
+    monkeypatch.setattr(builder_module.gr, "ChatInterface", interface)
+    builder.build(handler)
+    return captured["fn"]
+
+
+def _collect(handler, *args) -> list:
+    async def collect():
+        return [value async for value in handler(*args)]
+
+    return asyncio.run(collect())
+
+
+def test_llm_stream_handler_rebuilds_conversation_and_yields_deltas():
+    call = _StreamingLLMCall(["Hel", "lo"])
+    handler = llm_stream_handler(call, system_prompt="Be brief.")
+    history = [{"role": "user", "content": "Hi"}, {"role": "assistant", "content": "Hello!"}]
+
+    assert _collect(handler, "How are you?", history) == ["Hel", "lo"]
+    roles = [message.role for message in call.conversations[0].messages]
+    assert roles == ["system", "user", "assistant", "user"]
+    assert call.conversations[0].messages[-1].content == "How are you?"
+
+
+def test_builder_accumulates_deltas_of_llm_stream_handler(monkeypatch):
+    handler = llm_stream_handler(_StreamingLLMCall(["Hel", "lo", "!"]))
+
+    fn = _build(monkeypatch, handler, GradioChatbotBuilder(chat_interface_enabled=True))
+
+    assert _collect(fn, "Hi", []) == ["Hel", "Hello", "Hello!"]
+
+
+def test_builder_passes_accumulating_generators_unchanged(monkeypatch):
+    async def handler(message, history):
+        yield "Hel"
+        yield "Hello"
+
+    fn = _build(monkeypatch, handler, GradioChatbotBuilder(chat_interface_enabled=True))
+
+    assert fn is handler
+    assert _collect(fn, "Hi", []) == ["Hel", "Hello"]
+
+
+def test_builder_instruments_delta_streams(monkeypatch):
+    instrumentation = InMemoryAggregator()
+    handler = llm_stream_handler(_StreamingLLMCall(["a", "b", "c"]))
+    builder = GradioChatbotBuilder(chat_interface_enabled=True).with_instrumentation(instrumentation)
+
+    _collect(_build(monkeypatch, handler, builder), "Hi", [])
+
+    assert instrumentation.observations["chat.response_tokens"] == [3]
+    assert len(instrumentation.observations["chat.time_to_first_token"]) == 1
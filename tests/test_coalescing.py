@@ -0,0 +1,140 @@
+import asyncio
+
+from pydantic import BaseModel
+
+from language_model import CoalescingLLMCall, LLMCall
+from language_model.schemas import ChatConversation
+
+
+class _Answer(BaseModel):
+    answer: str
+
+
+class _GatedLLMCall(LLMCall):
+    """Counts requests and answers them once the gate is opened."""
+
+    def __init__(self, error: Exception | None = None):
+        self.error = error
+        self.requests = 0
+        self.cancelled = 0
+        self.gate: asyncio.Event | None = None
+
+    @property
+    def model_name(self) -> str:
+        return "gated"
+
+    async def generate_structured_output(self, messages, response_model, temperature=0.7, model_name=None):
+        self.requests += 1
+        try:
+            await self.gate.wait()
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.error is not None:
+            raise self.error
+        return response_model(answer=messages.messages[-1].content)
+
+    async def generate_stream(self, messages, temperature=0.7):
+        yield ""
+
+
+def _conversation(text: str = "question") -> ChatConversation:
+    conversation = ChatConversation()
+    conversation.add_user_message(text)
+    return conversation
+
+
+def _call(call: CoalescingLLMCall, text: str = "question"):
+    return asyncio.ensure_future(call.generate_structured_output(_conversation(text), _Answer, temperature=0.0))
+
+
+def test_identical_concurrent_requests_share_one_call():
+    backend = _GatedLLMCall()
+    call = CoalescingLLMCall(backend)
+
+    async def main():
+        backend.gate = asyncio.Event()
+        waiters = [_call(call) for _ in range(3)] + [_call(call, "other")]
+        await asyncio.sleep(0)
+        backend.gate.set()
+        return await asyncio.gather(*waiters)
+
+    responses = asyncio.run(main())
+
+    assert [response.answer for response in responses] == ["question", "question", "question", "other"]
+    assert backend.requests == 2
+    assert (call.stats.calls, call.stats.coalesced) == (4, 2)
+    assert len({id(response) for response in responses}) == 4
+    assert call._in_flight == {}
+
+
+def test_sampled_requests_are_not_coalesced():
+    backend = _GatedLLMCall()
+    call = CoalescingLLMCall(backend)
+
+    async def main():
+        backend.gate = asyncio.Event()
+        backend.gate.set()
+        return await asyncio.gather(*[call.generate_structured_output(_conversation(), _Answer, temperature=0.7) for _ in range(2)])
+
+    asyncio.run(main())
+
+    assert backend.requests == 2
+
+
+def test_error_reaches_every_waiter():
+    backend = _GatedLLMCall(error=ValueError("down"))
+    call = CoalescingLLMCall(backend)
+
+    async def main():
+        backend.gate = asyncio.Event()
+        waiters = [_call(call) for _ in range(3)]
+        await asyncio.sleep(0)
+        backend.gate.set()
+        return await asyncio.gather(*waiters, return_exceptions=True)
+
+    results = asyncio.run(main())
+
+    assert [type(result) for result in results] == [ValueError] * 3
+    assert backend.requests == 1
+    assert call._in_flight == {}
+
+
+def test_cancelling_one_waiter_keeps_shared_call_for_others():
+    backend = _GatedLLMCall()
+    call = CoalescingLLMCall(backend)
+
+    async def main():
+        backend.gate = asyncio.Event()
+        leader, follower = _call(call), _call(call)
+        await asyncio.sleep(0)
+        leader.cancel()
+        await asyncio.sleep(0)
+        backend.gate.set()
+        return leader, await follower
+
+    leader, response = asyncio.run(main())
+
+    assert leader.cancelled()
+    assert response.answer == "question"
+    assert (backend.requests, backend.cancelled) == (1, 0)
+    assert call._in_flight == {}
+
+
+def test_cancelling_every_waiter_cancels_shared_call():
+    backend = _GatedLLMCall()
+    call = CoalescingLLMCall(backend)
+
+    async def main():
+        backend.gate = asyncio.Event()
+        waiters = [_call(call) for _ in range(2)]
+        await asyncio.sleep(0)
+        for waiter in waiters:
+            waiter.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+        await asyncio.sleep(0)
+
+    asyncio.run(main())
+
+    assert backend.cancelled == 1
+    assert call._in_flight == {}
@@ -0,0 +1,51 @@
+from pathlib import Path
+
+import pytest
+
+from document.splitter import TextSplitter
+
+EXAMPLE = (Path(__file__).resolve().parent.parent / "example.md").read_text(encoding="utf-8")[:20000]
+
+LINKED = "".join(
+    f"# Part {index}\n\nSee [the docs](https://example.com/{index}) and ![diagram](img/{index}.png).\n\n"
+    f"## Details {index}\n\nPlain text without links.\n\n"
+    for index in range(20)
+)
+
+
+@pytest.mark.parametrize("text", [EXAMPLE, LINKED], ids=["example", "linked"])
+@pytest.mark.parametrize("limit", [150, 600])
+def test_chunk_compact_round_trips_to_chunk(tokenizer, text, limit):
+    splitter = TextSplitter(tokenizer=tokenizer)
+
+    store = splitter.chunk_compact(text, limit, batch_size=3)
+
+    assert [document.model_dump() for document in store.to_documents()] == [
+        document.model_dump() for document in splitter.chunk(text, limit)
+    ]
+
+
+def test_store_get_and_iteration(tokenizer):
+    splitter = TextSplitter(tokenizer=tokenizer)
+    store = splitter.chunk_compact(LINKED, 150)
+    spans = splitter.chunk_spans(LINKED, 150)
+
+    assert len(store) == len(spans)
+    assert [document.span for document in store] == spans
+    assert store[0].raw_text == LINKED[slice(*spans[0])]
+    assert store[0].text.startswith("# Part 0")
+    assert "{{$url0}}" in store[0].text and "https://example.com/0" in store[0].urls
+    documents = splitter.chunk(LINKED, 150)
+    assert (store[0].urls, store[0].images) == (documents[0].metadata.urls, documents[0].metadata.images)
+    assert store[len(store) - 1].headers == documents[-1].metadata.headers
+
+
+def test_store_interns_header_states_and_keeps_context(tokenizer):
+    store = TextSplitter(tokenizer=tokenizer).chunk_compact(LINKED, 150)
+
+    assert len(store.headers) <= len(store)
+    store[1].context = "generated"
+
+    assert store[1].context == "generated"
+    assert store.to_documents()[1].metadata.context == "generated"
+    assert store[0].context is None
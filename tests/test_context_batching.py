@@ -0,0 +1,106 @@
+import asyncio
+from typing import List
+
+import pytest
+
+from benchmarks.mock_llm import MockLLMCall
+from document.context_cache import CachedContextGenerator, SQLiteContextStore
+from document.context_generator import BatchedContextGenerator, ContextGenerator
+from document.splitter import TextSplitter
+from instrumentation import InMemoryAggregator
+
+CHUNKS = ["a", "b", "c", "d"]
+
+
+class _BrokenBatchGenerator(ContextGenerator):
+    """Groups all chunks into one batch whose generation always fails."""
+
+    def __init__(self, failing_chunk: str | None = None):
+        self.failing_chunk = failing_chunk
+
+    def plan_batches(self, chunks: List[str]) -> List[List[int]]:
+        return [list(range(len(chunks)))]
+
+    async def generate_contexts(self, chunks: List[str], original_text: str) -> List[str]:
+        raise ValueError("batch failed")
+
+    async def generate_context(self, chunk: str, original_text: str, offset: int | None = None) -> str:
+        if chunk == self.failing_chunk:
+            raise ValueError("chunk failed")
+        return f"context of {chunk}"
+
+
+@pytest.mark.parametrize("max_concurrency", [None, 2])
+def test_failed_batch_falls_back_to_single_chunks(tokenizer, max_concurrency):
+    aggregator = InMemoryAggregator()
+    splitter = TextSplitter(
+        tokenizer=tokenizer, context_generator=_BrokenBatchGenerator(), max_concurrency=max_concurrency,
+        max_retries=1, retry_delay=0.001, instrumentation=aggregator,
+    )
+
+    contexts = asyncio.run(splitter.generate_contexts(CHUNKS, "abcd"))
+
+    assert contexts == [f"context of {chunk}" for chunk in CHUNKS]
+    assert aggregator.counters["split.batch_fallbacks"] == 1
+
+
+def test_fallback_isolates_failing_chunk_in_concurrent_mode(tokenizer):
+    splitter = TextSplitter(tokenizer=tokenizer, context_generator=_BrokenBatchGenerator("b"), max_concurrency=2)
+
+    contexts = asyncio.run(splitter.generate_contexts(CHUNKS, "abcd"))
+
+    assert contexts == ["context of a", None, "context of c", "context of d"]
+
+
+def test_fallback_failure_propagates_in_sequential_mode(tokenizer):
+    splitter = TextSplitter(tokenizer=tokenizer, context_generator=_BrokenBatchGenerator("b"))
+
+    with pytest.raises(ValueError):
+        asyncio.run(splitter.generate_contexts(CHUNKS, "abcd"))
+
+
+def test_cached_generator_delegates_batching(tokenizer, tmp_path):
+    call = MockLLMCall(latency=0.0)
+    batched = BatchedContextGenerator(call, max_batch_size=2, tokenizer=tokenizer)
+    store = SQLiteContextStore(tmp_path / "contexts.db")
+    cached = CachedContextGenerator(batched, store)
+    splitter = TextSplitter(tokenizer=tokenizer, context_generator=cached)
+
+    assert cached.plan_batches(CHUNKS) == [[0, 1], [2, 3]]
+
+    first = asyncio.run(splitter.generate_contexts(CHUNKS, "abcd"))
+    calls = call.calls
+    second = asyncio.run(splitter.generate_contexts(CHUNKS, "abcd"))
+
+    assert first == second == ["mock context"] * 4
+    assert batched.stats.requests == 2
+    assert call.calls == calls
+    assert (cached.stats.hits, cached.stats.misses) == (4, 4)
+    store.close()
+
+
+class _ConcurrencyTrackingLLMCall(MockLLMCall):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def _respond(self) -> None:
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await super()._respond()
+        finally:
+            self.in_flight -= 1
+
+
+def test_incomplete_batch_reply_falls_back_sequentially(tokenizer):
+    call = _ConcurrencyTrackingLLMCall(latency=0.01, list_length=1)
+    generator = BatchedContextGenerator(call, tokenizer=tokenizer)
+
+    contexts = asyncio.run(generator.generate_contexts(CHUNKS, "abcd"))
+
+    assert contexts == ["mock context"] * 4
+    assert generator.stats.fallbacks == 3
+    assert call.calls == 4
+    assert call.max_in_flight == 1
@@ -0,0 +1,131 @@
+import asyncio
+import time
+from typing import AsyncGenerator, List, Optional
+
+import pytest
+from pydantic import BaseModel
+
+from language_model import HedgedLLMCall, LLMCall
+from language_model.schemas import ChatConversation
+
+
+class _Answer(BaseModel):
+    answer: str
+
+
+class _Backend(LLMCall):
+    def __init__(self, name: str, delay: float, error: Optional[Exception] = None, deltas: List[str] = ()):
+        self.name = name
+        self.delay = delay
+        self.error = error
+        self.deltas = list(deltas)
+        self.cancelled = 0
+
+    @property
+    def model_name(self) -> str:
+        return self.name
+
+    async def generate_structured_output(self, messages, response_model, temperature=0.7, model_name=None):
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.error is not None:
+            raise self.error
+        return response_model(answer=self.name)
+
+    async def generate_stream(self, messages, temperature=0.7) -> AsyncGenerator[str, None]:
+        await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        for delta in self.deltas:
+            yield delta
+
+
+def _run(coroutine):
+    """Run the coroutine and collect asyncio error reports such as unretrieved task exceptions."""
+    errors = []
+
+    async def main():
+        asyncio.get_running_loop().set_exception_handler(lambda loop, context: errors.append(context))
+        result = await coroutine
+        others = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        return result, others
+
+    result, others = asyncio.run(main())
+    assert errors == []
+    assert others == []
+    return result
+
+
+def test_hedge_request_wins_over_slow_primary():
+    slow, fast = _Backend("slow", 1.0), _Backend("fast", 0.01)
+    call = HedgedLLMCall([slow, fast], initial_hedge_delay=0.05)
+
+    started = time.perf_counter()
+    response = _run(call.generate_structured_output(ChatConversation(), _Answer))
+
+    assert response.answer == "fast"
+    assert time.perf_counter() - started < 0.5
+    assert (call.stats.hedges, call.stats.hedge_wins) == (1, 1)
+    assert slow.cancelled == 1
+
+
+def test_failure_falls_back_to_next_backend():
+    call = HedgedLLMCall([_Backend("broken", 0.0, ValueError("down")), _Backend("ok", 0.0)], initial_hedge_delay=1.0)
+
+    response = _run(call.generate_structured_output(ChatConversation(), _Answer))
+
+    assert response.answer == "ok"
+    assert call.stats.fallbacks == 1
+
+
+def test_all_backends_failing_raises_last_error():
+    call = HedgedLLMCall(
+        [_Backend("first", 0.0, ValueError("first down")), _Backend("second", 0.0, ValueError("second down"))],
+        initial_hedge_delay=1.0,
+    )
+
+    with pytest.raises(ValueError, match="second down"):
+        _run(call.generate_structured_output(ChatConversation(), _Answer))
+    assert call.backends[0].success_rate < 1.0 and call.backends[1].success_rate < 1.0
+
+
+def test_simultaneous_failure_and_success_retrieves_every_exception():
+    failing, succeeding = _Backend("failing", 0.03, ValueError("down")), _Backend("succeeding", 0.02)
+    call = HedgedLLMCall([failing, succeeding], initial_hedge_delay=0.01, min_hedge_delay=0.01)
+
+    response = _run(call.generate_structured_output(ChatConversation(), _Answer))
+
+    assert response.answer == "succeeding"
+
+
+def test_stream_falls_back_before_first_delta():
+    call = HedgedLLMCall([_Backend("broken", 0.0, ValueError("down")), _Backend("ok", 0.0, deltas=["a", "b"])])
+
+    async def collect():
+        return [delta async for delta in call.generate_stream(ChatConversation())]
+
+    assert _run(collect()) == ["a", "b"]
+    assert call.stats.fallbacks == 1
+
+
+def test_losing_hedges_do_not_make_slow_backend_primary():
+    fast, slow = _Backend("fast", 0.0), _Backend("slow", 0.0)
+    call = HedgedLLMCall([fast, slow], hedge_percentile=0.5, min_hedge_delay=0.01, min_samples=3)
+    for _ in range(5):
+        call.backends[0].histogram.record(0.1)
+    for _ in range(3):
+        call.backends[1].histogram.record(1.0)
+
+    # The slow backend wins once by hedging an unusually slow primary request...
+    fast.delay, slow.delay = 0.6, 0.2
+    assert _run(call.generate_structured_output(ChatConversation(), _Answer)).answer == "slow"
+    # ...and then loses hedges started shortly before the primary answered.
+    fast.delay, slow.delay = 0.15, 1.0
+    for _ in range(5):
+        assert _run(call.generate_structured_output(ChatConversation(), _Answer)).answer == "fast"
+
+    assert call.stats.hedge_wins == 1
+    assert call.rank()[0].name == "0:fast"
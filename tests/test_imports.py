@@ -0,0 +1,66 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _run(code: str, **env: str) -> str:
+    """Run code in a fresh interpreter, from a directory without a .env file and without settings variables."""
+    environment = {key: value for key, value in os.environ.items() if not key.upper().startswith(("LLM_SETTINGS", "OBSERVABILITY_SETTINGS"))}
+    environment.update(env, PYTHONPATH=str(ROOT))
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, cwd=ROOT / "tests", env=environment)
+    assert result.returncode == 0, result.stderr
+    return result.stdout.strip()
+
+
+def test_importing_packages_does_not_load_sdks_or_settings():
+    code = (
+        "import sys, settings, language_model, document.splitter; "
+        "from language_model import LLMCall; "
+        "print(sorted(name for name in ('openai', 'tiktoken', 'langfuse') if name in sys.modules), "
+        "settings.get_settings.cache_info().currsize)"
+    )
+
+    assert _run(code) == "[] 0"
+
+
+def test_language_model_exports_resolve_on_attribute_access():
+    code = (
+        "import sys, language_model; "
+        "loaded = 'openai' in sys.modules; "
+        "from language_model import OpenAILLMCall, HedgedLLMCall; "
+        "print(loaded, OpenAILLMCall.__module__, HedgedLLMCall.__module__, 'openai' in sys.modules)"
+    )
+
+    assert _run(code) == "False language_model.openai language_model.hedging True"
+
+
+def test_settings_attribute_is_built_on_first_access():
+    code = (
+        "import settings; "
+        "print(settings.get_settings.cache_info().currsize, settings.settings.llm_settings.api_key, "
+        "settings.settings is settings.get_settings()); "
+        "settings.missing"
+    )
+    env = {
+        "LLM_SETTINGS__API_KEY": "key",
+        "OBSERVABILITY_SETTINGS__PUBLIC_KEY": "public",
+        "OBSERVABILITY_SETTINGS__SECRET_KEY": "secret",
+        "OBSERVABILITY_SETTINGS__HOST": "http://localhost",
+    }
+    environment = {**os.environ, **env, "PYTHONPATH": str(ROOT)}
+
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, cwd=ROOT / "tests", env=environment)
+
+    assert result.stdout.strip() == "0 key True"
+    assert "AttributeError: module 'settings' has no attribute 'missing'" in result.stderr
+
+
+def test_importing_openai_client_does_not_build_settings_or_clients():
+    pytest.importorskip("httpx")
+
+    assert _run("import openai_client, settings; print(openai_client._clients, settings.get_settings.cache_info().currsize)") == "{} 0"
@@ -0,0 +1,43 @@
+import asyncio
+
+from document.incremental import IncrementalSplitter, restore_links
+from document.splitter import TextSplitter
+
+TEXT = "\n".join(
+    f"## Section {index}\n\n"
+    f"Paragraph {index} with a [link](https://example.com/{index}) and an image "
+    f"![alt text {index}](images/{index}.png) followed by ![](images/empty-{index}.png).\n"
+    + "Filler sentence for the section. " * 8 + "\n"
+    for index in range(30)
+)
+
+
+def test_restore_links_resolves_nested_image_placeholders(tokenizer):
+    splitter = TextSplitter(tokenizer=tokenizer)
+
+    documents = splitter.chunk(TEXT, 300)
+
+    assert "".join(restore_links(document) for document in documents) == TEXT
+
+
+def test_identical_text_reuses_every_chunk(tokenizer):
+    splitter = TextSplitter(tokenizer=tokenizer)
+    previous = splitter.chunk(TEXT, 300)
+
+    result = asyncio.run(IncrementalSplitter(splitter).split(TEXT, 300, previous=previous))
+
+    assert result.reused == len(previous)
+    assert result.resplit == 0
+    assert [document.model_dump() for document in result.documents] == [document.model_dump() for document in previous]
+
+
+def test_edit_resplits_only_changed_region(tokenizer):
+    splitter = TextSplitter(tokenizer=tokenizer)
+    previous = splitter.chunk(TEXT, 300)
+    edited = TEXT.replace("Paragraph 15 with", "Paragraph fifteen, edited, with")
+
+    result = asyncio.run(IncrementalSplitter(splitter).split(edited, 300, previous=previous))
+
+    assert 0 < result.resplit < len(previous)
+    assert result.reused > len(previous) // 2
+    assert "".join(restore_links(document) for document in result.documents) == edited
@@ -0,0 +1,55 @@
+import asyncio
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from document.ingestion import CorpusIngestion, resolve_sources
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+@pytest.fixture
+def gpt4o_encoding():
+    """The worker processes load the real gpt-4o encoding, which tiktoken may have to download."""
+    import tiktoken
+
+    try:
+        tiktoken.encoding_for_model("gpt-4o")
+    except Exception as error:
+        pytest.skip(f"gpt-4o encoding unavailable: {error!r}")
+
+
+def test_corpus_ingestion_chunks_files_in_worker_processes(tmp_path, gpt4o_encoding):
+    corpus = tmp_path / "corpus"
+    (corpus / "nested").mkdir(parents=True)
+    texts = {
+        corpus / "a.md": "# Zażółć\n\n" + "Gęślą jaźń. " * 200,
+        corpus / "nested" / "b.md": "# Second\n\n" + "Plain text. " * 50,
+    }
+    for path, text in texts.items():
+        path.write_text(text, encoding="utf-8")
+    (corpus / "broken.md").write_bytes(b"# Broken\n\n\xff\xfe")
+    (corpus / "notes.txt").write_text("not matched", encoding="utf-8")
+    sink = tmp_path / "chunks.jsonl"
+
+    stats = asyncio.run(CorpusIngestion(limit=300, workers=2).run(resolve_sources(str(corpus)), sink))
+
+    records = [json.loads(line) for line in sink.read_text(encoding="utf-8").splitlines()]
+    assert stats.documents == 2 and stats.chunks == len(records)
+    assert len(stats.failed) == 1 and "broken.md" in stats.failed[0]
+    for path, text in texts.items():
+        chunks = sorted((record for record in records if record["source"] == str(path)), key=lambda record: record["chunk"])
+        assert "".join(record["document"]["text"] for record in chunks) == text
+
+
+def test_ingest_rejects_prefix_stable_with_section_window():
+    result = subprocess.run(
+        [sys.executable, "ingest.py", "docs", "--section-window", "500", "--prefix-stable"],
+        capture_output=True, text=True, cwd=ROOT,
+    )
+
+    assert result.returncode == 2
+    assert "--prefix-stable cannot be combined with --section-window" in result.stderr
@@ -0,0 +1,59 @@
+import asyncio
+from enum import Enum
+from typing import Dict, List, Literal, Optional
+
+from pydantic import BaseModel
+
+from benchmarks.mock_llm import MockLLMCall
+from document.context_generator import BatchedContextGenerator
+from document.splitter import TextSplitter
+from language_model.schemas import ChatConversation
+
+
+class _Kind(Enum):
+    SUMMARY = "summary"
+    QUOTE = "quote"
+
+
+class _Item(BaseModel):
+    index: int
+    score: float
+    label: str
+    kind: _Kind
+    tags: List[str]
+
+
+class _Response(BaseModel):
+    title: str
+    items: List[_Item]
+    note: Optional[str]
+    mode: Literal["fast", "slow"]
+    extra: Dict[str, int]
+    flag: bool
+
+
+def test_mock_builds_nested_models_and_lists():
+    call = MockLLMCall(latency=0.0, list_length=3)
+
+    response = asyncio.run(call.generate_structured_output(ChatConversation(), _Response))
+
+    assert response.title == "mock title"
+    assert [item.index for item in response.items] == [0, 1, 2]
+    assert response.items[1] == _Item(index=1, score=1.0, label="mock label", kind=_Kind.SUMMARY, tags=["mock tags"] * 3)
+    assert response.note == "mock note"
+    assert response.mode == "fast"
+    assert response.extra == {}
+    assert response.flag is False
+
+
+def test_mock_drives_batched_context_generator(tokenizer):
+    generator = BatchedContextGenerator(MockLLMCall(latency=0.0), tokenizer=tokenizer)
+    splitter = TextSplitter(tokenizer=tokenizer, context_generator=generator)
+    text = "\n\n".join(f"Paragraph {index}: " + "lorem ipsum " * 30 for index in range(12))
+
+    documents = asyncio.run(splitter.split(text, 200))
+
+    assert len(documents) > 1
+    assert generator.stats.requests >= 1
+    assert generator.stats.fallbacks == 0
+    assert all(document.metadata.context == "mock context" for document in documents)
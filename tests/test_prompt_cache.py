@@ -0,0 +1,84 @@
+import asyncio
+from types import SimpleNamespace
+
+from pydantic import BaseModel
+
+from benchmarks.mock_llm import MockLLMCall
+from document.context_generator import LLMContextGenerator
+from language_model import OpenAILLMCall
+from language_model.schemas import ChatConversation
+
+
+def test_prefix_cache_keeps_interleaved_documents():
+    generator = LLMContextGenerator(MockLLMCall(latency=0.0), prefix_stable=True, prefix_cache_size=2)
+
+    async def run():
+        for index in range(3):
+            for document in ("first document", "second document"):
+                await generator.generate_context(f"chunk {index}", document)
+
+    asyncio.run(run())
+
+    assert (generator.prefix_stats.hits, generator.prefix_stats.misses) == (4, 2)
+
+
+def test_prefix_cache_evicts_least_recently_used():
+    generator = LLMContextGenerator(MockLLMCall(latency=0.0), prefix_stable=True, prefix_cache_size=1)
+
+    for document in ("first", "second", "first"):
+        generator._render_prefix(document)
+
+    assert (generator.prefix_stats.hits, generator.prefix_stats.misses) == (0, 3)
+
+
+def _usage(prompt_tokens: int, cached_tokens: int):
+    return SimpleNamespace(
+        prompt_tokens=prompt_tokens,
+        completion_tokens=5,
+        total_tokens=prompt_tokens + 5,
+        prompt_tokens_details=SimpleNamespace(cached_tokens=cached_tokens),
+    )
+
+
+class _Answer(BaseModel):
+    answer: str
+
+
+class _FakeOpenAI:
+    def __init__(self):
+        self.stream_requests = []
+        completions = SimpleNamespace(create=self._create)
+        parse_completions = SimpleNamespace(parse=self._parse)
+        self.chat = SimpleNamespace(completions=completions)
+        self.beta = SimpleNamespace(chat=SimpleNamespace(completions=parse_completions))
+
+    async def _parse(self, **request):
+        message = SimpleNamespace(parsed=_Answer(answer="ok"))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=_usage(100, 64))
+
+    async def _create(self, **request):
+        self.stream_requests.append(request)
+
+        async def stream():
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content="hello"))], usage=None)
+            if request.get("stream_options", {}).get("include_usage"):
+                yield SimpleNamespace(choices=[], usage=_usage(200, 0))
+
+        return stream()
+
+
+def test_openai_call_records_usage_without_instrumentation():
+    client = _FakeOpenAI()
+    call = OpenAILLMCall(client)
+    conversation = ChatConversation()
+    conversation.add_user_message("question")
+
+    async def run():
+        await call.generate_structured_output(conversation, _Answer)
+        return [delta async for delta in call.generate_stream(conversation)]
+
+    assert asyncio.run(run()) == ["hello"]
+    assert call.cache_stats.requests == 2
+    assert call.cache_stats.prompt_tokens == 300
+    assert call.cache_stats.cached_tokens == 64
+    assert call.cache_stats.cache_hits == 1
@@ -0,0 +1,53 @@
+import asyncio
+from types import SimpleNamespace
+
+import openai
+import pytest
+
+from language_model.rate_limit import RateLimiter
+
+
+def _flaky_request(failures: int):
+    calls = 0
+
+    async def request():
+        nonlocal calls
+        calls += 1
+        if calls <= failures:
+            raise openai.APIConnectionError(request=None)
+        return SimpleNamespace(headers={}, calls=calls)
+
+    return request
+
+
+def test_run_retries_transient_errors(tokenizer):
+    limiter = RateLimiter(6000, 1_000_000, tokenizer=tokenizer, max_retries=2, base_delay=0.001)
+
+    response = asyncio.run(limiter.run(_flaky_request(2), estimated_tokens=10))
+
+    assert response.calls == 3
+
+
+def test_run_raises_after_max_retries(tokenizer):
+    limiter = RateLimiter(6000, 1_000_000, tokenizer=tokenizer, max_retries=1, base_delay=0.001)
+
+    with pytest.raises(openai.APIConnectionError):
+        asyncio.run(limiter.run(_flaky_request(2), estimated_tokens=10))
+
+
+def test_failed_attempts_refund_their_token_reservation(tokenizer):
+    # 100 tokens per minute refill in ~36 s what an unrefunded reservation of 60 would hold back.
+    limiter = RateLimiter(6000, 100, tokenizer=tokenizer, max_retries=3, base_delay=0.001)
+
+    response = asyncio.run(asyncio.wait_for(limiter.run(_flaky_request(3), estimated_tokens=60), timeout=5))
+
+    assert response.calls == 4
+    assert 40 <= limiter.tokens.available < 41
+
+
+def test_exhausted_retries_refund_the_reservation(tokenizer):
+    limiter = RateLimiter(6000, 100, tokenizer=tokenizer, max_retries=1, base_delay=0.001)
+
+    with pytest.raises(openai.APIConnectionError):
+        asyncio.run(limiter.run(_flaky_request(2), estimated_tokens=60))
+    assert limiter.tokens.available == pytest.approx(100)
@@ -0,0 +1,108 @@
+import asyncio
+
+from benchmarks.mock_llm import MockLLMCall
+from document.context_cache import document_digest
+from document.section_context import SectionWindowContextGenerator
+from document.splitter import TextSplitter
+
+REPEATED = "The same paragraph appears in every section of this document.\n\n"
+
+
+def _generator(tokenizer, **kwargs) -> SectionWindowContextGenerator:
+    return SectionWindowContextGenerator(MockLLMCall(latency=0.0), tokenizer=tokenizer, **kwargs)
+
+
+def test_document_digest_is_stable_sha256():
+    assert document_digest("text") == document_digest("text")
+    assert len(document_digest("text")) == 64
+    assert document_digest("text") != document_digest("other text")
+
+
+def test_repeated_text_is_located_in_consecutive_sections(tokenizer):
+    text = "".join(f"# Section {index}\n\n{REPEATED}" for index in range(3))
+    generator = _generator(tokenizer, window_tokens=10)
+
+    async def paths():
+        outline = await generator._get_outline(text)
+        return [generator._get_window(outline, REPEATED, text)[0] for _ in range(3)]
+
+    assert asyncio.run(paths()) == ["Section 0", "Section 1", "Section 2"]
+
+
+def test_outline_is_capped_by_dropping_deep_levels(tokenizer):
+    text = "".join(
+        f"# Chapter {chapter}\n\n" + "".join(f"### Detail {chapter}.{detail}\n\ntext\n\n" for detail in range(20))
+        for chapter in range(5)
+    )
+    generator = _generator(tokenizer, outline_tokens=80)
+
+    _, outline = generator._parse_sections(text)
+
+    assert outline.splitlines() == [f"- Chapter {chapter}" for chapter in range(5)]
+    assert tokenizer.count_tokens(outline) - tokenizer.wrapper_overhead <= 80
+
+
+def test_outline_is_truncated_when_top_level_exceeds_cap(tokenizer):
+    text = "".join(f"# Chapter {chapter}\n\ntext\n\n" for chapter in range(200))
+    generator = _generator(tokenizer, outline_tokens=50)
+
+    _, outline = generator._parse_sections(text)
+
+    assert outline.startswith("- Chapter 0")
+    assert tokenizer.count_tokens(outline) - tokenizer.wrapper_overhead <= 50
+
+
+def test_generates_contexts_for_split_document(tokenizer):
+    text = "".join(f"# Section {index}\n\n{REPEATED * 5}" for index in range(6))
+    generator = _generator(tokenizer, window_tokens=200)
+    splitter = TextSplitter(tokenizer=tokenizer, context_generator=generator, max_concurrency=4)
+
+    documents = asyncio.run(splitter.split(text, 200))
+
+    assert all(document.metadata.context == "mock context" for document in documents)
+    assert generator.stats.chunks == len(documents)
+
+
+class _RecordingGenerator(SectionWindowContextGenerator):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.paths = {}
+
+    def _get_window(self, outline, chunk, text, offset=None):
+        path, window = super()._get_window(outline, chunk, text, offset)
+        self.paths[offset] = path
+        return path, window
+
+
+def test_chunk_offsets_place_repeated_text_out_of_order(tokenizer):
+    text = "".join(f"# Section {index}\n\n{REPEATED}" for index in range(4))
+    offsets = [text.index(REPEATED, text.index(f"# Section {index}")) for index in range(4)]
+    generator = _RecordingGenerator(MockLLMCall(latency=0.0), tokenizer=tokenizer, window_tokens=10)
+
+    asyncio.run(generator.generate_contexts([REPEATED] * 4, text, offsets=offsets[::-1]))
+
+    assert [generator.paths[offset] for offset in offsets] == [f"Section {index}" for index in range(4)]
+
+
+def test_split_passes_chunk_offsets(tokenizer):
+    text = "".join(f"# Section {index}\n\n{REPEATED * 5}" for index in range(6))
+    generator = _RecordingGenerator(MockLLMCall(latency=0.0), tokenizer=tokenizer, window_tokens=200)
+    splitter = TextSplitter(tokenizer=tokenizer, context_generator=generator, max_concurrency=4)
+
+    asyncio.run(splitter.split(text, 200))
+
+    assert sorted(generator.paths) == [start for start, _ in splitter.chunk_spans(text, 200)]
+
+
+def test_section_lookup_matches_section_spans(tokenizer):
+    text = "intro\n\n" + "".join(f"## Section {index}\n\nbody {index}\n\n" for index in range(5))
+    generator = _RecordingGenerator(MockLLMCall(latency=0.0), tokenizer=tokenizer, window_tokens=1)
+
+    async def paths():
+        outline = await generator._get_outline(text)
+        return outline, [generator._get_window(outline, "", text, position)[0] for position in range(len(text))]
+
+    outline, found = asyncio.run(paths())
+
+    expected = [next(s.path for s in outline.sections if s.start <= position < s.end) for position in range(len(text))]
+    assert found == expected
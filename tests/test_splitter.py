@@ -0,0 +1,218 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from document.context_generator import ContextGenerator
+from document import splitter as splitter_module
+from document.splitter import TextSplitter
+from document.token_index import TokenIndex
+from instrumentation import InMemoryAggregator
+
+EXAMPLE = (Path(__file__).resolve().parent.parent / "example.md").read_text(encoding="utf-8")
+
+MIXED = "\n".join(
+    f"## Sekcja {index}\n\n"
+    f"Zażółć gęślą jaźń — akapit {index} z [linkiem](https://example.com/{index}) "
+    f"i obrazem ![opis {index}](img/{index}.png).   Liczby 1234567 i emoji 🙂🙂.\n"
+    f"    kod  = {index} * 2\n\n\n"
+    for index in range(60)
+)
+
+
+@pytest.mark.parametrize("text", [EXAMPLE[:20000], MIXED], ids=["example", "mixed"])
+@pytest.mark.parametrize("limit", [150, 300, 1000])
+def test_token_index_mode_matches_scan_mode(tokenizer, text, limit):
+    scan = TextSplitter(tokenizer=tokenizer).chunk(text, limit)
+    indexed = TextSplitter(tokenizer=tokenizer, use_token_index=True).chunk(text, limit)
+
+    assert [document.model_dump() for document in indexed] == [document.model_dump() for document in scan]
+
+
+def test_token_index_counts_suffix_exactly(tokenizer):
+    index = TokenIndex.build(MIXED, tokenizer)
+
+    for start in range(0, len(MIXED), 7):
+        assert index.count_tokens_from(start) == tokenizer.count_tokens(MIXED[start:])
+
+
+class _EncodingWithoutPattern:
+    """Encoding without the private _pat_str attribute, as in tiktoken versions that do not expose it."""
+
+    def __init__(self, encoding):
+        self._encoding = encoding
+
+    def __getattr__(self, name):
+        if name == "_pat_str":
+            raise AttributeError(name)
+        return getattr(self._encoding, name)
+
+
+def test_token_index_falls_back_to_full_tokenization_without_pattern(tokenizer):
+    tokenizer.tokenizer = _EncodingWithoutPattern(tokenizer.tokenizer)
+    index = TokenIndex.build(MIXED, tokenizer)
+
+    assert tokenizer.piece_pattern is None
+    for start in range(0, len(MIXED), 97):
+        assert index.count_tokens_from(start) == tokenizer.count_tokens(MIXED[start:])
+    assert TextSplitter(tokenizer=tokenizer, use_token_index=True).chunk(MIXED, 300) == TextSplitter(tokenizer=tokenizer).chunk(MIXED, 300)
+
+
+class _FailingContextGenerator(ContextGenerator):
+    def __init__(self, error: BaseException, failing_chunk: str):
+        self.error = error
+        self.failing_chunk = failing_chunk
+
+    async def generate_context(self, chunk: str, original_text: str, offset: int | None = None) -> str:
+        if chunk == self.failing_chunk:
+            raise self.error
+        return f"context of {chunk}"
+
+
+def test_generate_contexts_isolates_chunk_failures(tokenizer):
+    splitter = TextSplitter(tokenizer=tokenizer, context_generator=_FailingContextGenerator(ValueError("boom"), "b"), max_concurrency=2)
+
+    contexts = asyncio.run(splitter.generate_contexts(["a", "b", "c"], "abc"))
+
+    assert contexts == ["context of a", None, "context of c"]
+
+
+def test_generate_contexts_propagates_cancellation(tokenizer):
+    splitter = TextSplitter(
+        tokenizer=tokenizer, context_generator=_FailingContextGenerator(asyncio.CancelledError(), "b"), max_concurrency=2
+    )
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(splitter.generate_contexts(["a", "b", "c"], "abc"))
+
+
+async def _pieces(text: str, size: int = 500):
+    for offset in range(0, len(text), size):
+        yield text[offset:offset + size]
+
+
+async def _collect(splitter: TextSplitter, text: str, limit: int, piece_size: int = 500, **kwargs) -> list:
+    return [document async for document in splitter.split_stream(_pieces(text, piece_size), limit, **kwargs)]
+
+
+@pytest.mark.parametrize("use_token_index", [False, True])
+def test_split_stream_matches_chunk_when_document_fits_window(tokenizer, use_token_index):
+    splitter = TextSplitter(tokenizer=tokenizer, use_token_index=use_token_index)
+
+    streamed = asyncio.run(_collect(splitter, MIXED, 300, window_size=len(MIXED) + 1))
+
+    assert [document.model_dump() for document in streamed] == [document.model_dump() for document in splitter.chunk(MIXED, 300)]
+
+
+def test_split_stream_token_index_matches_scan_with_small_window(tokenizer):
+    text = EXAMPLE[:30000]
+    scan = asyncio.run(_collect(TextSplitter(tokenizer=tokenizer), text, 300, window_size=4000))
+    indexed = asyncio.run(_collect(TextSplitter(tokenizer=tokenizer, use_token_index=True), text, 300, window_size=4000))
+
+    assert [document.model_dump() for document in indexed] == [document.model_dump() for document in scan]
+    assert all(document.metadata.tokens <= 300 for document in scan)
+
+
+class _RecordingContextGenerator(ContextGenerator):
+    def __init__(self):
+        self.original_texts = []
+        self.located = []
+
+    async def generate_context(self, chunk: str, original_text: str, offset: int | None = None) -> str:
+        self.original_texts.append(original_text)
+        self.located.append(original_text[offset:].startswith(chunk.split("{{")[0][:20]))
+        return ""
+
+
+def test_split_stream_passes_document_prefix_as_context(tokenizer):
+    text = EXAMPLE[:30000]
+    generator = _RecordingContextGenerator()
+    splitter = TextSplitter(tokenizer=tokenizer, context_generator=generator)
+
+    asyncio.run(_collect(splitter, text, 300, window_size=4000, prefix_size=1000))
+
+    assert len(generator.original_texts) > 1
+    for original_text in generator.original_texts:
+        assert original_text.startswith(text[:1000])
+        assert len(original_text) <= 1000 + len("\n\n[...]\n\n") + 2 * 4000 + 500
+    assert generator.original_texts[-1].endswith(text[-100:])
+    assert all(generator.located)
+
+
+def test_split_stream_caps_window_growth(tokenizer, monkeypatch):
+    monkeypatch.setattr(splitter_module, "MAX_TOKEN_CHARS", 1)
+    text = "e" * 20000
+    splitter = TextSplitter(tokenizer=tokenizer)
+
+    documents = asyncio.run(_collect(splitter, text, 1000, piece_size=50, window_size=10))
+
+    assert "".join(document.text for document in documents) == text
+    assert max(len(document.text) for document in documents) <= 1000 + 50
+
+
+class _FlakyContextGenerator(ContextGenerator):
+    def __init__(self, failures: int):
+        self.failures = failures
+
+    async def generate_context(self, chunk: str, original_text: str, offset: int | None = None) -> str:
+        if self.failures:
+            self.failures -= 1
+            raise ValueError("flaky")
+        return "context"
+
+
+def test_context_generation_metric_excludes_retry_backoff(tokenizer):
+    aggregator = InMemoryAggregator()
+    splitter = TextSplitter(
+        tokenizer=tokenizer, context_generator=_FlakyContextGenerator(1), max_retries=1, retry_delay=0.2,
+        instrumentation=aggregator,
+    )
+
+    assert asyncio.run(splitter.generate_contexts(["a"], "a")) == ["context"]
+
+    assert len(aggregator.observations["split.context_generation"]) == 2
+    assert max(aggregator.observations["split.context_generation"]) < 0.1
+    assert aggregator.counters["split.context_retries"] == 1
+
+
+def test_index_build_and_token_counting_have_separate_metrics(tokenizer):
+    aggregator = InMemoryAggregator()
+
+    TextSplitter(tokenizer=tokenizer, use_token_index=True, instrumentation=aggregator).chunk(MIXED, 300)
+
+    assert len(aggregator.observations["split.index_build"]) == 1
+    assert len(aggregator.observations["split.token_counting"]) == 1
+    assert "split.tokenization" not in aggregator.observations
+
+
+class _HangingContextGenerator(ContextGenerator):
+    def __init__(self):
+        self.calls = 0
+        self.cancelled = 0
+
+    async def generate_context(self, chunk: str, original_text: str, offset: int | None = None) -> str:
+        self.calls += 1
+        if self.calls == 1:
+            return "context"
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+
+
+def test_closing_split_stream_awaits_cancelled_context_tasks(tokenizer):
+    generator = _HangingContextGenerator()
+    splitter = TextSplitter(tokenizer=tokenizer, context_generator=generator, max_concurrency=4)
+
+    async def main():
+        stream = splitter.split_stream(_pieces(MIXED), 300)
+        first = await anext(stream)
+        await stream.aclose()
+        return first, [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+
+    first, remaining = asyncio.run(main())
+
+    assert first.metadata.context == "context"
+    assert remaining == []
+    assert generator.cancelled == generator.calls - 1 == 3
@@ -0,0 +1,25 @@
+import pytest
+
+TEXTS = ["", "hello.", "Zażółć gęślą jaźń", "tail  ", "line\n\n", "12345 🙂", "[link](https://example.com)"]
+
+
+@pytest.mark.parametrize("text", TEXTS)
+def test_count_tokens_is_text_tokens_plus_wrapper_overhead(tokenizer, text):
+    assert tokenizer.count_tokens(text) == len(tokenizer.tokenizer.encode_ordinary(text)) + tokenizer.wrapper_overhead
+
+
+def test_wrapper_overhead_is_tokens_of_empty_wrapped_text(tokenizer):
+    assert tokenizer.wrapper_overhead == len(tokenizer.tokenizer.encode_ordinary(tokenizer.format_for_tokenization("")))
+
+
+def test_count_tokens_batch_matches_count_tokens(tokenizer):
+    assert tokenizer.count_tokens_batch(TEXTS) == [tokenizer.count_tokens(text) for text in TEXTS]
+
+
+def test_count_tokens_may_differ_from_wrapped_text_at_seams(tokenizer):
+    # Trailing whitespace merges with the ChatML end marker when the text is wrapped,
+    # which count_tokens deliberately does not model.
+    wrapped = len(tokenizer.tokenizer.encode_ordinary(tokenizer.format_for_tokenization("tail  ")))
+
+    assert tokenizer.count_tokens("tail  ") != wrapped
+    assert abs(tokenizer.count_tokens("tail  ") - wrapped) <= 1
@@ -0,0 +1,73 @@
+import asyncio
+
+import numpy as np
+
+from document.schemas import Document, DocumentMetadata
+from language_model import HashingEmbedder
+from retrieval import EmbeddingStage, IVFIndex, VectorIndex
+
+TOPICS = ["apples oranges fruit", "rockets orbit launch", "databases index query", "violin orchestra music"]
+
+
+def _documents(count: int) -> list:
+    return [
+        Document(text=f"{TOPICS[index % len(TOPICS)]} note {index}", metadata=DocumentMetadata(tokens=10, headers={}, urls=[], images=[]))
+        for index in range(count)
+    ]
+
+
+def _stage(documents: list) -> EmbeddingStage:
+    stage = EmbeddingStage(HashingEmbedder(dimensions=64))
+    asyncio.run(stage.add_documents(documents))
+    return stage
+
+
+def test_embed_index_search_round_trip():
+    documents = _documents(40)
+    stage = _stage(documents)
+
+    results = asyncio.run(stage.search("rockets launch into orbit", k=5))
+
+    assert len(results) == 5
+    assert all(documents[int(id_)].text.startswith("rockets") for id_, _ in results)
+    assert [score for _, score in results] == sorted((score for _, score in results), reverse=True)
+
+
+def test_memory_mapped_index_returns_same_results(tmp_path):
+    stage = _stage(_documents(40))
+    query = asyncio.run(stage.embedder.embed(["violin music"]))[0]
+    stage.index.save(tmp_path / "index")
+
+    loaded = VectorIndex.load(tmp_path / "index")
+
+    assert isinstance(loaded.vectors, np.memmap)
+    assert loaded.ids == stage.index.ids
+    assert loaded.search(query, 5) == stage.index.search(query, 5)
+
+    extra = asyncio.run(stage.embedder.embed(["violin orchestra music extra"]))
+    loaded.add(extra, ["extra"])
+    assert loaded.search(extra[0], 1)[0][0] == "extra"
+
+
+def test_ivf_search_on_empty_index():
+    ivf = IVFIndex(VectorIndex(8))
+
+    assert ivf.search(np.ones(8, dtype=np.float32)) == []
+
+
+def test_ivf_searches_vectors_added_after_build():
+    stage = _stage(_documents(40))
+    ivf = IVFIndex(stage.index, n_lists=4, n_probe=1)
+    added = asyncio.run(stage.embedder.embed(["completely unrelated zebra giraffe safari"]))
+    stage.index.add(added, ["late"])
+
+    assert ivf.unassigned == 1
+    assert ivf.search(added[0], 1)[0][0] == "late"
+
+
+def test_ivf_with_all_lists_probed_matches_exact_search():
+    stage = _stage(_documents(40))
+    query = asyncio.run(stage.embedder.embed(["databases query"]))[0]
+    ivf = IVFIndex(stage.index, n_lists=4, n_probe=4)
+
+    assert [id_ for id_, _ in ivf.search(query, 5)] == [id_ for id_, _ in stage.index.search(query, 5)]
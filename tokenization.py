@@ -0,0 +1,114 @@
+from functools import cached_property, lru_cache
+from typing import TYPE_CHECKING, List, Optional, Protocol, Tuple
+
+if TYPE_CHECKING:
+    import regex
+    import tiktoken
+
+
+class Tokenizer(Protocol):  
+    """Protokół definiujący interfejs dla tokenizatorów."""
+
+    wrapper_overhead: int
+    """Liczba tokenów dodawana przez format_for_tokenization do każdego tekstu."""
+
+    piece_pattern: Optional["regex.Pattern"]
+    """Wyrażenie pre-tokenizacji, którego dopasowania są kodowane niezależnie, lub None, jeśli nieznane."""
+
+    def count_tokens(self, text: str) -> int:
+        """Zlicza tokeny w podanym tekście."""
+        ...
+
+    def count_tokens_batch(self, texts: List[str]) -> List[int]:
+        """Zlicza tokeny dla wielu tekstów naraz."""
+        ...
+
+    def encode_with_offsets(self, text: str) -> Tuple[List[int], List[int]]:
+        """Koduje tekst, zwracając tokeny i znakowe przesunięcia ich początków."""
+        ...
+
+    def format_for_tokenization(self, text: str) -> str:
+        """Formatuje tekst przed tokenizacją."""
+        ...
+
+
+@lru_cache(maxsize=None)
+def get_encoding(model_name: str) -> "tiktoken.Encoding":
+    """
+    Zwraca kodowanie tiktoken dla modelu, wczytywane raz na proces.
+
+    Import tiktoken i wczytanie tablic BPE następują dopiero przy pierwszym użyciu,
+    a wszystkie instancje TiktokenTokenizer dla danego modelu współdzielą jedno kodowanie.
+    """
+    import tiktoken
+
+    return tiktoken.encoding_for_model(model_name)
+
+
+class TiktokenTokenizer:
+    """Implementacja tokenizatora wykorzystująca bibliotekę tiktoken."""
+    
+    def __init__(self, model_name: str = "gpt-4o", num_threads: int = 8):
+        self.model_name = model_name
+        self.num_threads = num_threads
+        self.special_tokens = {
+            '<|im_start|>': 100264,
+            '<|im_end|>': 100265,
+            '<|im_sep|>': 100266,
+        }
+
+    @cached_property
+    def tokenizer(self) -> "tiktoken.Encoding":
+        """Kodowanie tiktoken, wczytywane przy pierwszym liczeniu tokenów."""
+        return get_encoding(self.model_name)
+
+    @cached_property
+    def wrapper_overhead(self) -> int:
+        """Liczba tokenów dodawana przez format_for_tokenization do każdego tekstu."""
+        return len(self.tokenizer.encode_ordinary(self.format_for_tokenization('')))
+
+    @cached_property
+    def piece_pattern(self) -> Optional["regex.Pattern"]:
+        """
+        Wyrażenie pre-tokenizacji kodowania; tiktoken koduje BPE każde jego dopasowanie osobno.
+
+        tiktoken nie udostępnia go publicznie, więc gdy atrybut kodowania jest niedostępny,
+        zwracane jest None, a TokenIndex liczy tokeny pełną tokenizacją.
+        """
+        pat_str = getattr(self.tokenizer, "_pat_str", None)
+        if pat_str is None:
+            return None
+        import regex
+
+        return regex.compile(pat_str)
+        
+    def count_tokens(self, text: str) -> int:
+        """
+        Zlicza tokeny w podanym tekście.
+
+        Wynik to liczba tokenów samego tekstu powiększona o wyliczony raz
+        wrapper_overhead, zamiast tokenizacji tekstu sformatowanego przez
+        format_for_tokenization. Nie jest to równoważne: na styku tekstu ze
+        znacznikami ChatML pre-tokenizacja może połączyć ich znaki w jeden
+        fragment (np. końcowe spacje lub interpunkcję z "<|"), przez co wynik
+        może różnić się o pojedyncze tokeny od tokenizacji sformatowanego tekstu.
+        Liczba jest za to addytywna i niezależna od znaczników, co pozwala
+        liczyć ją z TokenIndex i wsadowo (count_tokens_batch daje te same wartości).
+        """
+        return len(self.tokenizer.encode_ordinary(text)) + self.wrapper_overhead
+
+    def count_tokens_batch(self, texts: List[str]) -> List[int]:
+        """Zlicza tokeny dla wielu tekstów naraz, kodując je równolegle w wątkach tiktoken."""
+        encoded = self.tokenizer.encode_ordinary_batch(texts, num_threads=self.num_threads)
+        return [len(tokens) + self.wrapper_overhead for tokens in encoded]
+
+    def encode_with_offsets(self, text: str) -> Tuple[List[int], List[int]]:
+        """Koduje tekst, zwracając tokeny i znakowe przesunięcia ich początków."""
+        tokens = self.tokenizer.encode_ordinary(text)
+        _, offsets = self.tokenizer.decode_with_offsets(tokens)
+        return tokens, offsets
+    
+    def format_for_tokenization(self, text: str) -> str:
+        """Formatuje tekst przed tokenizacją."""
+        return f"<|im_start|>user\n{text}<|im_end|>\n<|im_start|>assistant<|im_end|>"
+    